@@ -1,7 +1,10 @@
 #ifndef _MSPASS_BUTTERWORTH_H_
 #define _MSPASS_BUTTERWORTH_H_
+#include <map>
+#include <vector>
 #include "mspass/seismic/TimeSeries.h"
 #include "mspass/seismic/Seismogram.h"
+#include "mspass/seismic/Ensemble.h"
 #include "mspass/algorithms/deconvolution/ComplexArray.h"
 namespace mspass::algorithms{
 /*! \brief MsPASS implementation of Butterworth filter as processing object.
@@ -258,6 +261,33 @@ public:
   elog
   */
   void apply(mspass::seismic::Seismogram& d);
+  /*! \brief Apply the filter to all members of a TimeSeries ensemble.
+
+  This method gives the same result as calling the TimeSeries apply method
+  on each member, but it is designed for large ensembles.   The operator is
+  adjusted once for each distinct sample interval found in the ensemble.
+  Those operators are cached in a container keyed by sample interval and
+  shared by all members with that sample interval.   The members are then
+  filtered in parallel on the process wide thread pool.
+
+  Unlike the single object methods this method does not change the sample
+  interval of the operator.   The safety for an upper corner too close to
+  Nyquist is the same as for TimeSeries.   The upper corner is disabled for
+  the affected members and a complaint is posted to their elog.
+  Dead members are not altered.
+
+  \param d ensemble to be filtered - members are altered in place.
+  */
+  void apply(mspass::seismic::Ensemble<mspass::seismic::TimeSeries>& d);
+  /*! \brief Apply the filter to all members of a Seismogram ensemble.
+
+  Three component version of the TimeSeries ensemble method.  Each
+  component of each member is filtered independently so the work is
+  spread over the thread pool at the component level.
+
+  \param d ensemble to be filtered - members are altered in place.
+  */
+  void apply(mspass::seismic::Ensemble<mspass::seismic::Seismogram>& d);
   /*! \brief Return the response of the filter in the frequency domain.
 
   The impulse response of any linear system can always be characterized by
@@ -380,6 +410,20 @@ private:
     const double astop, const double apass);
   void set_hi(const double fstop, const double fpass,
     const double astop, const double apass);
+  /* Filters the three components of d with the current operator without
+  any sample interval check. */
+  void apply_components(mspass::seismic::Seismogram& d);
+  /* Returns a copy of this operator adjusted for data with sample interval
+  d_dt using the same rules as apply(TimeSeries&).   hi_disabled is set true
+  when the upper corner had to be disabled. */
+  Butterworth operator_for_dt(const double d_dt, bool& hi_disabled) const;
+  /* Builds the message posted to elog when hi_disabled is true. */
+  std::string hi_disabled_message() const;
+  /* Fills cache with one operator per sample interval of the live members
+  of d and returns a pointer to the operator for each member (NULL for dead
+  members).  Complaints for disabled upper corners are posted here. */
+  template <typename Tdata> std::vector<Butterworth*> operators_for_members(
+    mspass::seismic::Ensemble<Tdata>& d, std::map<double,Butterworth>& cache) const;
 };
 }  // namespace end
 #endif
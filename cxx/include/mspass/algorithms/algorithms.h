@@ -32,6 +32,19 @@ This function does not throw an exception, but can post errors to the
 ErrorLogger object that is a member of Seismogram.
 */
 mspass::seismic::TimeSeries agc(mspass::seismic::Seismogram& d,const double twin);
+/*! \brief Apply agc operator to all members of an ensemble.
+
+Applies agc to each member of d in parallel using the process wide thread
+pool (see mspass::utility::set_thread_pool_size).
+
+\param d - ensemble of data to apply the operator to.  Members are altered.
+\param twin - length of the agc operator in seconds
+
+\return ensemble of gain functions with member i the gain applied to
+  member i of d.  Dead members have a default constructed TimeSeries.
+*/
+mspass::seismic::Ensemble<mspass::seismic::TimeSeries> agc(
+  mspass::seismic::Ensemble<mspass::seismic::Seismogram>& d,const double twin);
 /*! \brief Extracts a requested time window of data from a parent Seismogram object.
 
 It is common to need to extract a smaller segment of data from a larger
@@ -5,6 +5,7 @@
 #include "mspass/seismic/Seismogram.h"
 #include "mspass/seismic/Ensemble.h"
 #include "mspass/utility/VectorStatistics.h"
+#include "mspass/utility/ThreadPool.h"
 namespace mspass::algorithms::amplitudes{
 double PeakAmplitude(const mspass::seismic::CoreTimeSeries& d);
 double PeakAmplitude(const mspass::seismic::CoreSeismogram& d);
@@ -91,6 +92,8 @@ template <typename Tdata> double scale(Tdata& d,const ScalingMethod method,
 This function is the ensemble version of the scale function defined
 elsewhere in this file.   It applies a scaling member by member using
 the scale function for each.  The template is for member data type.
+Members are processed in parallel with the process wide thread pool
+(see mspass::utility::set_thread_pool_size).
 
 \param d is the data to be scale.  Works only if
   overloaded functions PeakAmplitude, PerfAmplitude, MADAmplitude, and
@@ -110,15 +113,10 @@ template <typename Tdata> std::vector<double> scale_ensemble_members(mspass::sei
     throw mspass::utility::MsPASSError("scale_ensemble_members function:  illegal perf level specified for clip percentage scale - must be between 0 and 1\nData unaltered - may cause downstream problems",
        mspass::utility::ErrorSeverity::Suspect);
   try{
-    typename std::vector<Tdata>::iterator dptr;
-    std::vector<double> amps;
-    amps.reserve(d.member.size());
-    for(dptr=d.member.begin();dptr!=d.member.end();++dptr)
-    {
-      double thisamp;
-      thisamp=scale(*dptr,method,level);
-      amps.push_back(thisamp);
-    }
+    std::vector<double> amps(d.member.size());
+    mspass::utility::parallel_for(d.member.size(),[&](size_t i){
+      amps[i]=scale(d.member[i],method,level);
+    });
     return amps;
   }catch(...){throw;};
 }
@@ -127,7 +125,8 @@ template <typename Tdata> std::vector<double> scale_ensemble_members(mspass::sei
 Sometimes we want to preserve true relative amplitudes between members of an ensemble
 but we need to scale the overall data to some range (e.g order 1 for plotting).
 Use this function to do that for ensembles.  The scale_ensemble_members function,
-in contrast, scales each member separately.
+in contrast, scales each member separately.  The member amplitudes and the
+scaling are computed in parallel with the process wide thread pool.
 
 \param d is the data to be scale.  Works only if
   overloaded functions PeakAmplitude, PerfAmplitude, MADAmplitude, and
@@ -150,31 +149,33 @@ template <typename Tdata> double scale_ensemble(mspass::seismic::Ensemble<Tdata>
        mspass::utility::ErrorSeverity::Suspect);
   try{
     double avgamp;   //defined here because the value computed here is returned on success
-    typename std::vector<Tdata>::iterator dptr;
-    std::vector<double> amps;
-    amps.reserve(d.member.size());
-    size_t nlive(0);
-    for(dptr=d.member.begin();dptr!=d.member.end();++dptr)
-    {
-      double amplitude;
-      if(dptr->dead()) continue;
+    std::vector<double> memberamps(d.member.size());
+    mspass::utility::parallel_for(d.member.size(),[&](size_t i){
+      if(d.member[i].dead()) return;
       switch(method)
       {
         case ScalingMethod::Peak:
-          amplitude=PeakAmplitude(*dptr);
+          memberamps[i]=PeakAmplitude(d.member[i]);
           break;
         case ScalingMethod::ClipPerc:
-          amplitude=PerfAmplitude(*dptr,level);
+          memberamps[i]=PerfAmplitude(d.member[i],level);
           break;
         case ScalingMethod::MAD:
-          amplitude=MADAmplitude(*dptr);
+          memberamps[i]=MADAmplitude(d.member[i]);
           break;
         case ScalingMethod::RMS:
         default:
-          amplitude=RMSAmplitude(*dptr);
+          memberamps[i]=RMSAmplitude(d.member[i]);
       };
+    });
+    std::vector<double> amps;
+    amps.reserve(d.member.size());
+    size_t nlive(0);
+    for(size_t i=0;i<d.member.size();++i)
+    {
+      if(d.member[i].dead()) continue;
       ++nlive;
-      amps.push_back(log(amplitude));
+      amps.push_back(log(memberamps[i]));
     }
     /*Silently return a 0 if there are no live data members*/
     if(nlive==0) return 0.0;
@@ -192,24 +193,24 @@ template <typename Tdata> double scale_ensemble(mspass::seismic::Ensemble<Tdata>
     avgamp=exp(avgamp);
     double dscale=level/avgamp;
     /* Now scale the data and apply calib */
-    for(dptr=d.member.begin();dptr!=d.member.end();++dptr)
-    {
-      if(dptr->live())
+    mspass::utility::parallel_for(d.member.size(),[&](size_t i){
+      Tdata& member(d.member[i]);
+      if(member.live())
       {
         double calib;
-        (*dptr) *= dscale;
-        if(dptr->is_defined(scale_factor_key))
+        member *= dscale;
+        if(member.is_defined(scale_factor_key))
         {
-          calib=dptr->get_double(scale_factor_key);
+          calib=member.get_double(scale_factor_key);
         }
         else
         {
           calib=1.0;
         }
         calib/=dscale;
-        dptr->put(scale_factor_key,calib);
+        member.put(scale_factor_key,calib);
       }
-    }
+    });
     return avgamp;
   }catch(...){throw;};
 }
@@ -94,6 +94,7 @@ public:
       */
     Complex64 operator[](int sample);
     double *ptr();
+    const double *ptr() const;
     double *ptr(int sample);
     ComplexArray& operator +=(const ComplexArray& other) noexcept(false);
     ComplexArray& operator -=(const ComplexArray& other) noexcept(false);
@@ -0,0 +1,89 @@
+#ifndef __ENSEMBLE_DECON_H__
+#define __ENSEMBLE_DECON_H__
+#include <vector>
+#include "mspass/seismic/TimeSeries.h"
+#include "mspass/seismic/Seismogram.h"
+#include "mspass/seismic/Ensemble.h"
+#include "mspass/algorithms/deconvolution/ScalarDecon.h"
+#include "mspass/algorithms/deconvolution/CNR3CDecon.h"
+namespace mspass::algorithms::deconvolution{
+/*! \brief Deconvolve all members of an ensemble with one wavelet.
+
+Array style (common source) deconvolution applies the same wavelet estimate
+to every member of an ensemble.  This function loads the wavelet into the
+operator once and then loads and processes each member in turn.  Operators
+whose inverse depends only on the wavelet (WaterLevelDecon and
+LeastSquareDecon) compute the inverse once and apply it to every member.
+The multitaper operators use the noise vector previously loaded with their
+loadnoise method for all members.
+
+As with the scalar operators timing is maintained externally.  The data in
+each member are used as is, so they should already be cut to the operator's
+processing window.  Each output member is a copy of the input with the
+sample data replaced by the deconvolved data.   The number of samples is
+not changed.   Dead members are copied unaltered.   If the operator throws
+an exception for a member the error is posted to the member's elog and
+the member is killed.
+
+\param op is the scalar deconvolution operator to apply.
+\param d is the ensemble of data to be deconvolved.
+\param wavelet is the wavelet used to compute the inverse for all members.
+
+\return ensemble of deconvolved data.
+*/
+mspass::seismic::Ensemble<mspass::seismic::TimeSeries> decon_ensemble(ScalarDecon& op,
+  const mspass::seismic::Ensemble<mspass::seismic::TimeSeries>& d,
+  const std::vector<double>& wavelet);
+/*! \brief Deconvolve all members of an ensemble with a wavelet per member.
+
+Same as the shared wavelet version except member i of d is deconvolved with
+the sample data of member i of wavelets.   The inverse is computed for
+each member, but all the work is done in a single call.
+
+\exception MsPASSError is thrown if d and wavelets are not the same size.
+*/
+mspass::seismic::Ensemble<mspass::seismic::TimeSeries> decon_ensemble(ScalarDecon& op,
+  const mspass::seismic::Ensemble<mspass::seismic::TimeSeries>& d,
+  const mspass::seismic::Ensemble<mspass::seismic::TimeSeries>& wavelets);
+/*! \brief Deconvolve all components of all members of a three component ensemble.
+
+This overload applies a scalar operator to each of the three components of
+each Seismogram in d using the same wavelet.  It does the same thing as
+the python RFdecon function applied to each member with a common wavelet.
+See the TimeSeries ensemble version for details.
+*/
+mspass::seismic::Ensemble<mspass::seismic::Seismogram> decon_ensemble(ScalarDecon& op,
+  const mspass::seismic::Ensemble<mspass::seismic::Seismogram>& d,
+  const std::vector<double>& wavelet);
+/*! \brief Deconvolve three component ensemble members each with its own wavelet.
+
+Member i of d is deconvolved with the sample data of member i of wavelets.
+The inverse is computed once per member and applied to all three components.
+
+\exception MsPASSError is thrown if d and wavelets are not the same size.
+*/
+mspass::seismic::Ensemble<mspass::seismic::Seismogram> decon_ensemble(ScalarDecon& op,
+  const mspass::seismic::Ensemble<mspass::seismic::Seismogram>& d,
+  const mspass::seismic::Ensemble<mspass::seismic::TimeSeries>& wavelets);
+/*! \brief Apply CNR3CDecon to all members of an ensemble with one wavelet.
+
+CNR3CDecon computes its inverse when the wavelet is loaded.  This function
+calls loadwavelet once and then runs loaddata and process for each member.
+Any noise spectrum used to regularize the wavelet inverse must be loaded
+with loadnoise_wavelet before calling this function.   Dead members and
+members for which the operator throws an exception are returned dead.
+
+\param op is the operator to apply.
+\param d is the ensemble of data to be deconvolved.  Members must span
+  the operator's processing window (and noise window if loadnoise is true).
+\param wavelet is the wavelet estimate passed to loadwavelet.
+\param loadnoise when true the data noise spectrum is recomputed from
+  each member.   Otherwise the last noise loaded with loadnoise_data is used.
+
+\return ensemble of deconvolved data.
+*/
+mspass::seismic::Ensemble<mspass::seismic::Seismogram> decon_ensemble(CNR3CDecon& op,
+  const mspass::seismic::Ensemble<mspass::seismic::Seismogram>& d,
+  const mspass::seismic::TimeSeries& wavelet, const bool loadnoise=false);
+}
+#endif
@@ -1,5 +1,6 @@
 #ifndef __FFT_DECON_OPERATOR_H__
 #define __FFT_DECON_OPERATOR_H__
+#include <memory>
 #include <string>
 #include <gsl/gsl_errno.h>
 #include <gsl/gsl_fft_complex.h>
@@ -7,6 +8,7 @@
 #include "mspass/utility/Metadata.h"
 #include "mspass/seismic/CoreTimeSeries.h"
 #include "mspass/algorithms/deconvolution/ComplexArray.h"
+#include "mspass/algorithms/deconvolution/FFTPlanCache.h"
 namespace mspass::algorithms::deconvolution{
 /*! \brief Object to hold components needed in all fft based decon algorithms.
 
@@ -14,7 +16,13 @@ The fft based algorithms implemented here us the GNU Scientific Library
 prime factorization fft algorithm.  Those methods require initialization
 given length of the fft to load and store the factorization data.  This
 object holds these for all such methods and recomputes them only when
-needed for efficiency.  */
+needed for efficiency.  The wavetable is read only and is shared with all
+other objects using the same fft length through the process wide cache
+of get_complex_fft_plan.  The workspace is private to each object.
+Data and wavelets are real so subclasses should use the real_forward_fft
+and real_inverse_fft methods that use the GSL real and halfcomplex
+algorithms at about half the cost of the complex transforms.  Spectra
+are then stored only for the nfft/2+1 bins from 0 to Nyquist.  */
 class FFTDeconOperator
 {
 public:
@@ -47,16 +55,68 @@ public:
     Fourier based deconvolution methods.   It avoids repetitious code that
     would be required otherwise.  inverse_wavelet methods are only
     wrappers for this generic method.  See documentation for inverse_wavelet
-    for description of tshift and t0parent.  */
+    for description of tshift and t0parent.  winv and sw are spectra at
+    the nfft/2+1 bins used by real_forward_fft.  */
     mspass::seismic::CoreTimeSeries FourierInverse(const ComplexArray& winv, const ComplexArray& sw,
    	const double dt, const double t0parent);
+    /*! \brief Fourier transform of real data.
+
+    Computes the fft of a real vector with the GSL real fft algorithm.
+    The spectrum of real data is Hermitian so only the nfft/2+1 bins
+    for frequencies 0 to Nyquist are returned.  All spectral arithmetic
+    in the operators is done on these bins.  The input is zero padded
+    if shorter than nfft and truncated if longer.
+
+    \param x is the real data vector.
+    \return ComplexArray of length nfft/2+1 with the coefficients of the
+      complex fft of x for bins 0 to nfft/2.
+    */
+    ComplexArray real_forward_fft(const std::vector<double>& x);
+    /*! \brief Inverse Fourier transform of a real signal.
+
+    Inverse of real_forward_fft.  z is packed in the GSL halfcomplex
+    order and transformed with the halfcomplex inverse fft.  The
+    imaginary parts of the zero frequency and (for even nfft) Nyquist
+    bins are ignored.
+
+    \param z is the spectrum at the nfft/2+1 bins from 0 to Nyquist.
+    \return vector of the nfft real samples of the inverse transform.
+    \exception MsPASSError is thrown if the size of z is not nfft/2+1.
+    */
+    std::vector<double> real_inverse_fft(const ComplexArray& z);
+    /*! Return the number of frequency bins, nfft/2+1, of a real fft. */
+    int number_bins() const {
+        return nfft/2+1;
+    };
+    /*! \brief rms of a full spectrum computed from its bins.
+
+    The ComplexArray::rms method applied to the bins returned by
+    real_forward_fft would not count the negative frequencies.  This
+    weights each bin by the number of full spectrum frequencies it
+    represents so the result is the same as rms of the full nfft
+    complex spectrum.
+    */
+    double spectrum_rms(const ComplexArray& z) const;
+    /*! Return the number of frequencies of the full nfft spectrum
+     * bin k represents:  1 for zero and Nyquist and 2 for all others. */
+    int bin_multiplicity(const int k) const {
+        return ((k==0 || 2*k==nfft) ? 1 : 2);
+    };
 
 protected:
     int nfft;
     int sample_shift;
-    gsl_fft_complex_wavetable *wavetable;
+    /* wavetable points into plan, which keeps it alive */
+    std::shared_ptr<const ComplexFFTPlan> plan;
+    const gsl_fft_complex_wavetable *wavetable;
     gsl_fft_complex_workspace *workspace;
+    /* shared real and halfcomplex wavetables and private workspace */
+    std::shared_ptr<const RealFFTPlan> real_plan;
+    gsl_fft_real_workspace *real_workspace;
     ComplexArray winv;
+private:
+    /* Sets the plans, wavetable and workspaces for the current nfft */
+    void load_plan();
 };
 
 /* This helper is best referenced here */
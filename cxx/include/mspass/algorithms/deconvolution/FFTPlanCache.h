@@ -0,0 +1,94 @@
+#ifndef __FFT_PLAN_CACHE_H__
+#define __FFT_PLAN_CACHE_H__
+#include <memory>
+#include <gsl/gsl_errno.h>
+#include <gsl/gsl_fft_complex.h>
+#include <gsl/gsl_fft_real.h>
+#include <gsl/gsl_fft_halfcomplex.h>
+namespace mspass::algorithms::deconvolution{
+/*! \brief Immutable GSL complex fft wavetable for one fft length.
+
+The GSL mixed radix fft requires a wavetable holding the factorization
+of the fft length and the trigonometric (twiddle) factors.  Computing it
+is a significant cost for short transforms, especially when the length is
+not a power of 2.  The wavetable is never modified by the GSL transform
+functions so one instance can be shared by any number of objects and
+threads.   Objects of this class are normally only obtained from
+get_complex_fft_plan.  Note the workspace required by the GSL functions
+is scratch memory and is NOT shared.   Each user needs their own.
+*/
+class ComplexFFTPlan
+{
+public:
+    /*! Compute the wavetable for an fft of length n.
+
+    \exception MsPASSError is thrown if the GSL allocation fails.*/
+    explicit ComplexFFTPlan(const size_t n);
+    ~ComplexFFTPlan();
+    ComplexFFTPlan(const ComplexFFTPlan& parent)=delete;
+    ComplexFFTPlan& operator=(const ComplexFFTPlan& parent)=delete;
+    size_t size() const {return nfft;};
+    const gsl_fft_complex_wavetable *wavetable() const {return wt;};
+private:
+    size_t nfft;
+    gsl_fft_complex_wavetable *wt;
+};
+/*! \brief Immutable GSL real and halfcomplex fft wavetables for one fft length.
+
+Real data can be transformed with the GSL real fft at about half the cost
+of the complex fft.   The result is in the GSL halfcomplex format and the
+inverse is computed with the halfcomplex algorithm that needs a different
+wavetable.   This object holds both.   Like ComplexFFTPlan it is read only
+and shared through get_real_fft_plan.  The gsl_fft_real_workspace used by
+both transforms is NOT shared.
+*/
+class RealFFTPlan
+{
+public:
+    /*! Compute the wavetables for an fft of length n.
+
+    \exception MsPASSError is thrown if the GSL allocation fails.*/
+    explicit RealFFTPlan(const size_t n);
+    ~RealFFTPlan();
+    RealFFTPlan(const RealFFTPlan& parent)=delete;
+    RealFFTPlan& operator=(const RealFFTPlan& parent)=delete;
+    size_t size() const {return nfft;};
+    const gsl_fft_real_wavetable *real_wavetable() const {return rwt;};
+    const gsl_fft_halfcomplex_wavetable *halfcomplex_wavetable() const {return hcwt;};
+private:
+    size_t nfft;
+    gsl_fft_real_wavetable *rwt;
+    gsl_fft_halfcomplex_wavetable *hcwt;
+};
+/*! \brief Get the shared fft plan for length n.
+
+Returns the plan for an fft of length n from a process wide cache.   The
+plan is computed and added to the cache if it is not already there.   The
+cache holds a limited number of plans and the least recently used is
+dropped when it is full.  A plan dropped from the cache remains valid
+for as long as a user holds the returned shared_ptr.  This function is
+thread safe.
+
+\param n is the fft length.
+\return shared_ptr to the plan.   An empty shared_ptr is returned for n=0.
+*/
+std::shared_ptr<const ComplexFFTPlan> get_complex_fft_plan(const size_t n);
+/*! \brief Get the shared real fft plan for length n.
+
+Same as get_complex_fft_plan for the real and halfcomplex wavetables.  Real
+and complex plans share the same cache and count against the same capacity.
+*/
+std::shared_ptr<const RealFFTPlan> get_real_fft_plan(const size_t n);
+/*! Set the maximum number of plans held by the fft plan cache.
+
+Plans beyond the new limit are dropped starting with the least recently
+used.   Setting 0 disables caching.*/
+void set_fft_plan_cache_capacity(const size_t maxplans);
+/*! Return the maximum number of plans held by the fft plan cache.*/
+size_t fft_plan_cache_capacity();
+/*! Return the number of plans currently held by the fft plan cache.*/
+size_t fft_plan_cache_size();
+/*! Drop all plans held by the fft plan cache.*/
+void clear_fft_plan_cache();
+}
+#endif
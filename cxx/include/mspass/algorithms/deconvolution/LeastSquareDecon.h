@@ -63,6 +63,7 @@ public:
 private:
     int read_metadata(const mspass::utility::Metadata &md);
     int apply();
+    void compute_winv();
     double damp;
 };
 }
@@ -8,6 +8,7 @@
 #include "mspass/seismic/TimeSeries.h"
 #include "mspass/utility/dmatrix.h"
 #include "mspass/seismic/PowerSpectrum.h"
+#include "mspass/algorithms/deconvolution/FFTPlanCache.h"
 
 namespace mspass::algorithms::deconvolution{
 /*! \brief Multittaper power spectral estimator.
@@ -100,7 +101,9 @@ private:
   mspass::utility::dmatrix tapers;
   /* Frequency bin interval of last data processed.*/
   double deltaf;
-  gsl_fft_complex_wavetable *wavetable;
+  /* wavetable is shared through the fft plan cache and points into plan */
+  std::shared_ptr<const ComplexFFTPlan> plan;
+  const gsl_fft_complex_wavetable *wavetable;
   gsl_fft_complex_workspace *workspace;
 };
 } //namespace ed
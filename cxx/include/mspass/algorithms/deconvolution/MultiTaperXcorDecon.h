@@ -95,7 +95,8 @@ public:
 private:
     /*! Private method called by constructors to load parameters.   */
     int read_metadata(const mspass::utility::Metadata &md,bool refresh);
-    /* Returns a tapered data in container of ComplexArray objects*/
+    /* Returns the fft of the data multiplied by each taper in a container
+    of ComplexArray objects*/
     std::vector<ComplexArray> taper_data(const std::vector<double>& signal);
     std::vector<double> noise;
     double nw,damp;
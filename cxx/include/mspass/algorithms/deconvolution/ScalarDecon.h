@@ -23,7 +23,7 @@ one of the children of this base class.
 class ScalarDecon: public BasicDeconOperator
 {
 public:
-    ScalarDecon():shapingwavelet() {};
+    ScalarDecon():shapingwavelet(),wavelet_changed(true) {};
     ScalarDecon(const mspass::utility::Metadata& md);
     ScalarDecon(const std::vector<double>& d, const std::vector<double>& w);
     ScalarDecon(const ScalarDecon& parent);
@@ -91,6 +91,13 @@ protected:
     std::vector<double> wavelet;
     std::vector<double> result;
     ShapingWavelet shapingwavelet;
+    /*! Set true by load and loadwavelet.   Operators whose inverse depends
+    only on the wavelet (e.g. WaterLevelDecon and LeastSquareDecon) use this
+    to recompute the inverse only when the wavelet changes.  That allows
+    a single wavelet inverse to be applied to any number of data vectors
+    loaded with loaddata.  Such operators must clear it after computing
+    the inverse and set it when a parameter change invalidates the inverse.*/
+    bool wavelet_changed;
 };
 }
 #endif
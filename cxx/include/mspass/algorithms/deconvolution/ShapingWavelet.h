@@ -74,6 +74,14 @@ public:
     ComplexArray *wavelet() {
         return &w;
     };
+    /*! Return a pointer to the shaping wavelet at the nfft/2+1 frequency
+     * bins from 0 to Nyquist used by the FFTDeconOperator real ffts.
+     * These are the Hermitian part of the full spectrum so applying them
+     * to the spectrum of a real signal yields the same real output
+     * as applying the full spectrum. */
+    ComplexArray *wavelet_bins() {
+        return &wbins;
+    };
     /*! Return the impulse response of the shaping filter.   Expect the
      * result to be symmetric about 0 (i.e. output spans nfft/2 to nfft/2.*/
     mspass::seismic::CoreTimeSeries impulse_response();
@@ -90,8 +98,12 @@ private:
     int nfft;
     /*! Frequency domain form of the shaping wavelet. */
     ComplexArray w;
+    /*! w at the bins from 0 to Nyquist. */
+    ComplexArray wbins;
     double dt,df;
     std::string wavelet_name;
+    /* Sets wbins from w.  Constructors must call this after setting w. */
+    void set_wavelet_bins();
 };
 }
 #endif
@@ -64,6 +64,7 @@ public:
 private:
     int read_metadata(const mspass::utility::Metadata &md);
     int apply();
+    void compute_winv();
     double wlv;
     /* QC metrics.   */
     /* This is the fraction of frequencies below the water level */
@@ -117,6 +117,18 @@ public:
 typedef Ensemble<TimeSeries> TimeSeriesEnsemble;
 /*! Useful alias for Ensemble<Seismogram> */
 typedef Ensemble<Seismogram> ThreeComponentEnsemble;
+/*! \brief Test if an ensemble or any of its members hold python objects.
+
+See mspass::utility::has_python_objects.  Ensemble algorithms that copy
+member Metadata use this to decide if they can run in parallel threads.
+*/
+template <typename Tdata> bool has_python_objects(const Ensemble<Tdata>& d)
+{
+  if(mspass::utility::has_python_objects(d)) return true;
+  for(size_t i=0;i<d.member.size();++i)
+    if(mspass::utility::has_python_objects(d.member[i])) return true;
+  return false;
+}
 /*! Procedure to set inputs vector defined by an Ensemble object.
 
 Ensembles are the generalization in MsPaSS of a "gather" as used in
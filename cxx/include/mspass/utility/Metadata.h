@@ -466,6 +466,18 @@ template <typename T> T Metadata::get(const std::string key) const
  * \return demangled name of type of the entity stored in the container.
  * */
 std::string demangled_name(const boost::any val);
+/*! \brief Test if a Metadata container holds any python objects.
+
+Values put from python that have no C++ equivalent (e.g. a MongoDB ObjectId)
+are stored as pybind11::object.   Copying or destroying such a value changes
+the python reference count, which is only safe while holding the python GIL
+and never from more than one thread at a time.   Code that copies Metadata
+with the GIL released or in parallel uses this to choose a safe path.
+
+\param md is the container to test.
+\return true if any value in md is a pybind11::object.
+*/
+bool has_python_objects(const Metadata& md);
 /*   Start of helper procedures for Metadata. */
 /*! \brief Define standard types for Metadata.
 
@@ -566,6 +578,29 @@ anything else.
 \return Metadata derived from sd
 */
 Metadata restore_serialized_metadata(const std::string);
+/*! Serialize Metadata to a compact binary string.
+
+This is the binary counterpart of serialize_metadata used by the pickle
+definitions in the python wrappers.  Each entry is written as the key length
+and key bytes followed by a one byte type tag and the value in native
+binary form.  Strings are written as length and bytes and python objects as
+the length and bytes of their pickle.   The output is not portable between
+machines with different byte order, which is not an issue for the
+serialization used by parallel schedulers.  Entries with types other
+than the ones listed above generate an error message posted to stderr and
+are dropped as in serialize_metadata.
+
+\param md is the Metadata object to be serialized
+\return std::string holding the binary serialized data.
+*/
+std::string serialize_metadata_binary(const Metadata& md);
+/*! Unpack Metadata serialized with serialize_metadata_binary.
+
+\param sd is the serialized data to be unpacked
+\return Metadata derived from sd
+\exception MsPASSError if the data are truncated or have an unknown type tag
+*/
+Metadata restore_serialized_metadata_binary(const std::string& sd);
 
 } // end utility namespace
 }  //End of namespace MsPASS
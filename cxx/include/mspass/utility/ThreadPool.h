@@ -0,0 +1,77 @@
+#ifndef _THREAD_POOL_H_
+#define _THREAD_POOL_H_
+#include <condition_variable>
+#include <deque>
+#include <functional>
+#include <mutex>
+#include <thread>
+#include <vector>
+namespace mspass{
+namespace utility{
+/*! \brief Fixed size pool of worker threads.
+
+Ensemble algorithms process members that are independent of each other.
+This object runs those loops on a set of threads created once and reused
+for every call.   The design is deliberately minimal.   The only operation
+is parallel_for, which runs a function for each index of a loop and returns
+when all of them are finished.
+
+Functions run by the pool must not call python.   They run with the GIL
+released, and in general on threads that python knows nothing about.
+*/
+class ThreadPool
+{
+public:
+  /*! Create a pool with nthreads workers.
+
+  The thread calling parallel_for also does work so a pool of size 1 has
+  no worker threads and runs everything serially in the calling thread.
+
+  \param nthreads is the number of threads used by parallel_for.  0 means
+    use std::thread::hardware_concurrency.
+  */
+  explicit ThreadPool(const size_t nthreads=0);
+  /*! Destructor waits for running work to finish and joins all threads. */
+  ~ThreadPool();
+  ThreadPool(const ThreadPool& parent)=delete;
+  ThreadPool& operator=(const ThreadPool& parent)=delete;
+  /*! Return the number of threads used by parallel_for.*/
+  size_t size() const {return workers.size()+1;};
+  /*! \brief Run f(i) for i=0,...,n-1.
+
+  Indices are handed out dynamically so uneven work per index is balanced
+  over the threads.   The order in which indices are processed is not
+  defined.   This method blocks until all indices are done.   If f throws
+  an exception no new indices are started and the first exception thrown
+  is rethrown in the calling thread after the running calls finish.
+  A call from inside a function run by the pool runs serially to avoid
+  deadlock.
+  */
+  void parallel_for(const size_t n, const std::function<void(size_t)>& f);
+private:
+  std::vector<std::thread> workers;
+  std::deque<std::function<void()>> jobs;
+  std::mutex lock;
+  std::condition_variable wakeup;
+  bool stopping;
+  void worker_loop();
+};
+/*! \brief Set the number of threads used by the process wide thread pool.
+
+The process wide pool is used by the ensemble algorithms.   Calls already
+running on the old pool are not affected.
+
+\param nthreads is the number of threads.  0 means one per hardware thread.
+*/
+void set_thread_pool_size(const size_t nthreads);
+/*! Return the number of threads used by the process wide thread pool.*/
+size_t thread_pool_size();
+/*! \brief Run f(i) for i=0,...,n-1 on the process wide thread pool.
+
+See ThreadPool::parallel_for.  The pool is created on first use with
+one thread per hardware thread unless set_thread_pool_size was called.
+*/
+void parallel_for(const size_t n, const std::function<void(size_t)>& f);
+}  // End utility namespace
+}  // End mspass namespace
+#endif
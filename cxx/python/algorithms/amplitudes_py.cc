@@ -58,38 +58,47 @@ PYBIND11_MODULE(amplitudes, m) {
   a standard hit they are not to be used directly - should be hidden behing
   python functions that simply the api and (more importantly) add an optional
   history preservation. */
+  /* The scale functions only alter sample data and the numeric calib
+  attribute so they run with the GIL released.  The ensemble versions
+  process members in parallel on the ccore thread pool. */
   m.def("_scale",py::overload_cast<Seismogram&,const ScalingMethod,const double>(&scale<Seismogram>),
     "Scale a Seismogram object with a chosen amplitude metric",
     py::return_value_policy::copy,
+    py::call_guard<py::gil_scoped_release>(),
     py::arg("d"),py::arg("method"),py::arg("level") )
   ;
   m.def("_scale",py::overload_cast<TimeSeries&,const ScalingMethod,const double>(&scale<TimeSeries>),
     "Scale a TimeSeries object with a chosen amplitude metric",
     py::return_value_policy::copy,
+    py::call_guard<py::gil_scoped_release>(),
     py::arg("d"),py::arg("method"),py::arg("level") )
   ;
   m.def("_scale_ensemble_members",py::overload_cast<Ensemble<Seismogram>&,
           const ScalingMethod&, const double>(&scale_ensemble_members<Seismogram>),
     "Scale each member of a SeismogramEnsemble individually by selected metric",
     py::return_value_policy::copy,
+    py::call_guard<py::gil_scoped_release>(),
     py::arg("d"),py::arg("method"),py::arg("level") )
   ;
   m.def("_scale_ensemble_members",py::overload_cast<Ensemble<TimeSeries>&,
           const ScalingMethod&, const double>(&scale_ensemble_members<TimeSeries>),
     "Scale each member of a TimeSeriesEnsemble individually by selected metric",
     py::return_value_policy::copy,
+    py::call_guard<py::gil_scoped_release>(),
     py::arg("d"),py::arg("method"),py::arg("level") )
   ;
   m.def("_scale_ensemble",py::overload_cast<Ensemble<Seismogram>&,
           const ScalingMethod&, const double, const bool>(&scale_ensemble<Seismogram>),
     "Apply a uniform scale to a SeismogramEnsemble using average member estimates by a selected method",
     py::return_value_policy::copy,
+    py::call_guard<py::gil_scoped_release>(),
     py::arg("d"),py::arg("method"),py::arg("level"),py::arg("use_mean") )
   ;
   m.def("_scale_ensemble",py::overload_cast<Ensemble<TimeSeries>&,
           const ScalingMethod&, const double, const bool>(&scale_ensemble<TimeSeries>),
     "Apply a uniform scale to a TimeSeriesEnsemble using average member estimates by a selected method",
     py::return_value_policy::copy,
+    py::call_guard<py::gil_scoped_release>(),
     py::arg("d"),py::arg("method"),py::arg("level"),py::arg("use_mean") )
   ;
   
@@ -3,6 +3,7 @@
 #include <mspass/algorithms/algorithms.h>
 #include <mspass/algorithms/Butterworth.h>
 #include <mspass/utility/Metadata.h>
+#include "python/utility/gil_release_py.h"
 
 namespace mspass {
 namespace mspasspy {
@@ -11,6 +12,22 @@ namespace py=pybind11;
 using namespace std;
 using namespace mspass::seismic;
 using namespace mspass::algorithms;
+using mspass::utility::has_python_objects;
+
+/* The TimeSeries and Seismogram apply methods change the sample interval
+of the operator to that of the data.   Python threads can share one
+operator, so the filter is run with the GIL released on a copy and the
+copy is assigned back with the GIL held.   The data themselves only hold
+samples and the error log here, which are safe to touch without the GIL. */
+template <typename Tdata> void apply_butterworth(Butterworth& op, Tdata& d)
+{
+  Butterworth work(op);
+  {
+    py::gil_scoped_release release;
+    work.apply(d);
+  }
+  op=work;
+}
 
 PYBIND11_MODULE(basic, m) {
   m.attr("__name__") = "mspasspy.ccore.algorithms.basic";
@@ -34,14 +51,18 @@ PYBIND11_MODULE(basic, m) {
     .def("change_dt",&Butterworth::change_dt,
          "Change sample interval defining the operator (does not change corners) ")
     /* Note we intentionally do not overload CoreTimeSeries and CoreSeismogram.
-    They do not handle errors as gracefully */
-    .def("apply",py::overload_cast<mspass::seismic::TimeSeries&>
-         (&Butterworth::apply),"Apply the predefined filter to a TimeSeries object")
-    .def("apply",py::overload_cast<std::vector<double>&>(&Butterworth::apply),
+    They do not handle errors as gracefully.  See apply_butterworth for how
+    the GIL is released. */
+    .def("apply",&apply_butterworth<mspass::seismic::TimeSeries>,
+         "Apply the predefined filter to a TimeSeries object")
+    .def("apply",&apply_butterworth<std::vector<double>>,
     	"Apply the predefined filter to a vector of data")
-    .def("apply",py::overload_cast<mspass::seismic::Seismogram&>
-         (&Butterworth::apply),
+    .def("apply",&apply_butterworth<mspass::seismic::Seismogram>,
          "Apply the predefined filter to a 3c Seismogram object")
+    .def("apply",&apply_butterworth<mspass::seismic::Ensemble<mspass::seismic::TimeSeries>>,
+         "Apply the predefined filter to all members of a TimeSeriesEnsemble in parallel")
+    .def("apply",&apply_butterworth<mspass::seismic::Ensemble<mspass::seismic::Seismogram>>,
+         "Apply the predefined filter to all members of a SeismogramEnsemble in parallel")
     .def("dt",&Butterworth::current_dt,
       "Current sample interval used for nondimensionalizing frequencies")
     .def("low_corner",&Butterworth::low_corner,"Return low frequency f3d point")
@@ -91,7 +112,22 @@ PYBIND11_MODULE(basic, m) {
       py::arg("component")
   );
 
-  m.def("agc",&agc,"Automatic gain control a Seismogram",
+  /* agc copies the Metadata of d to the gain function it returns so the
+  GIL can only be released if d has no python objects */
+  m.def("agc",[](Seismogram& d, const double twin) {
+      OptionalGILRelease release(has_python_objects(d));
+      return agc(d,twin);
+    },
+    "Automatic gain control a Seismogram",
+    py::return_value_policy::copy,
+    py::arg("d"),
+    py::arg("twin") )
+  ;
+  m.def("agc",[](Ensemble<Seismogram>& d, const double twin) {
+      OptionalGILRelease release(has_python_objects(d));
+      return agc(d,twin);
+    },
+    "Automatic gain control all members of a SeismogramEnsemble in parallel",
     py::return_value_policy::copy,
     py::arg("d"),
     py::arg("twin") )
@@ -114,13 +150,23 @@ PYBIND11_MODULE(basic, m) {
   */
   py::module_::import("mspasspy.ccore.seismic");
 
-  m.def("_bundle_seed_data",&bundle_seed_data,
+  m.def("_bundle_seed_data",[](Ensemble<TimeSeries>& d) {
+      OptionalGILRelease release(has_python_objects(d));
+      return bundle_seed_data(d);
+    },
     "Create SeismogramEnsemble from sorted TimeSeriesEnsemble",
     py::return_value_policy::copy,
     py::arg("d") )
   ;
 
-  m.def("_BundleSEEDGroup",&BundleSEEDGroup,
+  m.def("_BundleSEEDGroup",[](const std::vector<TimeSeries>& d,
+        const size_t i0, const size_t iend) {
+      bool hold(false);
+      for(size_t i=i0;i<=iend && i<d.size();++i)
+        if(has_python_objects(d[i])) hold=true;
+      OptionalGILRelease release(hold);
+      return BundleSEEDGroup(d,i0,iend);
+    },
     "Bundle a seed grouping of TimeSeries into one or more Seismogram objects",
     py::return_value_policy::copy,
     py::arg("d"),
@@ -11,6 +11,9 @@
 #include <mspass/algorithms/deconvolution/MultiTaperSpecDivDecon.h>
 #include <mspass/algorithms/deconvolution/GeneralIterDecon.h>
 #include <mspass/algorithms/deconvolution/CNR3CDecon.h>
+#include <mspass/algorithms/deconvolution/FFTPlanCache.h>
+#include <mspass/algorithms/deconvolution/EnsembleDecon.h>
+#include "python/utility/gil_release_py.h"
 PYBIND11_MAKE_OPAQUE(std::vector<double>);
 
 
@@ -22,6 +25,7 @@ using namespace std;
 using namespace mspass::utility;
 using namespace mspass::seismic;
 using namespace mspass::algorithms::deconvolution;
+using mspass::utility::has_python_objects;
 
 
 /* Trampoline class for BasicDeconOperator */
@@ -201,6 +205,9 @@ PYBIND11_MODULE(deconvolution, m) {
         "Load noise to use for regularization from a seismogram")
     .def("loadwavelet",&CNR3CDecon::loadwavelet,
         "Load an externally determined wavelet for deconvolution")
+    /* process holds the GIL because it copies the Metadata of the data
+    loaded earlier, which may contain python objects.  Use decon_ensemble
+    to process many Seismograms with the GIL released. */
     .def("process",&CNR3CDecon::process,"Process data previously loaded")
     .def("ideal_output",&CNR3CDecon::ideal_output,
         "Return ideal output for this operator")
@@ -244,6 +251,73 @@ PYBIND11_MODULE(deconvolution, m) {
       py::arg("d"),
       py::arg("i0") )
     ;
+  /* The ensemble functions can run for a long time so they release the GIL.
+  They copy member Metadata so that is only possible when it holds no
+  python objects. */
+  m.def("decon_ensemble",[](ScalarDecon& op, const Ensemble<TimeSeries>& d,
+        const std::vector<double>& wavelet) {
+        OptionalGILRelease release(has_python_objects(d));
+        return decon_ensemble(op,d,wavelet);
+      },
+      "Deconvolve all members of a TimeSeriesEnsemble with one wavelet",
+      py::arg("op"),
+      py::arg("d"),
+      py::arg("wavelet") )
+    ;
+  m.def("decon_ensemble",[](ScalarDecon& op, const Ensemble<TimeSeries>& d,
+        const Ensemble<TimeSeries>& wavelets) {
+        OptionalGILRelease release(has_python_objects(d) || has_python_objects(wavelets));
+        return decon_ensemble(op,d,wavelets);
+      },
+      "Deconvolve each member of a TimeSeriesEnsemble with the matching member of an ensemble of wavelets",
+      py::arg("op"),
+      py::arg("d"),
+      py::arg("wavelet") )
+    ;
+  m.def("decon_ensemble",[](ScalarDecon& op, const Ensemble<Seismogram>& d,
+        const std::vector<double>& wavelet) {
+        OptionalGILRelease release(has_python_objects(d));
+        return decon_ensemble(op,d,wavelet);
+      },
+      "Deconvolve all components of all members of a SeismogramEnsemble with one wavelet",
+      py::arg("op"),
+      py::arg("d"),
+      py::arg("wavelet") )
+    ;
+  m.def("decon_ensemble",[](ScalarDecon& op, const Ensemble<Seismogram>& d,
+        const Ensemble<TimeSeries>& wavelets) {
+        OptionalGILRelease release(has_python_objects(d) || has_python_objects(wavelets));
+        return decon_ensemble(op,d,wavelets);
+      },
+      "Deconvolve each member of a SeismogramEnsemble with the matching member of an ensemble of wavelets",
+      py::arg("op"),
+      py::arg("d"),
+      py::arg("wavelet") )
+    ;
+  m.def("decon_ensemble",[](CNR3CDecon& op, const Ensemble<Seismogram>& d,
+        const TimeSeries& wavelet, const bool loadnoise) {
+        OptionalGILRelease release(has_python_objects(d) || has_python_objects(wavelet));
+        return decon_ensemble(op,d,wavelet,loadnoise);
+      },
+      "Apply CNR3CDecon to all members of a SeismogramEnsemble with one wavelet",
+      py::arg("op"),
+      py::arg("d"),
+      py::arg("wavelet"),
+      py::arg("loadnoise")=false )
+    ;
+  m.def("set_fft_plan_cache_capacity",&set_fft_plan_cache_capacity,
+      "Set the maximum number of fft wavetables held by the process wide cache shared by all fft operators",
+      py::arg("maxplans"))
+    ;
+  m.def("fft_plan_cache_capacity",&fft_plan_cache_capacity,
+      "Return the maximum number of fft wavetables held by the process wide cache")
+    ;
+  m.def("fft_plan_cache_size",&fft_plan_cache_size,
+      "Return the number of fft wavetables currently held by the process wide cache")
+    ;
+  m.def("clear_fft_plan_cache",&clear_fft_plan_cache,
+      "Release all fft wavetables held by the process wide cache")
+    ;
 }
 
 } // namespace mspasspy
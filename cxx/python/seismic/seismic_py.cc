@@ -6,6 +6,8 @@
 #include <pybind11/embed.h>
 
 #include <boost/archive/text_oarchive.hpp>
+#include <boost/archive/binary_oarchive.hpp>
+#include <boost/archive/binary_iarchive.hpp>
 
 #include <mspass/seismic/keywords.h>
 #include <mspass/seismic/SlownessVector.h>
@@ -117,6 +119,81 @@ public:
   }
 };
 
+/* Helpers for the binary pickle state of the atomic data objects.  The
+state is the binary serialized Metadata, a boost binary archive of the rest
+of the object, and the samples as a numpy array.  The array is an alias of
+the sample buffer owned by the python object base (the data object itself
+or the ensemble holding it), so with pickle protocol 5 numpy hands it to
+pickle as an out-of-band PickleBuffer without a copy.  They are shared by
+the atomic objects and the ensembles. */
+py::tuple timeseries_pickle_state(const TimeSeries& self, py::handle base)
+{
+  std::ostringstream ss;
+  {
+    boost::archive::binary_oarchive ar(ss);
+    ar << dynamic_cast<const BasicTimeSeries&>(self);
+    ar << dynamic_cast<const ProcessingHistory&>(self);
+  }
+  py::array_t<double> darr(self.s.size(),self.s.data(),base);
+  return py::make_tuple(py::bytes(serialize_metadata_binary(self)),
+    py::bytes(ss.str()),darr);
+}
+TimeSeries timeseries_from_pickle_state(py::tuple t)
+{
+  Metadata md=restore_serialized_metadata_binary(t[0].cast<std::string>());
+  std::istringstream ss(t[1].cast<std::string>());
+  boost::archive::binary_iarchive ar(ss);
+  BasicTimeSeries bts;
+  ProcessingHistory corets;
+  ar >> bts >> corets;
+  py::array_t<double, py::array::c_style | py::array::forcecast> darr=
+    t[2].cast<py::array_t<double, py::array::c_style | py::array::forcecast>>();
+  std::vector<double> d(darr.data(),darr.data()+darr.size());
+  return TimeSeries(bts,md,corets,d);
+}
+py::tuple seismogram_pickle_state(const Seismogram& self, py::handle base)
+{
+  std::ostringstream ss;
+  {
+    boost::archive::binary_oarchive ar(ss);
+    ar << dynamic_cast<const BasicTimeSeries&>(self);
+    ar << dynamic_cast<const ProcessingHistory&>(self);
+    bool cardinal=self.cardinal();
+    bool orthogonal=self.orthogonal();
+    dmatrix tmatrix=self.get_transformation_matrix();
+    ar << cardinal << orthogonal << tmatrix;
+  }
+  size_t u_size = self.u.rows()*self.u.columns();
+  py::array_t<double> darr;
+  if(u_size==0)
+    darr=py::array_t<double>(0);
+  else
+    darr=py::array_t<double>(u_size,self.u.get_address(0,0),base);
+  return py::make_tuple(py::bytes(serialize_metadata_binary(self)),
+    py::bytes(ss.str()),darr);
+}
+Seismogram seismogram_from_pickle_state(py::tuple t)
+{
+  Metadata md=restore_serialized_metadata_binary(t[0].cast<std::string>());
+  std::istringstream ss(t[1].cast<std::string>());
+  boost::archive::binary_iarchive ar(ss);
+  BasicTimeSeries bts;
+  ProcessingHistory corets;
+  bool cardinal,orthogonal;
+  dmatrix tmatrix;
+  ar >> bts >> corets >> cardinal >> orthogonal >> tmatrix;
+  py::array_t<double, py::array::c_style | py::array::forcecast> darr=
+    t[2].cast<py::array_t<double, py::array::c_style | py::array::forcecast>>();
+  size_t u_size=darr.size();
+  dmatrix u;
+  if(u_size>0)
+  {
+    u=dmatrix(3, u_size/3);
+    memcpy(u.get_address(0,0), darr.data(), sizeof(double) * u_size);
+  }
+  return Seismogram(bts,md,corets,cardinal,orthogonal,tmatrix,u);
+}
+
 PYBIND11_MODULE(seismic, m) {
   m.attr("__name__") = "mspasspy.ccore.seismic";
   m.doc() = "A submodule for seismic namespace of ccore";
@@ -171,8 +248,11 @@ PYBIND11_MODULE(seismic, m) {
         del __main__.__dict__['_KeywordDict']
     )", scope);
 
-  /* We need one of these for each std::vector container to make them function correctly*/
-  py::bind_vector<std::vector<double>>(m, "DoubleVector");
+  /* We need one of these for each std::vector container to make them function correctly.
+  The buffer protocol allows numpy to alias the sample vector of a TimeSeries without a
+  copy (np.asarray) and allows a DoubleVector to be constructed from a numpy array with
+  a single block copy instead of an element by element conversion.*/
+  py::bind_vector<std::vector<double>>(m, "DoubleVector", py::buffer_protocol());
   /* We define the following as global such that it can be used in the algorithms.basic module.
      The usage is documented here:
      https://pybind11.readthedocs.io/en/stable/advanced/cast/stl.html#binding-stl-containers
@@ -361,69 +441,48 @@ PYBIND11_MODULE(seismic, m) {
     .def(py::init<const Metadata&,std::string,std::string,std::string,std::string>())
     .def("load_history",&Seismogram::load_history,
        "Load ProcessingHistory from another data object that contains relevant history")
+    /* See seismogram_pickle_state for the layout of the state.  Pickles
+    written by earlier versions used text archives and are still restored by
+    the legacy branch of the setstate function. */
     .def(py::pickle(
-      [](const Seismogram &self) {
-        string sbuf;
-        sbuf=serialize_metadata(self);
-        stringstream ssbts;
-        ssbts << std::setprecision(17);
-        boost::archive::text_oarchive arbts(ssbts);
-        arbts << dynamic_cast<const BasicTimeSeries&>(self);
-        stringstream sscorets;
-        boost::archive::text_oarchive arcorets(sscorets);
-        arcorets<<dynamic_cast<const ProcessingHistory&>(self);
-        // these are behind getter/setters
-        bool cardinal=self.cardinal();
-        bool orthogonal=self.orthogonal();
-        dmatrix tmatrix=self.get_transformation_matrix();
-        stringstream sstm;
-        boost::archive::text_oarchive artm(sstm);
-        artm<<tmatrix;
-        //This creates a numpy array alias from the vector container
-        //without a move or copy of the data
-        size_t u_size = self.u.rows()*self.u.columns();
-        if(u_size==0){
-          py::array_t<double, py::array::f_style> darr(u_size,NULL);
-          return py::make_tuple(sbuf,ssbts.str(),sscorets.str(),
-            cardinal, orthogonal,sstm.str(),
-            u_size, darr);
-        } else {
-          py::array_t<double, py::array::f_style> darr(u_size,self.u.get_address(0,0));
-          return py::make_tuple(sbuf,ssbts.str(),sscorets.str(),
-            cardinal, orthogonal,sstm.str(),
-            u_size, darr);
-        }
+      [](py::object self_obj) {
+        return seismogram_pickle_state(self_obj.cast<const Seismogram&>(),self_obj);
       },
       [](py::tuple t) {
-        string sbuf=t[0].cast<std::string>();
-        Metadata md;
-        md=Metadata(restore_serialized_metadata(sbuf));
-        stringstream ssbts(t[1].cast<std::string>());
-        boost::archive::text_iarchive arbts(ssbts);
-        BasicTimeSeries bts;
-        arbts>>bts;
-        stringstream sscorets(t[2].cast<std::string>());
-        boost::archive::text_iarchive arcorets(sscorets);
-        ProcessingHistory corets;
-        arcorets>>corets;
-        bool cardinal=t[3].cast<bool>();
-        bool orthogonal=t[4].cast<bool>();
-        stringstream sstm(t[5].cast<std::string>());
-        boost::archive::text_iarchive artm(sstm);
-        dmatrix tmatrix;
-        artm>>tmatrix;
-        size_t u_size = t[6].cast<size_t>();
-        py::array_t<double, py::array::f_style> darr;
-        darr=t[7].cast<py::array_t<double, py::array::f_style>>();
-        py::buffer_info info = darr.request();
-        if(u_size==0) {
-          dmatrix u;
-          return Seismogram(bts,md,corets,cardinal,orthogonal,tmatrix,u);
-        } else {
-          dmatrix u(3, u_size/3);
-          memcpy(u.get_address(0,0), info.ptr, sizeof(double) * u_size);
-          return Seismogram(bts,md,corets,cardinal,orthogonal,tmatrix,u);
+        if(py::isinstance<py::str>(t[0]))
+        {
+          /* legacy text archive state */
+          string sbuf=t[0].cast<std::string>();
+          Metadata md;
+          md=Metadata(restore_serialized_metadata(sbuf));
+          stringstream ssbts(t[1].cast<std::string>());
+          boost::archive::text_iarchive arbts(ssbts);
+          BasicTimeSeries bts;
+          arbts>>bts;
+          stringstream sscorets(t[2].cast<std::string>());
+          boost::archive::text_iarchive arcorets(sscorets);
+          ProcessingHistory corets;
+          arcorets>>corets;
+          bool cardinal=t[3].cast<bool>();
+          bool orthogonal=t[4].cast<bool>();
+          stringstream sstm(t[5].cast<std::string>());
+          boost::archive::text_iarchive artm(sstm);
+          dmatrix tmatrix;
+          artm>>tmatrix;
+          size_t u_size = t[6].cast<size_t>();
+          py::array_t<double, py::array::f_style> darr;
+          darr=t[7].cast<py::array_t<double, py::array::f_style>>();
+          py::buffer_info info = darr.request();
+          if(u_size==0) {
+            dmatrix u;
+            return Seismogram(bts,md,corets,cardinal,orthogonal,tmatrix,u);
+          } else {
+            dmatrix u(3, u_size/3);
+            memcpy(u.get_address(0,0), info.ptr, sizeof(double) * u_size);
+            return Seismogram(bts,md,corets,cardinal,orthogonal,tmatrix,u);
+          }
         }
+        return seismogram_from_pickle_state(t);
      }
      ))
     ;
@@ -482,44 +541,38 @@ PYBIND11_MODULE(seismic, m) {
       .def(py::init<const BasicTimeSeries&,const Metadata&,
         const ProcessingHistory&, const std::vector&)
         */
+      /* See timeseries_pickle_state for the layout of the state. */
       .def(py::pickle(
-        [](const TimeSeries &self) {
-          string sbuf;
-          sbuf=serialize_metadata(self);
-          stringstream ssbts;
-          ssbts << std::setprecision(17);
-          boost::archive::text_oarchive arbts(ssbts);
-          arbts << dynamic_cast<const BasicTimeSeries&>(self);
-          stringstream sscorets;
-          boost::archive::text_oarchive arcorets(sscorets);
-          arcorets<<dynamic_cast<const ProcessingHistory&>(self);
-          //This creates a numpy array alias from the vector container
-          //without a move or copy of the data
-          py::array_t<double, py::array::f_style> darr(self.s.size(),&(self.s[0]));
-          return py::make_tuple(sbuf,ssbts.str(),sscorets.str(),darr);
+        [](py::object self_obj) {
+          return timeseries_pickle_state(self_obj.cast<const TimeSeries&>(),self_obj);
         },
         [](py::tuple t) {
-         string sbuf=t[0].cast<std::string>();
-         Metadata md;
-         md=Metadata(restore_serialized_metadata(sbuf));
-         stringstream ssbts(t[1].cast<std::string>());
-         boost::archive::text_iarchive arbts(ssbts);
-         BasicTimeSeries bts;
-         arbts>>bts;
-         stringstream sscorets(t[2].cast<std::string>());
-         boost::archive::text_iarchive arcorets(sscorets);
-         ProcessingHistory corets;
-         arcorets>>corets;
-         // There might be a faster way to do this than a copy like
-         //this but for now this, like Seismogram, is make it work before you
-         //make it fast
-         py::array_t<double, py::array::f_style> darr;
-         darr=t[3].cast<py::array_t<double, py::array::f_style>>();
-         py::buffer_info info = darr.request();
-         std::vector<double> d;
-         d.resize(info.shape[0]);
-         memcpy(d.data(), info.ptr, sizeof(double) * d.size());
-         return TimeSeries(bts,md,corets,d);;
+         if(py::isinstance<py::str>(t[0]))
+         {
+           /* legacy text archive state */
+           string sbuf=t[0].cast<std::string>();
+           Metadata md;
+           md=Metadata(restore_serialized_metadata(sbuf));
+           stringstream ssbts(t[1].cast<std::string>());
+           boost::archive::text_iarchive arbts(ssbts);
+           BasicTimeSeries bts;
+           arbts>>bts;
+           stringstream sscorets(t[2].cast<std::string>());
+           boost::archive::text_iarchive arcorets(sscorets);
+           ProcessingHistory corets;
+           arcorets>>corets;
+           // There might be a faster way to do this than a copy like
+           //this but for now this, like Seismogram, is make it work before you
+           //make it fast
+           py::array_t<double, py::array::f_style> darr;
+           darr=t[3].cast<py::array_t<double, py::array::f_style>>();
+           py::buffer_info info = darr.request();
+           std::vector<double> d;
+           d.resize(info.shape[0]);
+           memcpy(d.data(), info.ptr, sizeof(double) * d.size());
+           return TimeSeries(bts,md,corets,d);;
+         }
+         return timeseries_from_pickle_state(t);
        }
      ))
      ;
@@ -581,6 +634,26 @@ PYBIND11_MODULE(seismic, m) {
     })
     .def("__setitem__",py::overload_cast<const std::string,const std::string>(&BasicMetadata::put))
     .def("__setitem__",py::overload_cast<const std::string,const py::object>(&Metadata::put_object))
+    /* The state is the ensemble Metadata and the list of member states.  The
+    samples of each member are an alias owned by the ensemble, so pickle
+    protocol 5 emits one out-of-band buffer per member without copying. */
+    .def(py::pickle(
+      [](py::object self_obj) {
+        const Ensemble<TimeSeries>& self=self_obj.cast<const Ensemble<TimeSeries>&>();
+        py::list members;
+        for(const TimeSeries& d : self.member)
+          members.append(timeseries_pickle_state(d,self_obj));
+        return py::make_tuple(py::bytes(serialize_metadata_binary(self)),members);
+      },
+      [](py::tuple t) {
+        py::list members=t[1].cast<py::list>();
+        Ensemble<TimeSeries> ens(restore_serialized_metadata_binary(t[0].cast<std::string>()),
+          members.size());
+        for(py::handle d : members)
+          ens.member.push_back(timeseries_from_pickle_state(d.cast<py::tuple>()));
+        return ens;
+      }
+    ))
   ;
   py::class_<Ensemble<Seismogram>,Metadata>(m,"SeismogramEnsemble","Gather of vector(3c) time series objects")
     .def(py::init<>())
@@ -628,6 +701,26 @@ PYBIND11_MODULE(seismic, m) {
     })
     .def("__setitem__",py::overload_cast<const std::string,const std::string>(&BasicMetadata::put))
     .def("__setitem__",py::overload_cast<const std::string,const py::object>(&Metadata::put_object))
+    /* The state is the ensemble Metadata and the list of member states.  The
+    samples of each member are an alias owned by the ensemble, so pickle
+    protocol 5 emits one out-of-band buffer per member without copying. */
+    .def(py::pickle(
+      [](py::object self_obj) {
+        const Ensemble<Seismogram>& self=self_obj.cast<const Ensemble<Seismogram>&>();
+        py::list members;
+        for(const Seismogram& d : self.member)
+          members.append(seismogram_pickle_state(d,self_obj));
+        return py::make_tuple(py::bytes(serialize_metadata_binary(self)),members);
+      },
+      [](py::tuple t) {
+        py::list members=t[1].cast<py::list>();
+        Ensemble<Seismogram> ens(restore_serialized_metadata_binary(t[0].cast<std::string>()),
+          members.size());
+        for(py::handle d : members)
+          ens.member.push_back(seismogram_from_pickle_state(d.cast<py::tuple>()));
+        return ens;
+      }
+    ))
   ;
 
   /* This following would be the normal way to expose this class to python, but it generates and
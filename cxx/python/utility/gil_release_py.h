@@ -0,0 +1,27 @@
+#ifndef _GIL_RELEASE_PY_H_
+#define _GIL_RELEASE_PY_H_
+#include <optional>
+#include <pybind11/pybind11.h>
+
+namespace mspass {
+namespace mspasspy {
+/* Releases the GIL for the lifetime of the object unless hold is true.
+
+py::call_guard<py::gil_scoped_release> is used for functions that only
+touch sample data.   Functions that copy Metadata cannot release the GIL
+if the Metadata holds python objects because copying them changes their
+reference count.   Those are wrapped in a lambda that creates one of these
+with hold set by mspass::utility::has_python_objects.  */
+class OptionalGILRelease
+{
+public:
+  explicit OptionalGILRelease(const bool hold)
+  {
+    if(!hold) release.emplace();
+  };
+private:
+  std::optional<pybind11::gil_scoped_release> release;
+};
+} // namespace mspasspy
+} // namespace mspass
+#endif
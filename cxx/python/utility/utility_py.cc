@@ -13,6 +13,7 @@
 #include <mspass/utility/MetadataDefinitions.h>
 #include <mspass/utility/ProcessingHistory.h>
 #include <mspass/utility/SphericalCoordinate.h>
+#include <mspass/utility/ThreadPool.h>
 
 #include "python/utility/Publicdmatrix_py.h"
 #include "python/utility/boost_any_converter_py.h"
@@ -383,16 +384,18 @@ PYBIND11_MODULE(utility, m) {
     .def("change_key",&Metadata::change_key,"Change key to access an attribute")
     .def(py::self += py::self)
     .def(py::self + py::self)
-    /* these are need to allow the class to be pickled*/
+    /* these are need to allow the class to be pickled.  The state is the
+    binary serialization as bytes.  A str is the text serialization used by
+    pickles written by earlier versions.*/
     .def(py::pickle(
       [](const Metadata &self) {
-        string sbuf;
-        sbuf=serialize_metadata(self);
-        return py::make_tuple(sbuf);
+        return py::make_tuple(py::bytes(serialize_metadata_binary(self)));
       },
       [](py::tuple t) {
        string sbuf=t[0].cast<std::string>();
-       return Metadata(restore_serialized_metadata(sbuf));
+       if(py::isinstance<py::str>(t[0]))
+         return Metadata(restore_serialized_metadata(sbuf));
+       return restore_serialized_metadata_binary(sbuf);
      }
      ))
   ;
@@ -917,6 +920,16 @@ PYBIND11_MODULE(utility, m) {
     py::arg("algorithm"),
     py::arg("algid") )
   ;
+  /* Control of the thread pool used by ensemble algorithms.  Threads in
+  the pool never call python. */
+  m.def("set_thread_pool_size",&set_thread_pool_size,
+    "Set number of threads used by ccore ensemble algorithms (0 means one per cpu)",
+    py::call_guard<py::gil_scoped_release>(),
+    py::arg("nthreads") )
+  ;
+  m.def("thread_pool_size",&thread_pool_size,
+    "Return number of threads used by ccore ensemble algorithms")
+  ;
 }
 
 } // namespace mspasspy
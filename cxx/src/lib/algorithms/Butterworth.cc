@@ -3,17 +3,24 @@
 #include "misc/blas.h"
 #include "mspass/algorithms/Butterworth.h"
 #include "mspass/utility/MsPASSError.h"
+#include "mspass/utility/ThreadPool.h"
 #include "mspass/algorithms/deconvolution/FFTDeconOperator.h"
+#include "mspass/algorithms/deconvolution/FFTPlanCache.h"
 namespace mspass::algorithms
 {
 using mspass::algorithms::deconvolution::ComplexArray;
+using mspass::algorithms::deconvolution::get_complex_fft_plan;
 using mspass::algorithms::deconvolution::circular_shift;
 using mspass::seismic::CoreTimeSeries;
 using mspass::seismic::CoreSeismogram;
+using mspass::seismic::TimeSeries;
+using mspass::seismic::Seismogram;
+using mspass::seismic::Ensemble;
 using mspass::seismic::TimeReferenceType;
 using mspass::utility::Metadata;
 using mspass::utility::MsPASSError;
 using mspass::utility::ErrorSeverity;
+using mspass::utility::parallel_for;
 
 using namespace std;
 Butterworth::Butterworth()
@@ -281,35 +288,19 @@ void Butterworth::apply(mspass::seismic::TimeSeries& d)
 	double d_dt=d.dt();
 	if(this->dt != d_dt)
 	{
-		/* Here we throw an exception if a requested sample rate is
-		illegal */
-		double fhtest=d_dt/(this->dt);
-		if(use_hi && (fhtest>FHighFloor))
+		/* When the upper corner has to be disabled the data are filtered
+		with a copy of this operator so its state is left unchanged. */
+		bool hi_disabled;
+		Butterworth op=this->operator_for_dt(d_dt,hi_disabled);
+		if(hi_disabled)
 		{
-			/*In this case we temporarily disable the upper corner and
-			cache the old dt to restore it before returning. */
-			double olddt=this->dt;
-			double flow_old=this->f3db_lo;
-			use_hi=false;
-			this->apply(d.s);
-			use_hi=true;
-			this->dt=olddt;
-			this->f3db_lo=flow_old;
-			stringstream ss;
-			ss <<"Auto adjust for sample rate change error"<<endl
-			  << "Upper corner of filter="<<this->high_corner()
-			  << " is near or above Nyquist frequency for requested sample "
-				<< "interval="<<this->dt<<endl
-				<< "Disabling upper corner (lowpass) and applying filter anyway"
-				<<endl;
+			op.apply(d.s);
 			d.elog.log_error(string("Butterworth::apply"),
-			          ss.str(),ErrorSeverity::Complaint);
+			          this->hi_disabled_message(),ErrorSeverity::Complaint);
 			/* With this logic we have separate return here */
+			return;
 		}
-		else
-		{
-			this->change_dt(d_dt);
-		}
+		this->change_dt(d_dt);
 	}
 	this->apply(d.s);
 }
@@ -389,36 +380,22 @@ void Butterworth::apply(mspass::seismic::Seismogram& d)
 	double d_dt=d.dt();
 	if(this->dt != d_dt)
 	{
-		/* Here we throw an exception if a requested sample rate is
-		illegal */
-		double fhtest=d_dt/(this->dt);
-		if(use_hi && (fhtest>FHighFloor))
+		bool hi_disabled;
+		Butterworth op=this->operator_for_dt(d_dt,hi_disabled);
+		if(hi_disabled)
 		{
-			/*In this case we temporarily disable the upper corner and
-			cache the old dt to restore it before returning. */
-			double olddt=this->dt;
-			double flow_old=this->f3db_lo;
-			use_hi=false;
-			this->apply(d);
-			use_hi=true;
-			this->dt=olddt;
-			this->f3db_lo=flow_old;
-			stringstream ss;
-			ss <<"Auto adjust for sample rate change error"<<endl
-			  << "Upper corner of filter="<<this->high_corner()
-			  << " is near or above Nyquist frequency for requested sample "
-				<< "interval="<<this->dt<<endl
-				<< "Disabling upper corner (lowpass) and applying filter anyway"
-				<<endl;
+			op.apply_components(d);
 			d.elog.log_error(string("Butterworth::apply"),
-			   ss.str(),ErrorSeverity::Complaint);
+			   this->hi_disabled_message(),ErrorSeverity::Complaint);
 			/* With this logic we have separate return here */
+			return;
 		}
-		else
-		{
-			this->change_dt(d_dt);
-		}
+		this->change_dt(d_dt);
 	}
+	this->apply_components(d);
+}
+void Butterworth::apply_components(mspass::seismic::Seismogram& d)
+{
 	vector<double> comp;
 	int npts=d.npts();
 	comp.reserve(npts);
@@ -433,6 +410,88 @@ void Butterworth::apply(mspass::seismic::Seismogram& d)
 		dcopy(npts,&(comp[0]),1,d.u.get_address(k,0),3);
 	}
 }
+Butterworth Butterworth::operator_for_dt(const double d_dt, bool& hi_disabled) const
+{
+	Butterworth result(*this);
+	hi_disabled=false;
+	if(this->dt != d_dt)
+	{
+		double fhtest=d_dt/(this->dt);
+		if(use_hi && (fhtest>FHighFloor))
+		{
+			result.use_hi=false;
+			hi_disabled=true;
+		}
+		else
+		{
+			result.change_dt(d_dt);
+		}
+	}
+	return result;
+}
+string Butterworth::hi_disabled_message() const
+{
+	stringstream ss;
+	ss <<"Auto adjust for sample rate change error"<<endl
+	  << "Upper corner of filter="<<this->high_corner()
+	  << " is near or above Nyquist frequency for requested sample "
+		<< "interval="<<this->dt<<endl
+		<< "Disabling upper corner (lowpass) and applying filter anyway"
+		<<endl;
+	return ss.str();
+}
+template <typename Tdata> vector<Butterworth*> Butterworth::operators_for_members(
+	Ensemble<Tdata>& d, map<double,Butterworth>& cache) const
+{
+	/* This is done serially so the parallel loops only read the operators.
+	Pointers to map elements are not invalidated by later inserts. */
+	map<double,bool> disabled;
+	vector<Butterworth*> result(d.member.size(),NULL);
+	for(size_t i=0;i<d.member.size();++i)
+	{
+		if(d.member[i].dead()) continue;
+		double d_dt=d.member[i].dt();
+		auto op=cache.find(d_dt);
+		if(op==cache.end())
+		{
+			bool hi_disabled;
+			op=cache.insert(make_pair(d_dt,this->operator_for_dt(d_dt,hi_disabled))).first;
+			disabled[d_dt]=hi_disabled;
+		}
+		if(disabled[d_dt])
+			d.member[i].elog.log_error(string("Butterworth::apply"),
+			   this->hi_disabled_message(),ErrorSeverity::Complaint);
+		result[i]=&(op->second);
+	}
+	return result;
+}
+void Butterworth::apply(Ensemble<TimeSeries>& d)
+{
+	map<double,Butterworth> cache;
+	vector<Butterworth*> ops=this->operators_for_members(d,cache);
+	parallel_for(d.member.size(),[&](size_t i){
+		if(ops[i]==NULL || d.member[i].s.empty()) return;
+		ops[i]->apply(d.member[i].s);
+	});
+}
+void Butterworth::apply(Ensemble<Seismogram>& d)
+{
+	map<double,Butterworth> cache;
+	vector<Butterworth*> ops=this->operators_for_members(d,cache);
+	/* Each index of the loop is one component of one member.  Components
+	of the same member occupy disjoint elements of u so they can be filtered
+	at the same time. */
+	parallel_for(3*d.member.size(),[&](size_t j){
+		size_t i=j/3;
+		int k=j%3;
+		int npts=d.member[i].npts();
+		if(ops[i]==NULL || npts<=0) return;
+		vector<double> comp(npts);
+		dcopy(npts,d.member[i].u.get_address(k,0),3,&(comp[0]),1);
+		ops[i]->apply(comp);
+		dcopy(npts,&(comp[0]),1,d.member[i].u.get_address(k,0),3);
+	});
+}
 ComplexArray Butterworth::transfer_function(const int nfft)
 {
 	CoreTimeSeries imp=this->impulse_response(nfft);
@@ -442,11 +501,11 @@ ComplexArray Butterworth::transfer_function(const int nfft)
 	circular shift function */
 	int ishift=imp.sample_number(0.0);
 	imp.s=circular_shift(imp.s,ishift);
-	gsl_fft_complex_wavetable *wavetable = gsl_fft_complex_wavetable_alloc (nfft);
+	/* The wavetable comes from the shared fft plan cache */
+	auto plan=get_complex_fft_plan(nfft);
 	gsl_fft_complex_workspace *workspace = gsl_fft_complex_workspace_alloc (nfft);
 	ComplexArray work(nfft,imp.s);
-	gsl_fft_complex_forward(work.ptr(), 1, nfft, wavetable, workspace);
-	gsl_fft_complex_wavetable_free (wavetable);
+	gsl_fft_complex_forward(work.ptr(), 1, nfft, plan->wavetable(), workspace);
 	gsl_fft_complex_workspace_free (workspace);
 	return work;
 }
@@ -3,6 +3,7 @@
 #include <string>
 #include "mspass/seismic/Seismogram.h"
 #include "mspass/algorithms/algorithms.h"
+#include "mspass/utility/ThreadPool.h"
 namespace mspass::algorithms
 {
 using namespace std;
@@ -161,4 +162,20 @@ TimeSeries agc(Seismogram& d, const double twin)
         return TimeSeries();
     }
 }
+Ensemble<TimeSeries> agc(Ensemble<Seismogram>& d, const double twin)
+{
+    Ensemble<TimeSeries> gains(dynamic_cast<Metadata&>(d),d.member.size());
+    gains.member.resize(d.member.size());
+    /* agc posts errors to each member's elog so it does not throw */
+    auto agc_member=[&](size_t i){
+        if(d.member[i].live()) gains.member[i]=agc(d.member[i],twin);
+    };
+    /* The gain functions are created with a copy of the member Metadata.
+    That is not thread safe if it holds python objects. */
+    if(has_python_objects(d))
+        for(size_t i=0;i<d.member.size();++i) agc_member(i);
+    else
+        parallel_for(d.member.size(),agc_member);
+    return gains;
+}
 }// End mspass namespace
@@ -712,13 +712,10 @@ void CNR3CDecon::compute_gwl_inverse()
       throw MsPASSError("CNR3CDecon::compute_gwl_inverse():  wavelet size and fft size t0 not match - this should not happen and indicates a bug that needs to be fixed",
          ErrorSeverity::Fatal);
     }
-    ComplexArray cwvec(this->wavelet.npts(),&(this->wavelet.s[0]));
-    gsl_fft_complex_forward(cwvec.ptr(),1,FFTDeconOperator::nfft,
-          wavetable,workspace);
+    ComplexArray cwvec(this->real_forward_fft(this->wavelet.s));
     /* This computes the (regularized) denominator for the decon operator*/
-    double df,fNy;
+    double df;
     df=1.0/(operator_dt*static_cast<double>(FFTDeconOperator::nfft));
-    fNy=df*static_cast<double>(FFTDeconOperator::nfft/2);
     /* We need largest noise amplitude to establish a relative noise floor.
     We use this std::algorithm to find it in the spectrum vector */
     vector<double>::iterator maxnoise;
@@ -727,7 +724,10 @@ void CNR3CDecon::compute_gwl_inverse()
     double scaled_noise_floor=noise_floor*sqrt(*maxnoise);
     wavelet_snr.clear();
     int nreg(0);
-    for(int j=0;j<FFTDeconOperator::nfft;++j)
+    /* cwvec has only the bins from 0 to Nyquist so no frequency folding
+    is needed.  nreg counts each bin for the frequencies it represents
+    in the full spectrum. */
+    for(int j=0;j<cwvec.size();++j)
     {
       double *z=cwvec.ptr(j);
       double re=(*z);
@@ -735,7 +735,6 @@ void CNR3CDecon::compute_gwl_inverse()
       double amp=sqrt( re*re +im*im);
       double f;
       f=df*static_cast<double>(j);
-      if(f>fNy) f=2.0*fNy-f;  // Fold frequency axis
       double namp=psnoise.amplitude(f);
       /* Avoid divide by zero that could randomly happen with simulation data*/
       double snr;
@@ -759,18 +758,14 @@ void CNR3CDecon::compute_gwl_inverse()
         im *= scale;
         *z = re;
         *(z+1) = im;
-        ++nreg;
+        nreg += this->bin_multiplicity(j);
       }
     }
     /* This is used in QCMetric */
     regularization_bandwidth_fraction=static_cast<double>(nreg)
                 / static_cast<double>(FFTDeconOperator::nfft);
-    double *d0=new double[FFTDeconOperator::nfft];
-    for(int k=0;k<FFTDeconOperator::nfft;++k) d0[k]=0.0;
-    d0[0]=1.0;
-    ComplexArray delta0(FFTDeconOperator::nfft,d0);
-    delete [] d0;
-    gsl_fft_complex_forward(delta0.ptr(),1,FFTDeconOperator::nfft,wavetable,workspace);
+    /* fft of a zero lag spike is exactly one at all frequencies */
+    ComplexArray delta0(this->number_bins(),1.0);
     winv=delta0/cwvec;
   }catch(...){throw;};
 }
@@ -780,17 +775,14 @@ void CNR3CDecon::compute_gdamp_inverse()
   try{
     if(taper_data) wavelet_taper->apply(this->wavelet);
     /* Assume if we got here wavelet.npts() == nfft*/
-    ComplexArray b_fft(this->wavelet.npts(),&(this->wavelet.s[0]));
-    gsl_fft_complex_forward(b_fft.ptr(),1,FFTDeconOperator::nfft,
-          wavetable,workspace);
+    ComplexArray b_fft(this->real_forward_fft(this->wavelet.s));
     ComplexArray conj_b_fft(b_fft);
     conj_b_fft.conj();
     ComplexArray denom(conj_b_fft*b_fft);
     /* Compute scaling constants for noise based on noise_floor and the
     noise spectrum */
-    double df,fNy;
+    double df;
     df=1.0/(operator_dt*static_cast<double>(FFTDeconOperator::nfft));
-    fNy=df*static_cast<double>(FFTDeconOperator::nfft/2);
     /* We need largest noise amplitude to establish a relative noise floor.
     We use this std::algorithm to find it in the spectrum vector */
     vector<double>::iterator maxnoise;
@@ -800,14 +792,13 @@ void CNR3CDecon::compute_gdamp_inverse()
     //debug
     //cout << "Damping values used with f"<<endl;
 
-    for(int k=0;k<nfft;++k)
+    for(int k=0;k<denom.size();++k)
     {
       double *ptr;
       ptr=denom.ptr(k);
       double f;
 
       f=df*static_cast<double>(k);
-      if(f>fNy) f=2.0*fNy-f;  // Fold frequency axis
       double namp=psnoise.amplitude(f);
       double theta;
       if(namp>scaled_noise_floor)
@@ -960,12 +951,10 @@ Seismogram CNR3CDecon::process()
       for(j=ntocopy;j<FFTDeconOperator::nfft;++j)
                    wvec.push_back(0.0);
 
-      ComplexArray numerator(FFTDeconOperator::nfft,&(wvec[0]));
       //Debug
       //cout << "numerator data after taper for component="<<k<<endl;
-      //for(j=0;j<FFTDeconOperator::nfft;++j)cout<<real(numerator[j])<<endl;
-      gsl_fft_complex_forward(numerator.ptr(),1,FFTDeconOperator::nfft,
-            wavetable,workspace);
+      //for(j=0;j<FFTDeconOperator::nfft;++j)cout<<wvec[j]<<endl;
+      ComplexArray numerator(this->real_forward_fft(wvec));
       /* This loop computes QCMetrics of bandwidth fraction that
       is above a defined snr floor - not necessarily the same as the
       regularization floor used in computing the inverse */
@@ -991,15 +980,12 @@ Seismogram CNR3CDecon::process()
       signal_bandwidth_fraction[k]=static_cast<double>(nhighsnr)
                   / static_cast<double>(FFTDeconOperator::nfft/2);
       peak_snr[k]=snrmax;
-      ComplexArray rftmp=numerator*winv;
-      rftmp=(*shapingwavelet.wavelet())*rftmp;
-      gsl_fft_complex_inverse(rftmp.ptr(), 1, FFTDeconOperator::nfft,
-          wavetable, workspace);
-      wvec.clear();
-      for(j=0;j<FFTDeconOperator::nfft;++j) wvec.push_back(rftmp[j].real());
+      numerator*=winv;
+      numerator*=(*shapingwavelet.wavelet_bins());
+      wvec=this->real_inverse_fft(numerator);
       //debug
-      //cout << "Raw deconvolved data before time shift (re,im)"<<endl;
-      //for(j=0;j<FFTDeconOperator::nfft;++j) cout << wvec[j]<<" "<<rftmp[j].imag()<<endl;
+      //cout << "Raw deconvolved data before time shift"<<endl;
+      //for(j=0;j<FFTDeconOperator::nfft;++j) cout << wvec[j]<<endl;
       //cout << "Function output uses time shift="<<t0_shift<<endl;
       /* Note we used a time domain shift instead of using a linear phase
       shift in the frequency domain because time domain operator has a lower
@@ -1023,17 +1009,12 @@ TimeSeries CNR3CDecon::ideal_output()
 TimeSeries CNR3CDecon::actual_output()
 {
   try {
-      ComplexArray W(FFTDeconOperator::nfft,&(wavelet.s[0]));
-      gsl_fft_complex_forward(W.ptr(),1,FFTDeconOperator::nfft,wavetable,workspace);
-      ComplexArray ao_fft;
-      ao_fft=winv*W;
+      ComplexArray ao_fft(this->real_forward_fft(wavelet.s));
+      ao_fft*=winv;
       /* We always apply the shaping wavelet - this perhaps should be optional
       but probably better done with a none option for the shaping wavelet */
-      ao_fft=(*shapingwavelet.wavelet())*ao_fft;
-      gsl_fft_complex_inverse(ao_fft.ptr(),1,FFTDeconOperator::nfft,wavetable,workspace);
-      vector<double> ao;
-      ao.reserve(FFTDeconOperator::nfft);
-      for(int k=0; k<ao_fft.size(); ++k) ao.push_back(ao_fft[k].real());
+      ao_fft*=(*shapingwavelet.wavelet_bins());
+      vector<double> ao(this->real_inverse_fft(ao_fft));
       /* We always shift this wavelet to the center of the data vector.
       We handle the time through the CoreTimeSeries object. */
       int i0=FFTDeconOperator::nfft/2;
@@ -1069,7 +1050,7 @@ TimeSeries CNR3CDecon::inverse_wavelet(double tshift0)
     //Debug
     //cout << "inverse_wavelet - applying time shift="<<timeshift<<endl;
     CoreTimeSeries invcore(this->FFTDeconOperator::FourierInverse(this->winv,
-        *shapingwavelet.wavelet(),operator_dt,timeshift));
+        *shapingwavelet.wavelet_bins(),operator_dt,timeshift));
     TimeSeries result(invcore,"Invalid");
     /* Copy the error log from wavelet and post some information parameters
     to metadata */
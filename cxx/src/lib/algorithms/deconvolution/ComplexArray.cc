@@ -135,6 +135,10 @@ double *ComplexArray::ptr()
 {
     return reinterpret_cast<double*>(&data[0].real);
 }
+const double *ComplexArray::ptr() const
+{
+    return reinterpret_cast<const double*>(&data[0].real);
+}
 double *ComplexArray::ptr(int sample)
 {
     return reinterpret_cast<double*>(&data[sample].real);
@@ -0,0 +1,171 @@
+#include <sstream>
+#include "mspass/utility/MsPASSError.h"
+#include "mspass/algorithms/deconvolution/EnsembleDecon.h"
+namespace mspass::algorithms::deconvolution
+{
+using namespace std;
+using namespace mspass::seismic;
+using namespace mspass::utility;
+
+namespace
+{
+const string algname("decon_ensemble");
+/* Runs op on d with the currently loaded wavelet and returns a result with
+exactly npts samples.   A short result is zero padded and logged as a
+complaint in elog as done by the python RFdecon function. */
+vector<double> run_scalar(ScalarDecon& op, const vector<double>& d,
+  const size_t npts, ErrorLogger& elog)
+{
+  op.loaddata(d);
+  op.process();
+  vector<double> x(op.getresult());
+  if(x.size()<npts)
+  {
+    stringstream ss;
+    ss << "Windowing size mismatch."<<endl
+       << "Data window length = "<<x.size()
+       << " which is less than operator length= "<<npts;
+    elog.log_error(algname,ss.str(),ErrorSeverity::Complaint);
+  }
+  x.resize(npts,0.0);
+  return x;
+}
+TimeSeries decon_member(ScalarDecon& op, const TimeSeries& d)
+{
+  TimeSeries result(d);
+  if(d.dead()) return result;
+  try{
+    result.s=run_scalar(op,d.s,d.npts(),result.elog);
+  }catch(MsPASSError& err)
+  {
+    result.elog.log_error(algname,err.what(),err.severity());
+    result.kill();
+  }catch(std::exception& err)
+  {
+    result.elog.log_error(algname,err.what(),ErrorSeverity::Invalid);
+    result.kill();
+  }
+  return result;
+}
+Seismogram decon_member(ScalarDecon& op, const Seismogram& d)
+{
+  Seismogram result(d);
+  if(d.dead()) return result;
+  try{
+    vector<double> work(d.npts());
+    for(int k=0;k<3;++k)
+    {
+      for(size_t i=0;i<d.npts();++i) work[i]=d.u(k,i);
+      vector<double> x(run_scalar(op,work,d.npts(),result.elog));
+      for(size_t i=0;i<d.npts();++i) result.u(k,i)=x[i];
+    }
+  }catch(MsPASSError& err)
+  {
+    result.elog.log_error(algname,err.what(),err.severity());
+    result.kill();
+  }catch(std::exception& err)
+  {
+    result.elog.log_error(algname,err.what(),ErrorSeverity::Invalid);
+    result.kill();
+  }
+  return result;
+}
+/* Shared code for the versions with one wavelet per member. */
+template <typename Tdata> Ensemble<Tdata> decon_with_member_wavelets(ScalarDecon& op,
+  const Ensemble<Tdata>& d, const Ensemble<TimeSeries>& wavelets)
+{
+  if(d.member.size()!=wavelets.member.size())
+  {
+    stringstream ss;
+    ss << "decon_ensemble:  size mismatch of data and wavelet ensembles"<<endl
+       << "Data ensemble has "<<d.member.size()<<" members but wavelet ensemble has "
+       << wavelets.member.size()<<endl;
+    throw MsPASSError(ss.str(),ErrorSeverity::Invalid);
+  }
+  Ensemble<Tdata> result(d);
+  for(size_t i=0;i<d.member.size();++i)
+  {
+    if(d.member[i].dead()) continue;
+    if(wavelets.member[i].dead())
+    {
+      result.member[i].elog.log_error(algname,
+        "Wavelet for this member is marked dead",ErrorSeverity::Invalid);
+      result.member[i].kill();
+      continue;
+    }
+    try{
+      op.loadwavelet(wavelets.member[i].s);
+    }catch(MsPASSError& err)
+    {
+      result.member[i].elog.log_error(algname,err.what(),err.severity());
+      result.member[i].kill();
+      continue;
+    }catch(std::exception& err)
+    {
+      result.member[i].elog.log_error(algname,err.what(),ErrorSeverity::Invalid);
+      result.member[i].kill();
+      continue;
+    }
+    result.member[i]=decon_member(op,d.member[i]);
+  }
+  return result;
+}
+}
+
+Ensemble<TimeSeries> decon_ensemble(ScalarDecon& op,
+  const Ensemble<TimeSeries>& d, const vector<double>& wavelet)
+{
+  op.loadwavelet(wavelet);
+  Ensemble<TimeSeries> result(d);
+  for(size_t i=0;i<d.member.size();++i)
+    result.member[i]=decon_member(op,d.member[i]);
+  return result;
+}
+Ensemble<TimeSeries> decon_ensemble(ScalarDecon& op,
+  const Ensemble<TimeSeries>& d, const Ensemble<TimeSeries>& wavelets)
+{
+  return decon_with_member_wavelets(op,d,wavelets);
+}
+Ensemble<Seismogram> decon_ensemble(ScalarDecon& op,
+  const Ensemble<Seismogram>& d, const vector<double>& wavelet)
+{
+  op.loadwavelet(wavelet);
+  Ensemble<Seismogram> result(d);
+  for(size_t i=0;i<d.member.size();++i)
+    result.member[i]=decon_member(op,d.member[i]);
+  return result;
+}
+Ensemble<Seismogram> decon_ensemble(ScalarDecon& op,
+  const Ensemble<Seismogram>& d, const Ensemble<TimeSeries>& wavelets)
+{
+  return decon_with_member_wavelets(op,d,wavelets);
+}
+Ensemble<Seismogram> decon_ensemble(CNR3CDecon& op,
+  const Ensemble<Seismogram>& d, const TimeSeries& wavelet, const bool loadnoise)
+{
+  /* This computes the inverse used for all members */
+  op.loadwavelet(wavelet);
+  Ensemble<Seismogram> result(d);
+  for(size_t i=0;i<d.member.size();++i)
+  {
+    if(d.member[i].dead()) continue;
+    /* loaddata requires a non const reference as it can post to elog */
+    Seismogram work(d.member[i]);
+    try{
+      op.loaddata(work,loadnoise);
+      result.member[i]=op.process();
+    }catch(MsPASSError& err)
+    {
+      work.elog.log_error(algname,err.what(),err.severity());
+      work.kill();
+      result.member[i]=work;
+    }catch(std::exception& err)
+    {
+      work.elog.log_error(algname,err.what(),ErrorSeverity::Invalid);
+      work.kill();
+      result.member[i]=work;
+    }
+  }
+  return result;
+}
+}  //End namespace
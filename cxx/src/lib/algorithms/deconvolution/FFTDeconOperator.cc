@@ -14,6 +14,7 @@ FFTDeconOperator::FFTDeconOperator()
     sample_shift=0;
     wavetable=NULL;
     workspace=NULL;
+    real_workspace=NULL;
 }
 FFTDeconOperator::FFTDeconOperator(const Metadata& md)
 {
@@ -40,24 +41,27 @@ FFTDeconOperator::FFTDeconOperator(const Metadata& md)
 	    	+ "Computed shift parameter exceeds length of fft\n"
 		    + "Deconvolution data window parameters are probably nonsense",
          ErrorSeverity::Invalid);
-    wavetable = gsl_fft_complex_wavetable_alloc (nfft);
-    workspace = gsl_fft_complex_workspace_alloc (nfft);
+    workspace=NULL;
+    real_workspace=NULL;
+    this->load_plan();
   } catch(...) {
         throw;
     };
 }
 FFTDeconOperator::FFTDeconOperator(const FFTDeconOperator& parent)
+    : plan(parent.plan), real_plan(parent.real_plan)
 {
     nfft=parent.nfft;
     sample_shift=parent.sample_shift;
-    /* copies need their own work space */
-    wavetable = gsl_fft_complex_wavetable_alloc (nfft);
-    workspace = gsl_fft_complex_workspace_alloc (nfft);
+    /* the wavetables are shared but copies need their own work space */
+    wavetable = (plan ? plan->wavetable() : NULL);
+    workspace = (nfft>0 ? gsl_fft_complex_workspace_alloc (nfft) : NULL);
+    real_workspace = (nfft>0 ? gsl_fft_real_workspace_alloc (nfft) : NULL);
 }
 FFTDeconOperator::~FFTDeconOperator()
 {
-    if(wavetable!=NULL) gsl_fft_complex_wavetable_free (wavetable);
     if(workspace!=NULL) gsl_fft_complex_workspace_free (workspace);
+    if(real_workspace!=NULL) gsl_fft_real_workspace_free (real_workspace);
 }
 FFTDeconOperator& FFTDeconOperator::operator=(const FFTDeconOperator& parent)
 {
@@ -65,12 +69,77 @@ FFTDeconOperator& FFTDeconOperator::operator=(const FFTDeconOperator& parent)
     {
         nfft=parent.nfft;
         sample_shift=parent.sample_shift;
-        /* copies need their own work space */
-        wavetable = gsl_fft_complex_wavetable_alloc (nfft);
-        workspace = gsl_fft_complex_workspace_alloc (nfft);
+        this->load_plan();
     }
     return *this;
 }
+void FFTDeconOperator::load_plan()
+{
+    plan=get_complex_fft_plan(nfft);
+    wavetable = (plan ? plan->wavetable() : NULL);
+    real_plan=get_real_fft_plan(nfft);
+    /* The workspaces only depend on the size so keep them if they match */
+    if(workspace!=NULL && workspace->n==static_cast<size_t>(nfft)) return;
+    if(workspace!=NULL) gsl_fft_complex_workspace_free (workspace);
+    if(real_workspace!=NULL) gsl_fft_real_workspace_free (real_workspace);
+    workspace = (nfft>0 ? gsl_fft_complex_workspace_alloc (nfft) : NULL);
+    real_workspace = (nfft>0 ? gsl_fft_real_workspace_alloc (nfft) : NULL);
+}
+ComplexArray FFTDeconOperator::real_forward_fft(const vector<double>& x)
+{
+    /* The nfft/2+1 complex bins hold at least nfft+1 doubles so the
+    transform is done in place in the result's buffer. */
+    ComplexArray result(this->number_bins());
+    double *z=result.ptr();
+    int n=(static_cast<int>(x.size())<nfft ? x.size() : nfft);
+    for(int k=0;k<n;++k) z[k]=x[k];
+    gsl_fft_real_transform(z,1,nfft,real_plan->real_wavetable(),real_workspace);
+    /* Unpack the halfcomplex order real(h0), real(h1), imag(h1), ... and for
+    even nfft real(h[nfft/2]) last.  Each value moves up one slot so this
+    runs from the top down. */
+    if(nfft%2==0)
+    {
+        z[nfft]=z[nfft-1];
+        z[nfft+1]=0.0;
+    }
+    for(int k=(nfft-1)/2;k>0;--k)
+    {
+        double im=z[2*k];
+        z[2*k]=z[2*k-1];
+        z[2*k+1]=im;
+    }
+    z[1]=0.0;
+    return result;
+}
+vector<double> FFTDeconOperator::real_inverse_fft(const ComplexArray& z)
+{
+    if(z.size()!=this->number_bins())
+        throw MsPASSError(string("FFTDeconOperator::real_inverse_fft:  ")
+            + "spectrum size mismatch with operator fft length",
+            ErrorSeverity::Invalid);
+    /* Pack z in the GSL halfcomplex order.  zp has the real and imaginary
+    parts of z interleaved. */
+    const double *zp=z.ptr();
+    vector<double> result(nfft);
+    result[0]=zp[0];
+    for(int k=1;k<(nfft+1)/2;++k)
+    {
+        result[2*k-1]=zp[2*k];
+        result[2*k]=zp[2*k+1];
+    }
+    if(nfft%2==0) result[nfft-1]=zp[nfft];
+    gsl_fft_halfcomplex_inverse(&(result[0]),1,nfft,real_plan->halfcomplex_wavetable(),real_workspace);
+    return result;
+}
+double FFTDeconOperator::spectrum_rms(const ComplexArray& z) const
+{
+    const double *zp=z.ptr();
+    double sumsq(0.0);
+    for(int k=0;k<z.size();++k)
+        sumsq += static_cast<double>(this->bin_multiplicity(k))
+                 *(zp[2*k]*zp[2*k]+zp[2*k+1]*zp[2*k+1]);
+    return sqrt(sumsq)/static_cast<double>(nfft);
+}
 void FFTDeconOperator::changeparameter(const Metadata& md)
 {
     try {
@@ -78,10 +147,7 @@ void FFTDeconOperator::changeparameter(const Metadata& md)
         if(nfft_test != nfft)
         {
             nfft=nfft_test;
-            if(wavetable!=NULL) gsl_fft_complex_wavetable_free (wavetable);
-            if(workspace!=NULL) gsl_fft_complex_workspace_free (workspace);
-            wavetable = gsl_fft_complex_wavetable_alloc (nfft);
-            workspace = gsl_fft_complex_workspace_alloc (nfft);
+            this->load_plan();
         }
         sample_shift=md.get_int("sample_shift");
         if(sample_shift<0)
@@ -95,14 +161,8 @@ void FFTDeconOperator::changeparameter(const Metadata& md)
 void FFTDeconOperator::change_size(const int n)
 {
     try {
-        if(nfft!=0)
-        {
-            if(wavetable!=NULL) gsl_fft_complex_wavetable_free (wavetable);
-            if(workspace!=NULL) gsl_fft_complex_workspace_free (workspace);
-        }
         nfft=n;
-        wavetable = gsl_fft_complex_wavetable_alloc (nfft);
-        workspace = gsl_fft_complex_workspace_alloc (nfft);
+        this->load_plan();
     } catch(...) {
         throw;
     };
@@ -129,16 +189,16 @@ CoreTimeSeries FFTDeconOperator::FourierInverse(const ComplexArray& winv, const
      * circular shift of nfft/2.   This sets that as a requirement here. */
     int ntest;
     ntest=winv.size();
-    if(ntest != nfft) throw MsPASSError(base_error
+    if(ntest != this->number_bins()) throw MsPASSError(base_error
       + "wavelet inverse fourier array size mismatch with operator",
       ErrorSeverity::Invalid);
-    if(sw.size() != nfft) throw MsPASSError(base_error
+    if(sw.size() != this->number_bins()) throw MsPASSError(base_error
       + "shaping wavelet fourier array size mismatch with operator",
        ErrorSeverity::Invalid);
     ComplexArray winv_work(winv);
     /* This applies the shaping wavelet*/
     winv_work *= sw;
-    gsl_fft_complex_inverse(winv_work.ptr(),1,nfft,wavetable,workspace);
+    vector<double> winv_t(this->real_inverse_fft(winv_work));
     CoreTimeSeries result;
     result.set_t0(t0parent);
     result.set_dt(dt);
@@ -147,7 +207,7 @@ CoreTimeSeries FFTDeconOperator::FourierInverse(const ComplexArray& winv, const
     the values not use push back below */
     result.set_npts(nfft);
     result.set_tref(TimeReferenceType::Relative);
-    for(int k=0; k<winv_work.size(); ++k) result.s[k]=winv_work[k].real();
+    for(int k=0; k<nfft; ++k) result.s[k]=winv_t[k];
     return result;
   }catch(...){throw;};
 }
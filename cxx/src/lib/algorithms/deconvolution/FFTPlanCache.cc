@@ -0,0 +1,145 @@
+#include <list>
+#include <mutex>
+#include <string>
+#include <unordered_map>
+#include <utility>
+#include "mspass/algorithms/deconvolution/FFTPlanCache.h"
+#include "mspass/utility/MsPASSError.h"
+namespace mspass::algorithms::deconvolution
+{
+using namespace std;
+using namespace mspass::utility;
+
+ComplexFFTPlan::ComplexFFTPlan(const size_t n)
+{
+    nfft=n;
+    wt=gsl_fft_complex_wavetable_alloc(nfft);
+    if(wt==NULL)
+        throw MsPASSError(string("ComplexFFTPlan constructor:  ")
+            + "gsl_fft_complex_wavetable_alloc failed for nfft="
+            + to_string(nfft),ErrorSeverity::Fatal);
+}
+ComplexFFTPlan::~ComplexFFTPlan()
+{
+    if(wt!=NULL) gsl_fft_complex_wavetable_free(wt);
+}
+RealFFTPlan::RealFFTPlan(const size_t n)
+{
+    nfft=n;
+    rwt=gsl_fft_real_wavetable_alloc(nfft);
+    hcwt=gsl_fft_halfcomplex_wavetable_alloc(nfft);
+    if(rwt==NULL || hcwt==NULL)
+    {
+        if(rwt!=NULL) gsl_fft_real_wavetable_free(rwt);
+        if(hcwt!=NULL) gsl_fft_halfcomplex_wavetable_free(hcwt);
+        throw MsPASSError(string("RealFFTPlan constructor:  ")
+            + "gsl real or halfcomplex wavetable allocation failed for nfft="
+            + to_string(nfft),ErrorSeverity::Fatal);
+    }
+}
+RealFFTPlan::~RealFFTPlan()
+{
+    gsl_fft_real_wavetable_free(rwt);
+    gsl_fft_halfcomplex_wavetable_free(hcwt);
+}
+/* The cache is a map from the plan type and nfft to the plan and the
+position of the key in a list ordered from most to least recently used.
+All state is file scope and guarded by one mutex. */
+namespace
+{
+enum class PlanType {Complex,Real};
+typedef pair<PlanType,size_t> PlanKey;
+struct PlanKeyHash
+{
+    size_t operator()(const PlanKey& k) const
+    {
+        return hash<size_t>()(2*k.second+(k.first==PlanType::Real ? 1 : 0));
+    }
+};
+typedef list<PlanKey> LRUList;
+struct CacheEntry
+{
+    /* type of the plan is defined by the key */
+    shared_ptr<const void> plan;
+    LRUList::iterator position;
+};
+mutex cache_lock;
+size_t cache_capacity(64);
+LRUList lru;
+unordered_map<PlanKey,CacheEntry,PlanKeyHash> plans;
+
+/* Drops least recently used plans until the cache size is at most n.
+Caller must hold cache_lock. */
+void trim_cache(const size_t n)
+{
+    while(plans.size()>n)
+    {
+        plans.erase(lru.back());
+        lru.pop_back();
+    }
+}
+/* Returns the cached plan with key k or an empty pointer.  Caller must
+hold cache_lock. */
+shared_ptr<const void> find_plan(const PlanKey& k)
+{
+    auto hit=plans.find(k);
+    if(hit==plans.end()) return shared_ptr<const void>();
+    lru.splice(lru.begin(),lru,hit->second.position);
+    return hit->second.plan;
+}
+template <class Plan> shared_ptr<const Plan> get_plan(const PlanType type, const size_t n)
+{
+    if(n==0) return shared_ptr<const Plan>();
+    const PlanKey key(type,n);
+    {
+        lock_guard<mutex> guard(cache_lock);
+        shared_ptr<const void> plan=find_plan(key);
+        if(plan) return static_pointer_cast<const Plan>(plan);
+    }
+    /* Compute the wavetable without holding the lock so other threads
+    are not blocked.  If two threads race to build the same plan the
+    first one inserted wins and the other copy is discarded. */
+    shared_ptr<const Plan> newplan=make_shared<const Plan>(n);
+    lock_guard<mutex> guard(cache_lock);
+    shared_ptr<const void> plan=find_plan(key);
+    if(plan) return static_pointer_cast<const Plan>(plan);
+    if(cache_capacity>0)
+    {
+        lru.push_front(key);
+        plans[key]=CacheEntry{newplan,lru.begin()};
+        trim_cache(cache_capacity);
+    }
+    return newplan;
+}
+}
+
+shared_ptr<const ComplexFFTPlan> get_complex_fft_plan(const size_t n)
+{
+    return get_plan<ComplexFFTPlan>(PlanType::Complex,n);
+}
+shared_ptr<const RealFFTPlan> get_real_fft_plan(const size_t n)
+{
+    return get_plan<RealFFTPlan>(PlanType::Real,n);
+}
+void set_fft_plan_cache_capacity(const size_t maxplans)
+{
+    lock_guard<mutex> guard(cache_lock);
+    cache_capacity=maxplans;
+    trim_cache(cache_capacity);
+}
+size_t fft_plan_cache_capacity()
+{
+    lock_guard<mutex> guard(cache_lock);
+    return cache_capacity;
+}
+size_t fft_plan_cache_size()
+{
+    lock_guard<mutex> guard(cache_lock);
+    return plans.size();
+}
+void clear_fft_plan_cache()
+{
+    lock_guard<mutex> guard(cache_lock);
+    trim_cache(0);
+}
+}  //End namespace
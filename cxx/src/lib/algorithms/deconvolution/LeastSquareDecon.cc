@@ -26,6 +26,8 @@ int LeastSquareDecon::read_metadata(const Metadata &md)
         /* Note this depends on nfft inheritance from FFTDeconOperator.
         * That is a bit error prone with changes*/
         shapingwavelet=ShapingWavelet(md,nfft);
+        /* the inverse depends on nfft and damp */
+        wavelet_changed=true;
         return 0;
     } catch(...) {
         throw;
@@ -62,62 +64,67 @@ LeastSquareDecon::LeastSquareDecon(const Metadata &md,
     wavelet=w;
     data=d;
 }
-void LeastSquareDecon::process()
+/* The inverse depends only on the wavelet so it is computed only when
+the wavelet or operator parameters change. */
+void LeastSquareDecon::compute_winv()
 {
-
-    const string base_error("LeastSquareDecon::process:  ");
-    //apply fft to the input trace data
-    if(data.size()<nfft) for(int i=data.size();i<nfft;++i) data.push_back(0.0);
-    ComplexArray d_fft(nfft,&(data[0]));
-    gsl_fft_complex_forward(d_fft.ptr(), 1, nfft, wavetable, workspace);
-
     //apply fft to wavelet
     if(wavelet.size()<nfft) for(int i=wavelet.size();i<nfft;++i) wavelet.push_back(0.0);
-    ComplexArray b_fft(nfft,&(wavelet[0]));
-    gsl_fft_complex_forward(b_fft.ptr(), 1, nfft, wavetable, workspace);
+    ComplexArray b_fft(this->real_forward_fft(wavelet));
 
     //deconvolution: RF=conj(B).*D./(conj(B).*B+damp)
     b_fft.conj();
-    ComplexArray rf_fft,conj_b_fft(b_fft);
+    ComplexArray conj_b_fft(b_fft);
     b_fft.conj();
 
-    double b_rms=b_fft.rms();
+    double b_rms=this->spectrum_rms(b_fft);
     ComplexArray denom(conj_b_fft*b_fft);
     double theta(b_rms*damp);
     /* This is like normal equation form for damped inverse so theta as computed
     needs to be squared */
     theta=theta*theta;
-    for(int k=0;k<nfft;++k)
+    for(int k=0;k<denom.size();++k)
     {
       double *ptr;
       ptr=denom.ptr(k);
       /* ptr points to the real part - an oddity of this interface */
       *ptr += theta;
     }
-    rf_fft=(conj_b_fft*d_fft)/denom;
     //rf_fft=(conj_b_fft*d_fft)/(conj_b_fft*b_fft+b_rms*damp);
-    /* Compute the frequency domain version of the inverse wavelet now
-    and save it the object for efficiency. */
+    /* Compute the frequency domain version of the inverse wavelet and
+    save it in the object.   process applies it to the data. */
     //winv=conj_b_fft/(conj_b_fft*b_fft+b_rms*damp);
     winv=conj_b_fft/denom;
+    wavelet_changed=false;
+}
+void LeastSquareDecon::process()
+{
+
+    const string base_error("LeastSquareDecon::process:  ");
+    if(wavelet_changed || (winv.size()!=this->number_bins())) this->compute_winv();
+    //apply fft to the input trace data
+    if(data.size()<nfft) for(int i=data.size();i<nfft;++i) data.push_back(0.0);
+    ComplexArray rf_fft(this->real_forward_fft(data));
+    //deconvolution: RF=conj(B).*D./(conj(B).*B+damp)
+    rf_fft*=winv;
 
     //apply shaping wavelet but only to rf estimate - actual output and
     //inverse_wavelet methods apply it to when needed there for efficiency
-    rf_fft=(*shapingwavelet.wavelet())*rf_fft;
+    rf_fft*=(*shapingwavelet.wavelet_bins());
 
     //ifft gets result
-    gsl_fft_complex_inverse(rf_fft.ptr(), 1, nfft, wavetable, workspace);
+    vector<double> rf(this->real_inverse_fft(rf_fft));
     if(sample_shift>0)
     {
         for(int k=sample_shift; k>0; k--)
-            result.push_back(rf_fft[nfft-k].real());
+            result.push_back(rf[nfft-k]);
         for(int k=0; k<data.size()-sample_shift; k++)
-            result.push_back(rf_fft[k].real());
+            result.push_back(rf[k]);
     }
     else if(sample_shift==0)
     {
         for(int k=0; k<data.size(); k++)
-            result.push_back(rf_fft[k].real());
+            result.push_back(rf[k]);
     }
     else
     {
@@ -129,17 +136,12 @@ void LeastSquareDecon::process()
 CoreTimeSeries LeastSquareDecon::actual_output()
 {
     try {
-        ComplexArray W(nfft,&(wavelet[0]));
-        gsl_fft_complex_forward(W.ptr(),1,nfft,wavetable,workspace);
-        ComplexArray ao_fft;
-        ao_fft=winv*W;
+        ComplexArray ao_fft(this->real_forward_fft(wavelet));
+        ao_fft*=winv;
         /* We always apply the shaping wavelet - this perhaps should be optional
         but probably better done with a none option for the shaping wavelet */
-        ao_fft=(*shapingwavelet.wavelet())*ao_fft;
-        gsl_fft_complex_inverse(ao_fft.ptr(),1,nfft,wavetable,workspace);
-        vector<double> ao;
-        ao.reserve(nfft);
-        for(int k=0; k<ao_fft.size(); ++k) ao.push_back(ao_fft[k].real());
+        ao_fft*=(*shapingwavelet.wavelet_bins());
+        vector<double> ao(this->real_inverse_fft(ao_fft));
         /* We always shift this wavelet to the center of the data vector.
         We handle the time through the CoreTimeSeries object. */
         int i0=nfft/2;
@@ -176,7 +178,7 @@ CoreTimeSeries LeastSquareDecon::inverse_wavelet(const double t0parent)
  *         retain for now.   Perhaps should a copy of dt in the ScalarDecon object. */
       double dt=this->shapingwavelet.sample_interval();
       return (this->FourierInverse(this->winv,
-                *shapingwavelet.wavelet(),dt,t0parent));
+                *shapingwavelet.wavelet_bins(),dt,t0parent));
     } catch(...) {
         throw;
     };
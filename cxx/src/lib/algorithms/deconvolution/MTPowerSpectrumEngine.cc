@@ -49,22 +49,23 @@ MTPowerSpectrumEngine::MTPowerSpectrumEngine(const int winsize, const double tbp
       }
   }
   delete [] work;
-  wavetable=gsl_fft_complex_wavetable_alloc (taperlen);
+  plan=get_complex_fft_plan(taperlen);
+  wavetable=(plan ? plan->wavetable() : NULL);
   workspace=gsl_fft_complex_workspace_alloc (taperlen);
 }
-MTPowerSpectrumEngine::MTPowerSpectrumEngine(const MTPowerSpectrumEngine& parent) : tapers(parent.tapers)
+MTPowerSpectrumEngine::MTPowerSpectrumEngine(const MTPowerSpectrumEngine& parent)
+  : tapers(parent.tapers), plan(parent.plan)
 {
   taperlen=parent.taperlen;
   ntapers=parent.ntapers;
   tbp=parent.tbp;
   deltaf=parent.deltaf;
-  wavetable=gsl_fft_complex_wavetable_alloc (taperlen);
-  workspace=gsl_fft_complex_workspace_alloc (taperlen);
+  wavetable=(plan ? plan->wavetable() : NULL);
+  workspace=(taperlen>0 ? gsl_fft_complex_workspace_alloc (taperlen) : NULL);
 }
 
 MTPowerSpectrumEngine::~MTPowerSpectrumEngine()
 {
-    if(wavetable!=NULL) gsl_fft_complex_wavetable_free (wavetable);
     if(workspace!=NULL) gsl_fft_complex_workspace_free (workspace);
 }
 MTPowerSpectrumEngine& MTPowerSpectrumEngine::operator=(const MTPowerSpectrumEngine& parent)
@@ -76,8 +77,10 @@ MTPowerSpectrumEngine& MTPowerSpectrumEngine::operator=(const MTPowerSpectrumEng
     tbp=parent.tbp;
     deltaf=parent.deltaf;
     tapers=parent.tapers;
-    wavetable = gsl_fft_complex_wavetable_alloc (taperlen);
-    workspace = gsl_fft_complex_workspace_alloc (taperlen);
+    plan=parent.plan;
+    wavetable=(plan ? plan->wavetable() : NULL);
+    if(workspace!=NULL) gsl_fft_complex_workspace_free (workspace);
+    workspace=(taperlen>0 ? gsl_fft_complex_workspace_alloc (taperlen) : NULL);
   }
   return *this;
 }
@@ -234,9 +234,8 @@ vector<ComplexArray> MultiTaperSpecDivDecon::taper_data(const vector<double>& si
 	    cerr << "i,j="<<i<<","<<j<<" taper(i,j)="<<tapers(i ,j)<<" signal[j]="<<signal[j]<<" work[j]="<<work[j]<<endl;
 	    */
         }
-        /* Force zero pads always */
-        ComplexArray cwork(nfft,work);
-        tdata.push_back(cwork);
+        /* data are real so use the real fft */
+        tdata.push_back(this->real_forward_fft(work));
     }
     return tdata;
 }
@@ -262,12 +261,8 @@ void MultiTaperSpecDivDecon::process()
     /* The tapered data are stored in this vector of arrays */
     int i,j;
     vector<ComplexArray> tdata;
+    /* taper_data returns the fft of each tapered data vector */
     tdata=taper_data(data);
-    /* Apply fft to each tapered data vector */
-    for(i=0; i<nseq; ++i)
-    {
-        gsl_fft_complex_forward(tdata[i].ptr(),1,nfft,wavetable,workspace);
-    }
     //DEBUG
     /*
     double dtaper01(0.0);
@@ -285,17 +280,9 @@ void MultiTaperSpecDivDecon::process()
     /* Now we need to do the same for the wavelet data */
     vector<ComplexArray> wdata;
     wdata=taper_data(wavelet);
-    for(i=0; i<nseq; ++i)
-    {
-        gsl_fft_complex_forward(wdata[i].ptr(),1,nfft,wavetable,workspace);
-    }
     /* And the noise data - although with noise we quickly turn to power spectrum */
     vector<ComplexArray> ndata;
     ndata=taper_data(noise);
-    for(i=0; i<nseq; ++i)
-    {
-        gsl_fft_complex_forward(ndata[i].ptr(),1,nfft,wavetable,workspace);
-    }
     vector<double> noise_spectrum(ndata[0].abs());
     for(i=1; i<nseq; ++i)
     {
@@ -330,11 +317,12 @@ void MultiTaperSpecDivDecon::process()
       /* This is kind of messy as the noise_spectrum is a vector of real
       numbers while the wdata vector is a complex fft outputs in fortran
       style.  We use two different indices, but that is a tad dangerous
-      UNLESS constructor guarantees nfft is ndata.size()*2 doubles*/
+      UNLESS the size of work matches noise_spectrum - both have the
+      nfft/2+1 bins returned by real_forward_fft*/
       // DEBUG - try using a pure water level
       //double b_rms=work.rms();
       int number_regularized(0);
-      for(j=0;j<nfft;++j)
+      for(j=0;j<work.size();++j)
       {
         /* We do this with pointers.  It makes the code more obscure, but
         works efficiently.  Note this assumes the ComplexArray implementation
@@ -399,12 +387,8 @@ void MultiTaperSpecDivDecon::process()
     //ComplexArray winv;
     winv.clear();
     ao_fft.clear();
-    double *d0=new double[nfft];
-    for(int k=0;k<nfft;++k) d0[k]=0.0;
-    d0[0]=1.0;
-    ComplexArray delta0(nfft,d0);
-    delete [] d0;
-    gsl_fft_complex_forward(delta0.ptr(),1,nfft,wavetable,workspace);
+    /* fft of a zero lag spike is exactly one at all frequencies */
+    ComplexArray delta0(this->number_bins(),1.0);
     for(i=0;i<nseq;++i)
     {
       ComplexArray work(delta0);
@@ -430,11 +414,11 @@ void MultiTaperSpecDivDecon::process()
       ComplexArray work(rfestimates[i]);
       /* We always apply the shaping wavelet to the rf estimate.  We do it
       here before averaging. */
-      work=(*shapingwavelet.wavelet())*work;
-      gsl_fft_complex_inverse(work.ptr(), 1, nfft, wavetable, workspace);
+      work*=(*shapingwavelet.wavelet_bins());
+      vector<double> rf(this->real_inverse_fft(work));
       for(j=0;j<nfft;++j)
       {
-        result[j]+=work[j].real();
+        result[j]+=rf[j];
       }
       //DEBUG
       /*
@@ -474,9 +458,9 @@ CoreTimeSeries MultiTaperSpecDivDecon::actual_output()
       for(i=0;i<nseq;++i)
       {
         ComplexArray work(ao_fft[i]);
-        work=(*shapingwavelet.wavelet())*work;
-        gsl_fft_complex_inverse(work.ptr(),1,nfft,wavetable,workspace);
-        for(k=0;k<nfft;++k) ao[k]+=work[k].real();
+        work*=(*shapingwavelet.wavelet_bins());
+        vector<double> aowork(this->real_inverse_fft(work));
+        for(k=0;k<nfft;++k) ao[k]+=aowork[k];
       }
       double nrmscl=1.0/((double)nseq);
       for(k=0;k<nfft;++k) ao[k] *= nrmscl;
@@ -521,7 +505,7 @@ CoreTimeSeries MultiTaperSpecDivDecon::inverse_wavelet(const double t0parent)
      for(int i=0;i<nseq;++i)
      {
        CoreTimeSeries work(this->FFTDeconOperator::FourierInverse(this->winv[i],
-                  *shapingwavelet.wavelet(),dt,t0parent));
+                  *shapingwavelet.wavelet_bins(),dt,t0parent));
        if(i==0)
 	   result=work;
        else
@@ -551,7 +535,7 @@ std::vector<CoreTimeSeries> MultiTaperSpecDivDecon::all_inverse_wavelets
         for(int i=0;i<nseq;++i)
         {
             CoreTimeSeries work(this->FFTDeconOperator::FourierInverse
-               (this->winv[i],*shapingwavelet.wavelet(),dt,t0parent));
+               (this->winv[i],*shapingwavelet.wavelet_bins(),dt,t0parent));
             all.push_back(work);
         }
         return all;
@@ -570,7 +554,7 @@ std::vector<CoreTimeSeries> MultiTaperSpecDivDecon::all_rfestimates
              * written to return inverse wavelet, it can work in this
              * contest too*/
             CoreTimeSeries work(this->FFTDeconOperator::FourierInverse
-               (this->rfestimates[i],*shapingwavelet.wavelet(),dt,t0parent));
+               (this->rfestimates[i],*shapingwavelet.wavelet_bins(),dt,t0parent));
             all.push_back(work);
         }
         return all;
@@ -589,7 +573,7 @@ std::vector<CoreTimeSeries> MultiTaperSpecDivDecon::all_actual_outputs
              * written to return inverse wavelet, it can work in this
              * contest too*/
             CoreTimeSeries work(this->FFTDeconOperator::FourierInverse
-               (this->ao_fft[i],*shapingwavelet.wavelet(),dt,t0parent));
+               (this->ao_fft[i],*shapingwavelet.wavelet_bins(),dt,t0parent));
             all.push_back(work);
         }
         return all;
@@ -186,9 +186,9 @@ vector<ComplexArray> MultiTaperXcorDecon::taper_data(const vector<double>& signa
     vector<ComplexArray> tdata;
     int ntapers=tapers.rows();
     tdata.reserve(ntapers);
+    vector<double> work(nfft);
     for(i=0; i<ntapers; ++i)
     {
-        double *work=new double[nfft];
         /* This will assure part of vector between end of
          * data and nfft is zero padded */
         for(j=0; j<nfft; ++j) work[j]=0.0;
@@ -196,9 +196,8 @@ vector<ComplexArray> MultiTaperXcorDecon::taper_data(const vector<double>& signa
         {
             work[j]=tapers(i,j)*signal[j];
         }
-        /* Force zero pads always */
-        ComplexArray cwork(nfft,work);
-        tdata.push_back(cwork);
+        /* data are real so use the real fft */
+        tdata.push_back(this->real_forward_fft(work));
     }
     return tdata;
 }
@@ -219,28 +218,16 @@ void MultiTaperXcorDecon::process()
     /* The tapered data are stored in this vector of arrays */
     int i,j;
     vector<ComplexArray> tdata;
+    /* taper_data returns the fft of each tapered data vector */
     tdata=taper_data(data);
-    /* Apply fft to each tapered data vector */
-    for(i=0; i<nseq; ++i)
-    {
-        gsl_fft_complex_forward(tdata[i].ptr(),1,nfft,wavetable,workspace);
-    }
     //DEBUG
     //cerr<< "Tapering wavelet vector"<<endl;
     /* Now we need to do the same for the wavelet data */
     vector<ComplexArray> wdata;
     wdata=taper_data(wavelet);
-    for(i=0; i<nseq; ++i)
-    {
-        gsl_fft_complex_forward(wdata[i].ptr(),1,nfft,wavetable,workspace);
-    }
     /* And the noise data - although with noise we quickly turn to power spectrum */
     vector<ComplexArray> ndata;
     ndata=taper_data(noise);
-    for(i=0; i<nseq; ++i)
-    {
-        gsl_fft_complex_forward(ndata[i].ptr(),1,nfft,wavetable,workspace);
-    }
     vector<double> noise_spectrum(ndata[0].abs());
     for(i=1; i<nseq; ++i)
     {
@@ -318,7 +305,7 @@ void MultiTaperXcorDecon::process()
     */
     /* this applies the shaping wavelet.  NOTE we intentionally do NOT
          * apply this to winv and ao_fft as a bow to some efficiency */
-    rf_fft=(*shapingwavelet.wavelet())*rf_fft;
+    rf_fft*=(*shapingwavelet.wavelet_bins());
     //DEBUG
     /*
     cerr << "RF spectrum after shaping wavelet applied"<<endl;
@@ -331,18 +318,18 @@ void MultiTaperXcorDecon::process()
     /* Next compute inverse fft, save real part, and apply the time shift.
     The time shift formula assumes wrapping in the form used by the gsl
     algorithm. */
-    gsl_fft_complex_inverse(rf_fft.ptr(), 1, nfft, wavetable, workspace);
+    vector<double> rf(this->real_inverse_fft(rf_fft));
     if(sample_shift>0)
     {
         for(int k=sample_shift; k>0; k--)
-            result.push_back(rf_fft[nfft-k].real());
+            result.push_back(rf[nfft-k]);
         for(int k=0; k<data.size()-sample_shift; k++)
-            result.push_back(rf_fft[k].real());
+            result.push_back(rf[k]);
     }
     else if(sample_shift==0)
     {
         for(int k=0; k<data.size(); k++)
-            result.push_back(rf_fft[k].real());
+            result.push_back(rf[k]);
     }
     else
     {
@@ -357,11 +344,8 @@ CoreTimeSeries MultiTaperXcorDecon::actual_output()
         /* The ao_fft array contains the fft of the actual output wavelet.
          * We do need to appy the shaping wavelet for consistency before
          * converting it to the time domain.*/
-        ao_fft=(*shapingwavelet.wavelet())*ao_fft;
-        gsl_fft_complex_inverse(ao_fft.ptr(),1,nfft,wavetable,workspace);
-        vector<double> ao;
-        ao.reserve(nfft);
-        for(int k=0; k<ao_fft.size(); ++k) ao.push_back(ao_fft[k].real());
+        ao_fft*=(*shapingwavelet.wavelet_bins());
+        vector<double> ao(this->real_inverse_fft(ao_fft));
         /* We always shift this wavelet to the center of the data vector.
         We handle the time through the CoreTimeSeries object. */
         int i0=nfft/2;
@@ -398,7 +382,7 @@ CoreTimeSeries MultiTaperXcorDecon::inverse_wavelet(const double t0parent)
  *         retain for now.   Perhaps should a copy of dt in the ScalarDecon object. */
 	double dt=this->shapingwavelet.sample_interval();
 	return (this->FFTDeconOperator::FourierInverse(this->winv,
-                *shapingwavelet.wavelet(),dt,t0parent));
+                *shapingwavelet.wavelet_bins(),dt,t0parent));
     } catch(...) {
         throw;
     };
@@ -4,7 +4,8 @@ namespace mspass::algorithms::deconvolution
 using namespace std;
 using namespace mspass::utility;
 
-ScalarDecon::ScalarDecon(const Metadata &md) : shapingwavelet(md)
+ScalarDecon::ScalarDecon(const Metadata &md)
+    : shapingwavelet(md),wavelet_changed(true)
 {
     try {
         /* This has to be defined or the shapingwavlet constructor will
@@ -18,12 +19,13 @@ ScalarDecon::ScalarDecon(const Metadata &md) : shapingwavelet(md)
     };
 }
 ScalarDecon::ScalarDecon(const vector<double>& d, const vector<double>& w)
-    : data(d),wavelet(w)
+    : data(d),wavelet(w),wavelet_changed(true)
 {
     result.reserve(data.size());
 }
 ScalarDecon::ScalarDecon(const ScalarDecon& parent)
-    : data(parent.data),wavelet(parent.wavelet),result(parent.result)
+    : data(parent.data),wavelet(parent.wavelet),result(parent.result),
+      wavelet_changed(true)
 {
 }
 ScalarDecon& ScalarDecon::operator=(const ScalarDecon& parent)
@@ -33,6 +35,7 @@ ScalarDecon& ScalarDecon::operator=(const ScalarDecon& parent)
         wavelet=parent.wavelet;
         data=parent.data;
         result=parent.result;
+        wavelet_changed=true;
     }
     return *this;
 }
@@ -41,6 +44,7 @@ int ScalarDecon::load(const vector<double> &w,const vector<double> &d)
     wavelet=w;
     data=d;
     result.clear();
+    wavelet_changed=true;
     return 0;
 }
 /* this an next method are normally called back to back.  To assure
@@ -57,6 +61,7 @@ int ScalarDecon::loadwavelet(const vector<double> &w)
 {
   wavelet=w;
   result.clear();
+  wavelet_changed=true;
   return 0;
 }
 void ScalarDecon::changeparameter(const Metadata& md)
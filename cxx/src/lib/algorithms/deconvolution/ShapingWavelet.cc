@@ -34,12 +34,12 @@ ShapingWavelet::ShapingWavelet(const Metadata& md, int nfftin)
                  ErrorSeverity::Invalid);
             }
         }
-        /* these are workspaces used by gnu's fft algorithm.  Other parts
-         * of this library cache them for efficiency, but this one we
-         * compute ever time the object is created and then discard it. */
-        gsl_fft_complex_wavetable *wavetable;
+        /* these are workspaces used by gnu's fft algorithm.  The wavetable
+         * comes from the shared fft plan cache, but the workspace we
+         * allocate every time the object is created and then discard it. */
+        shared_ptr<const ComplexFFTPlan> plan;
         gsl_fft_complex_workspace *workspace;
-        wavetable = gsl_fft_complex_wavetable_alloc (nfft);
+        plan = get_complex_fft_plan(nfft);
         workspace = gsl_fft_complex_workspace_alloc (nfft);
         string wavelettype=md.get_string("shaping_wavelet_type");
         wavelet_name=wavelettype;
@@ -51,7 +51,7 @@ ShapingWavelet::ShapingWavelet(const Metadata& md, int nfftin)
             //construct wavelet and fft
             r=gaussian(fpeak,(float)dt,nfft);
             w=ComplexArray(nfft,r);
-            gsl_fft_complex_forward(w.ptr(), 1, nfft, wavetable, workspace);
+            gsl_fft_complex_forward(w.ptr(), 1, nfft, plan->wavetable(), workspace);
             delete [] r;
         }
         /* Note for CNR3CDecon the initial values on construction for
@@ -67,7 +67,7 @@ ShapingWavelet::ShapingWavelet(const Metadata& md, int nfftin)
 //cerr << "Ricker shaping wavelet"<<endl;
 //for(int k=0;k<nfft;++k) cerr << r[k]<<endl;
             w=ComplexArray(nfft,r);
-            gsl_fft_complex_forward(w.ptr(), 1, nfft, wavetable, workspace);
+            gsl_fft_complex_forward(w.ptr(), 1, nfft, plan->wavetable(), workspace);
             delete [] r;
         }
         else if(wavelettype=="butterworth")
@@ -106,7 +106,7 @@ ShapingWavelet::ShapingWavelet(const Metadata& md, int nfftin)
  	   // zero to avoid time shifts in output
             dtmp.s=circular_shift(dtmp.s,nfft/2);
             w=ComplexArray(dtmp.s.size(), &(dtmp.s[0]));
-            gsl_fft_complex_forward(w.ptr(), 1, nfft, wavetable, workspace);
+            gsl_fft_complex_forward(w.ptr(), 1, nfft, plan->wavetable(), workspace);
         }
         */
         else if((wavelettype=="slepian") || (wavelettype=="Slepian") )
@@ -132,7 +132,7 @@ ShapingWavelet::ShapingWavelet(const Metadata& md, int nfftin)
           dcopy(nwsize,wtmp,1,work,1);
           delete [] wtmp;
           w=ComplexArray(nfft,work);
-          gsl_fft_complex_forward(w.ptr(), 1, nfft, wavetable, workspace);
+          gsl_fft_complex_forward(w.ptr(), 1, nfft, plan->wavetable(), workspace);
           delete [] work;
         }
         else if(wavelettype=="none")
@@ -154,9 +154,9 @@ ShapingWavelet::ShapingWavelet(const Metadata& md, int nfftin)
                   + "illegal value for shaping_wavelet_type="+wavelettype,
                   ErrorSeverity::Invalid);
         }
-        gsl_fft_complex_wavetable_free (wavetable);
         gsl_fft_complex_workspace_free (workspace);
         df=1.0/(dt*((double)nfft));
+        this->set_wavelet_bins();
     } catch(MsPASSError& err)
     {
         cerr <<base_error<<"Something threw an unhandled MsPASSError with this message:"<<endl;
@@ -180,14 +180,14 @@ ShapingWavelet::ShapingWavelet(const double fpeak, const double dtin,
   double *r;
   r=rickerwavelet((float)fpeak,(float)dt,nfft);
   w=ComplexArray(nfft,r);
-  gsl_fft_complex_wavetable *wavetable;
+  shared_ptr<const ComplexFFTPlan> plan;
   gsl_fft_complex_workspace *workspace;
-  wavetable = gsl_fft_complex_wavetable_alloc (nfft);
+  plan = get_complex_fft_plan(nfft);
   workspace = gsl_fft_complex_workspace_alloc (nfft);
-  gsl_fft_complex_forward(w.ptr(), 1, nfft, wavetable, workspace);
-  gsl_fft_complex_wavetable_free (wavetable);
+  gsl_fft_complex_forward(w.ptr(), 1, nfft, plan->wavetable(), workspace);
   gsl_fft_complex_workspace_free (workspace);
   delete [] r;
+  this->set_wavelet_bins();
 }
 ShapingWavelet::ShapingWavelet(const int npolelo, const double f3dblo,
           const int npolehi, const double f3dbhi,const double dtin, const int n)
@@ -198,8 +198,10 @@ ShapingWavelet::ShapingWavelet(const int npolelo, const double f3dblo,
   df=1.0/(dt*static_cast<double>(n));
   Butterworth bwf(true,true,true,npolelo,f3dblo,npolehi,f3dbhi,dtin);
   w=bwf.transfer_function(nfft);
+  this->set_wavelet_bins();
 }
-ShapingWavelet::ShapingWavelet(const ShapingWavelet& parent) : w(parent.w)
+ShapingWavelet::ShapingWavelet(const ShapingWavelet& parent)
+    : w(parent.w), wbins(parent.wbins)
 {
     dt=parent.dt;
     df=parent.df;
@@ -246,20 +248,21 @@ ShapingWavelet::ShapingWavelet(CoreTimeSeries d, int nfft)
         if(t>d.endtime()) break;
         if( (iw>=0) && (iw<nfft)) dwork[i]=d.s[iw];
     }
-    gsl_fft_complex_wavetable *wavetable;
+    shared_ptr<const ComplexFFTPlan> plan;
     gsl_fft_complex_workspace *workspace;
-    wavetable = gsl_fft_complex_wavetable_alloc (nfft);
+    plan = get_complex_fft_plan(nfft);
     workspace = gsl_fft_complex_workspace_alloc (nfft);
     w=ComplexArray(nfft,&(dwork[0]));
-    gsl_fft_complex_forward(w.ptr(), 1, nfft, wavetable, workspace);
-    gsl_fft_complex_wavetable_free (wavetable);
+    gsl_fft_complex_forward(w.ptr(), 1, nfft, plan->wavetable(), workspace);
     gsl_fft_complex_workspace_free (workspace);
+    this->set_wavelet_bins();
 }
 ShapingWavelet& ShapingWavelet::operator=(const ShapingWavelet& parent)
 {
     if(this != &parent)
     {
         w=parent.w;
+        wbins=parent.wbins;
         dt=parent.dt;
         df=parent.df;
         wavelet_name=parent.wavelet_name;
@@ -270,15 +273,14 @@ CoreTimeSeries ShapingWavelet::impulse_response()
 {
     try {
         int nfft=w.size();
-        gsl_fft_complex_wavetable *wavetable;
+        shared_ptr<const ComplexFFTPlan> plan;
         gsl_fft_complex_workspace *workspace;
-        wavetable = gsl_fft_complex_wavetable_alloc (nfft);
+        plan = get_complex_fft_plan(nfft);
         workspace = gsl_fft_complex_workspace_alloc (nfft);
         /* We need to copy the current shaping wavelet or the inverse fft
          * will make it invalid */
         ComplexArray iwf(w);
-        gsl_fft_complex_inverse(iwf.ptr(), 1, nfft, wavetable, workspace);
-        gsl_fft_complex_wavetable_free (wavetable);
+        gsl_fft_complex_inverse(iwf.ptr(), 1, nfft, plan->wavetable(), workspace);
         gsl_fft_complex_workspace_free (workspace);
         CoreTimeSeries result(nfft);
         /* old API
@@ -307,4 +309,18 @@ CoreTimeSeries ShapingWavelet::impulse_response()
         throw;
     };
 }
+void ShapingWavelet::set_wavelet_bins()
+{
+    /* (w[k]+conj(w[n-k]))/2 is the part of w that acts on a real signal */
+    int n=w.size();
+    wbins=ComplexArray(n/2+1);
+    const double *zp=w.ptr();
+    for(int k=0;k<=n/2;++k)
+    {
+        int kneg=(n-k)%n;
+        double *z=wbins.ptr(k);
+        *z=0.5*(zp[2*k]+zp[2*kneg]);
+        *(z+1)=0.5*(zp[2*k+1]-zp[2*kneg+1]);
+    }
+}
 } //End namespace
@@ -23,6 +23,8 @@ int WaterLevelDecon::read_metadata(const Metadata &md)
         }
         wlv=md.get_double("water_level");
         shapingwavelet=ShapingWavelet(md,FFTDeconOperator::nfft);
+        /* the inverse depends on nfft and wlv */
+        wavelet_changed=true;
         return 0;
     } catch(...) {
         throw;
@@ -59,26 +61,22 @@ WaterLevelDecon::WaterLevelDecon(const Metadata &md,
     wavelet=w;
     data=d;
 }
-void WaterLevelDecon::process()
+/* The inverse depends only on the wavelet so it is computed only when
+the wavelet or operator parameters change. */
+void WaterLevelDecon::compute_winv()
 {
-
-    //apply fft to the input trace data
-    // data and wavelet sizes need to be zero padded if the are short
-    if(data.size()<nfft) for(int i=data.size();i<nfft;++i) data.push_back(0.0);
-    ComplexArray d_fft(nfft,&(data[0]));
-    gsl_fft_complex_forward(d_fft.ptr(), 1, nfft, wavetable, workspace);
-
     //apply fft to wavelet
+    // wavelet size needs to be zero padded if it is short
     if(wavelet.size()<nfft) for(int i=wavelet.size();i<nfft;++i) wavelet.push_back(0.0);
-    ComplexArray b_fft(nfft,&(wavelet[0]));
-    gsl_fft_complex_forward(b_fft.ptr(), 1, nfft, wavetable, workspace);
+    ComplexArray b_fft(this->real_forward_fft(wavelet));
 
-    double b_rms=b_fft.rms();
+    double b_rms=this->spectrum_rms(b_fft);
     if(b_rms==0.0) throw MsPASSError("WaterLevelDecon::process():  wavelet data vector is all zeros");
 
     //water level - count the number of points below water level
+    //bins are weighted by the number of full spectrum frequencies they hold
     int nunderwater(0);
-    for(int i=0; i<nfft; i++)
+    for(int i=0; i<b_fft.size(); i++)
     {
 	/* We have to avoid hard zeros because the formula below will
 	 * yield an NaN when that happens from 0/0 */
@@ -101,53 +99,52 @@ void WaterLevelDecon::process()
               //imag part
               *(b_fft.ptr(i)+1)=(*(b_fft.ptr(i)+1)/abs(b_fft[i]))*b_rms*wlv;
 	    }
-            ++nunderwater;
+            nunderwater += this->bin_multiplicity(i);
         }
     }
     regularization_fraction= ((double)nunderwater)/((double)nfft);
-    ComplexArray rf_fft;
-    rf_fft=d_fft/b_fft;
-    /* Make numerator for inverse from zero lag spike */
-    double *d0=new double[nfft];
-    for(int k=0;k<nfft;++k) d0[k]=0.0;
-    d0[0]=1.0;
-    ComplexArray delta0(nfft,d0);
-    delete [] d0;
-    gsl_fft_complex_forward(delta0.ptr(),1,nfft,wavetable,workspace);
+    /* Make numerator for inverse from zero lag spike.  Its fft is exactly
+    one at all frequencies so we build that directly. */
+    ComplexArray delta0(this->number_bins(),1.0);
     winv=delta0/b_fft;
+    wavelet_changed=false;
+}
+void WaterLevelDecon::process()
+{
+    if(wavelet_changed || (winv.size()!=this->number_bins())) this->compute_winv();
+    //apply fft to the input trace data
+    // data size needs to be zero padded if it is short
+    if(data.size()<nfft) for(int i=data.size();i<nfft;++i) data.push_back(0.0);
+    ComplexArray rf_fft(this->real_forward_fft(data));
+    rf_fft*=winv;
 
     //apply shaping wavelet to rf estimate
-    rf_fft=(*shapingwavelet.wavelet())*rf_fft;
+    rf_fft*=(*shapingwavelet.wavelet_bins());
 
     //ifft gets result
-    gsl_fft_complex_inverse(rf_fft.ptr(), 1, nfft, wavetable, workspace);
+    vector<double> rf(this->real_inverse_fft(rf_fft));
     if(sample_shift>0)
     {
         for(int k=sample_shift; k>0; k--)
-            result.push_back(rf_fft[nfft-k].real());
+            result.push_back(rf[nfft-k]);
         for(unsigned int k=0; k<data.size()-sample_shift; k++)
-            result.push_back(rf_fft[k].real());
+            result.push_back(rf[k]);
     }
     else
     {
         for(unsigned int k=0; k<data.size(); k++)
-            result.push_back(rf_fft[k].real());
+            result.push_back(rf[k]);
     }
 }
 CoreTimeSeries WaterLevelDecon::actual_output()
 {
     try {
-        ComplexArray W(nfft,&(wavelet[0]));
-        gsl_fft_complex_forward(W.ptr(),1,nfft,wavetable,workspace);
-        ComplexArray ao_fft;
-        ao_fft=winv*W;
+        ComplexArray ao_fft(this->real_forward_fft(wavelet));
+        ao_fft*=winv;
         /* We always apply the shaping wavelet - this perhaps should be optional
         but probably better done with a none option for the shaping wavelet */
-        ao_fft=(*shapingwavelet.wavelet())*ao_fft;
-        gsl_fft_complex_inverse(ao_fft.ptr(),1,nfft,wavetable,workspace);
-        vector<double> ao;
-        ao.reserve(nfft);
-        for(unsigned int k=0; k<ao_fft.size(); ++k) ao.push_back(ao_fft[k].real());
+        ao_fft*=(*shapingwavelet.wavelet_bins());
+        vector<double> ao(this->real_inverse_fft(ao_fft));
         /* We always shift this wavelet to the center of the data vector.
         We handle the time through the CoreTimeSeries object. */
         int i0=nfft/2;
@@ -184,7 +181,7 @@ CoreTimeSeries WaterLevelDecon::inverse_wavelet(const double t0parent)
  *         retain for now.   Perhaps should a copy of dt in the ScalarDecon object. */
 	double dt=this->shapingwavelet.sample_interval();
 	return (this->FFTDeconOperator::FourierInverse(this->winv,
-		*shapingwavelet.wavelet(),dt,t0parent));
+		*shapingwavelet.wavelet_bins(),dt,t0parent));
     } catch(...) {
         throw;
     };
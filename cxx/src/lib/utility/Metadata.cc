@@ -1,3 +1,5 @@
+#include <cstdint>
+#include <cstring>
 #include <iomanip>
 #include <boost/core/demangle.hpp>
 #include "misc/base64.h"
@@ -182,6 +184,12 @@ string demangled_name(const boost::any a)
         return pretty_name;
     }catch(...){throw;};
 }
+bool has_python_objects(const Metadata& md)
+{
+  for(auto mdptr=md.begin();mdptr!=md.end();++mdptr)
+    if(mdptr->second.type()==typeid(pybind11::object)) return true;
+  return false;
+}
 std::string Metadata::type(const string key) const
 {
     try{
@@ -357,6 +365,154 @@ Metadata restore_serialized_metadata(const std::string s)
     return md;
   }catch(...){throw;};
 }
+/* Type tags and helpers for the binary serialization used for pickle.  Lengths
+ * are written as uint64_t and all values in native byte order. */
+namespace {
+const char MD_DOUBLE='d';
+const char MD_FLOAT='f';
+const char MD_INT='i';
+const char MD_LONG='l';
+const char MD_BOOL='b';
+const char MD_STRING='s';
+const char MD_OBJECT='o';
+template <typename T> void append_binary(string& buf, const T val)
+{
+  buf.append(reinterpret_cast<const char*>(&val),sizeof(T));
+}
+void append_binary_string(string& buf, const string& val)
+{
+  append_binary<uint64_t>(buf,val.size());
+  buf.append(val);
+}
+template <typename T> T extract_binary(const string& buf, size_t& pos)
+{
+  T val;
+  if(pos+sizeof(T)>buf.size())
+    throw MsPASSError("restore_serialized_metadata_binary:  serialized data are truncated",
+      ErrorSeverity::Invalid);
+  memcpy(&val,buf.data()+pos,sizeof(T));
+  pos+=sizeof(T);
+  return val;
+}
+string extract_binary_string(const string& buf, size_t& pos)
+{
+  uint64_t n=extract_binary<uint64_t>(buf,pos);
+  if(n>buf.size()-pos)
+    throw MsPASSError("restore_serialized_metadata_binary:  serialized data are truncated",
+      ErrorSeverity::Invalid);
+  string val(buf,pos,n);
+  pos+=n;
+  return val;
+}
+}
+std::string serialize_metadata_binary(const Metadata& md)
+{
+  try{
+    string buf;
+    std::map<std::string,boost::any>::const_iterator mdptr;
+    for(mdptr=md.begin();mdptr!=md.end();++mdptr)
+    {
+      const boost::any& a=mdptr->second;
+      const std::type_info& ti=a.type();
+      if(ti==typeid(double))
+      {
+        append_binary_string(buf,mdptr->first);
+        buf.push_back(MD_DOUBLE);
+        append_binary<double>(buf,boost::any_cast<double>(a));
+      }
+      else if(ti==typeid(long))
+      {
+        append_binary_string(buf,mdptr->first);
+        buf.push_back(MD_LONG);
+        append_binary<int64_t>(buf,boost::any_cast<long>(a));
+      }
+      else if(ti==typeid(int))
+      {
+        append_binary_string(buf,mdptr->first);
+        buf.push_back(MD_INT);
+        append_binary<int32_t>(buf,boost::any_cast<int>(a));
+      }
+      else if(ti==typeid(float))
+      {
+        append_binary_string(buf,mdptr->first);
+        buf.push_back(MD_FLOAT);
+        append_binary<float>(buf,boost::any_cast<float>(a));
+      }
+      else if(ti==typeid(bool))
+      {
+        append_binary_string(buf,mdptr->first);
+        buf.push_back(MD_BOOL);
+        append_binary<char>(buf,boost::any_cast<bool>(a) ? 1 : 0);
+      }
+      else if(ti==typeid(string))
+      {
+        append_binary_string(buf,mdptr->first);
+        buf.push_back(MD_STRING);
+        append_binary_string(buf,boost::any_cast<string>(a));
+      }
+      else if(ti==typeid(pybind11::object))
+      {
+        pybind11::gil_scoped_acquire acquire;
+        pybind11::object dumps = pybind11::module::import("pickle").attr("dumps");
+        pybind11::bytes pickled=dumps(boost::any_cast<pybind11::object>(a),
+          pybind11::module::import("pickle").attr("HIGHEST_PROTOCOL"));
+        append_binary_string(buf,mdptr->first);
+        buf.push_back(MD_OBJECT);
+        append_binary_string(buf,pickled.cast<std::string>());
+      }
+      else
+      {
+        cerr << "serialize_metadata_binary (WARNING):  unsupported type for key="
+           << mdptr->first<<" of "<<demangled_name(a)<<endl
+           << "Attribute will not be saved"<<endl;
+      }
+    }
+    return buf;
+  }catch(...){throw;};
+}
+Metadata restore_serialized_metadata_binary(const std::string& sd)
+{
+  Metadata md;
+  size_t pos=0;
+  while(pos<sd.size())
+  {
+    string key=extract_binary_string(sd,pos);
+    char typ=extract_binary<char>(sd,pos);
+    switch(typ)
+    {
+      case MD_DOUBLE:
+        md.put(key,extract_binary<double>(sd,pos));
+        break;
+      case MD_LONG:
+        md.put<long>(key,extract_binary<int64_t>(sd,pos));
+        break;
+      case MD_INT:
+        md.put(key,static_cast<int>(extract_binary<int32_t>(sd,pos)));
+        break;
+      case MD_FLOAT:
+        md.put<float>(key,extract_binary<float>(sd,pos));
+        break;
+      case MD_BOOL:
+        md.put(key,extract_binary<char>(sd,pos)!=0);
+        break;
+      case MD_STRING:
+        md.put(key,extract_binary_string(sd,pos));
+        break;
+      case MD_OBJECT:
+      {
+        string pickled=extract_binary_string(sd,pos);
+        pybind11::gil_scoped_acquire acquire;
+        pybind11::object loads = pybind11::module::import("pickle").attr("loads");
+        md.put_object(key,loads(pybind11::bytes(pickled)));
+        break;
+      }
+      default:
+        throw MsPASSError(string("restore_serialized_metadata_binary:  unknown type tag for key=")
+          + key, ErrorSeverity::Invalid);
+    }
+  }
+  return md;
+}
 /* New method added Apr 2020 to change key assigned to a value - used for aliass*/
 void Metadata::change_key(const string oldkey, const string newkey)
 {
@@ -0,0 +1,159 @@
+#include <algorithm>
+#include <atomic>
+#include <exception>
+#include <memory>
+#include "mspass/utility/ThreadPool.h"
+namespace mspass::utility
+{
+using namespace std;
+
+namespace
+{
+/* True in threads currently running work for any pool.  Used to run
+nested parallel_for calls serially. */
+thread_local bool inside_pool(false);
+/* Sets inside_pool for the lifetime of the object and restores the
+previous value on exit, including exit by an exception. */
+class PoolScope
+{
+public:
+  PoolScope():previous(inside_pool) {inside_pool=true;};
+  ~PoolScope() {inside_pool=previous;};
+private:
+  bool previous;
+};
+/* State shared by the threads working on one parallel_for call */
+struct LoopState
+{
+  size_t n;
+  atomic<size_t> next;
+  atomic<bool> failed;
+  exception_ptr error;
+  size_t running;
+  mutex lock;
+  condition_variable finished;
+};
+void run_loop(LoopState& state, const function<void(size_t)>& f)
+{
+  PoolScope scope;
+  size_t i;
+  while(!state.failed && (i=state.next++)<state.n)
+  {
+    try{
+      f(i);
+    }catch(...)
+    {
+      lock_guard<mutex> guard(state.lock);
+      if(!state.error) state.error=current_exception();
+      state.failed=true;
+    }
+  }
+}
+}
+
+ThreadPool::ThreadPool(const size_t nthreads) : stopping(false)
+{
+  size_t n(nthreads);
+  if(n==0) n=max(1u,thread::hardware_concurrency());
+  workers.reserve(n-1);
+  for(size_t i=1;i<n;++i)
+    workers.push_back(thread(&ThreadPool::worker_loop,this));
+}
+ThreadPool::~ThreadPool()
+{
+  {
+    lock_guard<mutex> guard(lock);
+    stopping=true;
+  }
+  wakeup.notify_all();
+  for(auto& w : workers) w.join();
+}
+void ThreadPool::worker_loop()
+{
+  while(true)
+  {
+    function<void()> job;
+    {
+      unique_lock<mutex> guard(lock);
+      wakeup.wait(guard,[this]{return stopping || !jobs.empty();});
+      if(jobs.empty()) return;
+      job=move(jobs.front());
+      jobs.pop_front();
+    }
+    job();
+  }
+}
+void ThreadPool::parallel_for(const size_t n, const function<void(size_t)>& f)
+{
+  if(n==0) return;
+  if(workers.empty() || n==1 || inside_pool)
+  {
+    PoolScope scope;
+    for(size_t i=0;i<n;++i) f(i);
+    return;
+  }
+  LoopState state;
+  state.n=n;
+  state.next=0;
+  state.failed=false;
+  /* The calling thread is one of the n threads so we need at most n-1 helpers */
+  size_t nhelpers=min(workers.size(),n-1);
+  state.running=nhelpers;
+  {
+    lock_guard<mutex> guard(lock);
+    for(size_t i=0;i<nhelpers;++i)
+    {
+      jobs.push_back([&state,&f]{
+        run_loop(state,f);
+        lock_guard<mutex> done(state.lock);
+        --state.running;
+        state.finished.notify_all();
+      });
+    }
+  }
+  wakeup.notify_all();
+  run_loop(state,f);
+  /* state and f are referenced by the helpers so we must wait for all of
+  them even if the loop is already finished */
+  unique_lock<mutex> guard(state.lock);
+  state.finished.wait(guard,[&state]{return state.running==0;});
+  if(state.error) rethrow_exception(state.error);
+}
+
+namespace
+{
+mutex global_pool_lock;
+size_t global_pool_size(0);
+shared_ptr<ThreadPool> global_pool;
+/* Returns the process wide pool creating it if necessary. */
+shared_ptr<ThreadPool> get_global_pool()
+{
+  lock_guard<mutex> guard(global_pool_lock);
+  if(!global_pool) global_pool=make_shared<ThreadPool>(global_pool_size);
+  return global_pool;
+}
+}
+void set_thread_pool_size(const size_t nthreads)
+{
+  shared_ptr<ThreadPool> oldpool;
+  {
+    lock_guard<mutex> guard(global_pool_lock);
+    global_pool_size=nthreads;
+    /* The old pool is released outside the lock because its destructor
+    waits for running work */
+    oldpool=global_pool;
+    global_pool.reset();
+  }
+}
+size_t thread_pool_size()
+{
+  return get_global_pool()->size();
+}
+void parallel_for(const size_t n, const function<void(size_t)>& f)
+{
+  /* The copy keeps the pool alive for the duration of the call even if
+  set_thread_pool_size replaces it */
+  shared_ptr<ThreadPool> pool=get_global_pool();
+  pool->parallel_for(n,f);
+}
+}  // End namespace
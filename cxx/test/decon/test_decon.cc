@@ -0,0 +1,184 @@
+#include <assert.h>
+#include <math.h>
+#include <iostream>
+#include <complex>
+#include <vector>
+#include <stdlib.h>
+#include <gsl/gsl_fft_complex.h>
+#include "mspass/utility/MsPASSError.h"
+#include "mspass/utility/Metadata.h"
+#include "mspass/algorithms/deconvolution/FFTPlanCache.h"
+#include "mspass/algorithms/deconvolution/ShapingWavelet.h"
+#include "mspass/algorithms/deconvolution/WaterLevelDecon.h"
+#include "mspass/algorithms/deconvolution/LeastSquareDecon.h"
+/* Compares the frequency domain operators, which work on the nfft/2+1
+bins of real ffts, with the full length complex fft computation they
+replaced for odd and even fft lengths. */
+using namespace std;
+using namespace mspass::utility;
+using namespace mspass::algorithms::deconvolution;
+typedef complex<double> Z;
+const double DT(0.01);
+const double FPEAK(5.0);
+/* The Metadata constructors always round nfft up to a power of 2.  These
+children change the size after construction so odd lengths can be tested. */
+class TestWaterLevelDecon : public WaterLevelDecon
+{
+public:
+  TestWaterLevelDecon(const Metadata& md, const int n) : WaterLevelDecon(md)
+  {
+    this->change_size(n);
+    shapingwavelet=ShapingWavelet(FPEAK,DT,n);
+    wavelet_changed=true;
+  };
+  ShapingWavelet& sw(){return shapingwavelet;};
+};
+class TestLeastSquareDecon : public LeastSquareDecon
+{
+public:
+  TestLeastSquareDecon(const Metadata& md, const int n) : LeastSquareDecon(md)
+  {
+    this->change_size(n);
+    shapingwavelet=ShapingWavelet(FPEAK,DT,n);
+    wavelet_changed=true;
+  };
+};
+/* Complex fft of a real or complex vector with the GSL complex algorithm */
+vector<Z> complex_fft(const vector<Z>& x, const bool inverse)
+{
+  int n=x.size();
+  vector<Z> z(x);
+  auto plan=get_complex_fft_plan(n);
+  gsl_fft_complex_workspace *ws=gsl_fft_complex_workspace_alloc(n);
+  double *zp=reinterpret_cast<double*>(&(z[0]));
+  if(inverse)
+    gsl_fft_complex_inverse(zp,1,n,plan->wavetable(),ws);
+  else
+    gsl_fft_complex_forward(zp,1,n,plan->wavetable(),ws);
+  gsl_fft_complex_workspace_free(ws);
+  return z;
+}
+vector<Z> complex_fft(const vector<double>& x)
+{
+  vector<Z> z(x.begin(),x.end());
+  return complex_fft(z,false);
+}
+double rms(const vector<Z>& z)
+{
+  double sumsq(0.0);
+  for(auto& v : z) sumsq += norm(v);
+  return sqrt(sumsq)/static_cast<double>(z.size());
+}
+/* Applies the inverse spectrum winv and shaping wavelet sw to d and
+returns the real part of the complex inverse with the output shift
+the operators use. */
+vector<double> complex_path_output(const vector<double>& d,
+  const vector<Z>& winv, const vector<Z>& sw, const int shift)
+{
+  int n=winv.size();
+  vector<Z> rf(complex_fft(d));
+  for(int k=0;k<n;++k) rf[k] *= winv[k]*sw[k];
+  rf=complex_fft(rf,true);
+  vector<double> result;
+  for(int k=shift;k>0;--k) result.push_back(rf[n-k].real());
+  for(int k=0;k<n-shift;++k) result.push_back(rf[k].real());
+  return result;
+}
+vector<Z> full_spectrum(ShapingWavelet& sw)
+{
+  ComplexArray *w=sw.wavelet();
+  vector<Z> result;
+  for(int k=0;k<w->size();++k) result.push_back((*w)[k]);
+  return result;
+}
+bool is_close(const vector<double>& x, const vector<double>& y)
+{
+  if(x.size()!=y.size()) return false;
+  double xmax(0.0),dmax(0.0);
+  for(size_t k=0;k<x.size();++k)
+  {
+    xmax=max(xmax,fabs(x[k]));
+    dmax=max(dmax,fabs(x[k]-y[k]));
+  }
+  return dmax<=1.0e-10*xmax;
+}
+vector<double> random_vector(const int n)
+{
+  vector<double> x;
+  for(int k=0;k<n;++k) x.push_back(static_cast<double>(random())/RAND_MAX-0.5);
+  return x;
+}
+int main(int argc, char **argv)
+{
+  try{
+    Metadata md;
+    md.put("operator_nfft",256);
+    md.put("target_sample_interval",DT);
+    md.put("deconvolution_data_window_start",-0.2);
+    md.put("deconvolution_data_window_end",2.0);
+    md.put("shaping_wavelet_type",string("ricker"));
+    md.put("shaping_wavelet_dt",DT);
+    md.put("shaping_wavelet_frequency",FPEAK);
+    /* ComplexArray::rms scales by 1/nfft so these large values are needed
+    for the regularization to change a useful fraction of the bins */
+    md.put("water_level",5.0);
+    md.put("damping_factor",5.0);
+    const double wlv(5.0),damp(5.0);
+    const int shift(20);
+    for(int n : {255,256,250})
+    {
+      cout << "Testing nfft="<<n<<endl;
+      vector<double> w(random_vector(n)),d(random_vector(n));
+      TestWaterLevelDecon wl(md,n);
+      vector<Z> sw(full_spectrum(wl.sw()));
+      assert(wl.sw().wavelet_bins()->size()==n/2+1);
+      /* Water level on the full complex spectrum */
+      vector<Z> b(complex_fft(w));
+      double b_rms=rms(b);
+      int nunderwater(0);
+      vector<Z> winv;
+      for(int k=0;k<n;++k)
+      {
+        if(abs(b[k])<b_rms*wlv)
+        {
+          /* Same order of operations as WaterLevelDecon - the imaginary
+          part is scaled using the amplitude after the real part is set */
+          double re=b[k].real()*b_rms*wlv/abs(b[k]);
+          double im=b[k].imag()*b_rms*wlv/abs(Z(re,b[k].imag()));
+          b[k]=Z(re,im);
+          ++nunderwater;
+        }
+        winv.push_back(1.0/b[k]);
+      }
+      assert(nunderwater>0);
+      wl.loadwavelet(w);
+      wl.loaddata(d);
+      wl.process();
+      assert(is_close(wl.getresult(),complex_path_output(d,winv,sw,shift)));
+      Metadata qc=wl.QCMetrics();
+      assert(fabs(qc.get_double("underwater_fraction")
+              - static_cast<double>(nunderwater)/static_cast<double>(n))<1.0e-12);
+      /* inverse wavelet uses the same bins with no shift */
+      vector<double> delta(n,0.0);
+      delta[0]=1.0;
+      assert(is_close(wl.inverse_wavelet(0.0).s,complex_path_output(delta,winv,sw,0)));
+      cout << "WaterLevelDecon matches complex fft computation"<<endl;
+
+      /* Damped least squares on the full complex spectrum */
+      TestLeastSquareDecon ls(md,n);
+      b=complex_fft(w);
+      double theta=rms(b)*damp;
+      theta=theta*theta;
+      for(int k=0;k<n;++k) winv[k]=conj(b[k])/(norm(b[k])+theta);
+      ls.loadwavelet(w);
+      ls.loaddata(d);
+      ls.process();
+      assert(is_close(ls.getresult(),complex_path_output(d,winv,sw,shift)));
+      cout << "LeastSquareDecon matches complex fft computation"<<endl;
+    }
+  }catch(MsPASSError& err)
+  {
+    err.log_error();
+    exit(-1);
+  }
+}
@@ -3,11 +3,12 @@ Tools for connecting to MongoDB.
 """
 import os
 import copy
+import datetime
 import pathlib
 import pickle
-import struct
 import sys
-from array import array
+import threading
+import uuid
 
 import dask.bag as daskbag
 import gridfs
@@ -29,15 +30,26 @@ from mspasspy.ccore.utility import (Metadata,
                                     dmatrix,
                                     ProcessingHistory)
 from mspasspy.db.schema import DatabaseSchema, MetadataSchema
+from mspasspy.db.seed_cache import SeedIntervalCache, ANY_LOC
 
+# Tag stored as gridfs_format in wf documents (and the fs.files entry) for sample
+# data saved to gridfs as raw little-endian float64. Documents without the tag
+# are assumed to hold the legacy pickled encoding.
+_GRIDFS_RAW_FORMAT = 'raw_v1'
 
 def read_distributed_data(client_arg, db_name, cursors, load_history=True, include_undefined=False, exclude_keys=[], collection='wf',
-                          format='spark', spark_context=None):
+                          format='spark', spark_context=None, read_by_partition=False):
     """
      This method takes a list of mongodb cursors as input, constructs a mspasspy object for each cursor in a distributed
      manner, and return all of the mspasspy objects using the format required by the distributed computing framework
      (spark RDD or dask bag).
 
+     Workers reuse one :class:`mspasspy.db.Client` per process for a given `client_arg`. With
+     `read_by_partition` each partition is read with the batched reader behind
+     :meth:`Database.read_ensemble_data`, which needs only a few queries per partition
+     instead of several per object. In that mode ids not found in the collection are dropped
+     rather than returned as None.
+
     :param client_arg: the argument to initialize a :class:`mspasspy.db.Client`.
     :param db_name: the database name in mongodb.
     :param cursors: mongodb cursors where each corresponds to a stored mspasspy object.
@@ -50,22 +62,311 @@ def read_distributed_data(client_arg, db_name, cursors, load_history=True, inclu
     :type format: :class:`str`
     :param spark_context: user specified spark context.
     :type spark_context: :class:`pyspark.SparkContext`
+    :param read_by_partition: `True` to read each partition in batch (`mapPartitions`/`map_partitions`).
     :return: a spark `RDD` or dask `bag` format of mspasspy objects.
     """
     if format == 'spark':
         list_ = spark_context.parallelize(cursors)
+        if read_by_partition:
+            return list_.mapPartitions(lambda part: _read_distributed_partition(client_arg, db_name, part, load_history, include_undefined, exclude_keys, collection))
         return list_.map(lambda cur: _read_distributed_data(client_arg, db_name, cur, load_history, include_undefined, exclude_keys, collection))
     elif format == 'dask':
         list_ = daskbag.from_sequence(cursors)
+        if read_by_partition:
+            return list_.map_partitions(lambda part: _read_distributed_partition(client_arg, db_name, part, load_history, include_undefined, exclude_keys, collection))
         return list_.map(lambda cur: _read_distributed_data(client_arg, db_name, cur, load_history, include_undefined, exclude_keys, collection))
     else:
         raise TypeError("Only spark and dask are supported")
 
 
+def read_distributed_data_by_query(client_arg, db_name, query={}, npartitions=None, load_history=True,
+                                   include_undefined=False, exclude_keys=[], collection='wf', format='spark',
+                                   spark_context=None, sample_per_partition=32, batch_size=1000):
+    """
+     This method reads the mspasspy objects matching a query of a wf collection in a distributed manner
+     without materializing the ids on the driver. The `_id` range of the matching documents is split into
+     `npartitions` ranges with boundaries estimated from a `$sample` of the collection. Each worker then
+     runs its own range query and reads the matching objects in batches of `batch_size` with a cached
+     connection. With spark the batches of a partition are streamed, so only one batch is held in
+     memory at a time. A dask bag partition is a list, so with dask each partition holds all the
+     objects of its range and `npartitions` should be large enough to keep a range in memory.
+
+    :param client_arg: the argument to initialize a :class:`mspasspy.db.Client`.
+    :param db_name: the database name in mongodb.
+    :param query: a mongodb query on the wf collection that selects the objects to read.
+    :type query: :class:`dict`
+    :param npartitions: number of partitions. Default is the default parallelism of the spark context
+        or 100 for dask.
+    :type npartitions: :class:`int`
+    :param load_history: `True` to load object-level history into the mspasspy object.
+    :param include_undefined: `True` to also read the attributes in the collection that are not defined in the schema.
+    :param exclude_keys: the metadata attributes you want to exclude from being read.
+    :type exclude_keys: a :class:`list` of :class:`str`
+    :param collection: the collection name in the database that the object is stored. If not specified, use the default wf collection in the schema.
+    :param format: "spark" or "dask".
+    :type format: :class:`str`
+    :param spark_context: user specified spark context.
+    :type spark_context: :class:`pyspark.SparkContext`
+    :param sample_per_partition: number of ids sampled per partition to estimate the range boundaries.
+    :type sample_per_partition: :class:`int`
+    :param batch_size: number of objects read with one batched query on the workers.
+    :type batch_size: :class:`int`
+    :return: a spark `RDD` or dask `bag` format of mspasspy objects.
+    """
+    if format not in ['spark', 'dask']:
+        raise TypeError("Only spark and dask are supported")
+    if npartitions is None:
+        npartitions = spark_context.defaultParallelism if format == 'spark' else 100
+    db = _get_cached_database(client_arg, db_name)
+    wf_collection = db.database_schema.default_name(collection)
+    ranges = _split_id_range(db[wf_collection], query, npartitions, sample_per_partition)
+
+    def read_range(id_range):
+        return _read_distributed_range(client_arg, db_name, query, id_range[0], id_range[1], load_history,
+                                       include_undefined, exclude_keys, wf_collection, batch_size)
+
+    # flatMap consumes the generator, so spark streams a partition batch by batch. dask fuses map and
+    # flatten into one task, which builds the partition list from the generator
+    if format == 'spark':
+        return spark_context.parallelize(ranges, len(ranges)).flatMap(read_range)
+    else:
+        return daskbag.from_sequence(ranges, partition_size=1).map(read_range).flatten()
+
+
+def _split_id_range(col, query, npartitions, sample_per_partition=32):
+    """
+     Split the `_id` range of the documents matching query into at most npartitions contiguous
+     ranges. The boundaries are quantiles of a random sample of the matching ids, so only
+     npartitions*sample_per_partition ids are pulled to the driver.
+
+    :param col: the :class:`pymongo.collection.Collection` to split.
+    :param query: the query that selects the documents.
+    :param npartitions: the number of ranges wanted.
+    :param sample_per_partition: number of ids sampled per range.
+    :return: a :class:`list` of (lower, upper) tuples where lower is inclusive, upper is exclusive
+        and None means unbounded.
+    """
+    npartitions = max(int(npartitions), 1)
+    pipeline = [{'$match': query},
+                {'$sample': {'size': npartitions * sample_per_partition}},
+                {'$project': {'_id': 1}}]
+    sample = sorted({doc['_id'] for doc in col.aggregate(pipeline, allowDiskUse=True)})
+    boundaries = []
+    if sample:
+        for i in range(1, npartitions):
+            boundary = sample[i * len(sample) // npartitions]
+            if not boundaries or boundary > boundaries[-1]:
+                boundaries.append(boundary)
+    lower = [None] + boundaries
+    upper = boundaries + [None]
+    return list(zip(lower, upper))
+
+
+def _read_distributed_range(client_arg, db_name, query, lower, upper, load_history=True, include_undefined=False,
+                            exclude_keys=[], collection='wf', batch_size=1000):
+    """
+     A helper method used by :func:`read_distributed_data_by_query`. It runs the query restricted
+     to an `_id` range on a worker and reads the matching objects in batches. This is a generator
+     that yields the objects one batch at a time rather than building a list of the whole range.
+     Whether the caller streams the objects depends on how it consumes the generator.
+
+    :param client_arg: the argument to initialize a :class:`mspasspy.db.Client`.
+    :param db_name: the database name in mongodb.
+    :param query: the mongodb query that selects the objects.
+    :param lower: inclusive lower bound of `_id` or None.
+    :param upper: exclusive upper bound of `_id` or None.
+    :param load_history: `True` to load object-level history into the mspasspy object.
+    :param include_undefined: `True` to also read the attributes in the collection that are not defined in the schema.
+    :param exclude_keys: the metadata attributes you want to exclude from being read.
+    :type exclude_keys: a :class:`list` of :class:`str`
+    :param collection: the collection name in the database that the object is stored.
+    :param batch_size: number of objects read with one batched query.
+    :return: a generator of either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
+    """
+    db = _get_cached_database(client_arg, db_name)
+    id_range = {}
+    if lower is not None:
+        id_range['$gte'] = lower
+    if upper is not None:
+        id_range['$lt'] = upper
+    range_query = {'$and': [query, {'_id': id_range}]} if id_range else query
+    ids = []
+    for doc in db[db.database_schema.default_name(collection)].find(range_query, {'_id': 1}):
+        ids.append(doc['_id'])
+        if len(ids) == batch_size:
+            for mspass_object in db._read_data_list(ids, load_history, include_undefined, exclude_keys, collection):
+                yield mspass_object
+            ids = []
+    if ids:
+        for mspass_object in db._read_data_list(ids, load_history, include_undefined, exclude_keys, collection):
+            yield mspass_object
+
+
+def write_distributed_data(data, client_arg, db_name, storage_mode='gridfs', dir=None, dfile_prefix='partition',
+                           include_undefined=False, exclude_keys=[], collection=None, format='spark',
+                           batch_size=1000):
+    """
+     This method saves a spark `RDD` or dask `bag` of mspasspy objects to the database from the workers.
+     Each partition is saved with the cached connection of its worker process and the bulk writer behind
+     :meth:`Database.save_ensemble_data`, in batches of `batch_size` objects. Nothing but a summary is
+     returned to the driver.
+
+     In "file" storage mode with `dir` given, every partition appends its samples to its own file
+     in `dir` named `dfile_prefix` followed by a unique suffix, so workers never share a file. Without
+     `dir` the dir and dfile defined in each object are used as in :meth:`Database.save_data`.
+
+     The `_id` assigned to new documents is set on the worker copies of the objects only.
+
+    :param data: a spark `RDD` or dask `bag` of :class:`mspasspy.ccore.seismic.TimeSeries` or
+        :class:`mspasspy.ccore.seismic.Seismogram`.
+    :param client_arg: the argument to initialize a :class:`mspasspy.db.Client`.
+    :param db_name: the database name in mongodb.
+    :param storage_mode: "gridfs" or "file".
+    :type storage_mode: :class:`str`
+    :param dir: file directory of the partition files if using "file" storage mode.
+    :type dir: :class:`str`
+    :param dfile_prefix: prefix of the partition file names if using "file" storage mode.
+    :type dfile_prefix: :class:`str`
+    :param include_undefined: `True` to also save the metadata attributes not defined in the schema.
+    :param exclude_keys: the metadata attributes you want to exclude from being stored.
+    :type exclude_keys: a :class:`list` of :class:`str`
+    :param collection: the collection name you want to use. If not specified, use the defined collection in the metadata schema.
+    :param format: "spark" or "dask".
+    :type format: :class:`str`
+    :param batch_size: number of objects saved with one set of bulk operations.
+    :type batch_size: :class:`int`
+    :return: a :class:`dict` with the number of objects `saved`, `dead` objects (only their elog
+        is saved), `failed` objects and the `errors` messages of the failures.
+    """
+    if storage_mode not in ['file', 'gridfs']:
+        raise TypeError("Unknown storage mode: {}".format(storage_mode))
+
+    def write_partition(part):
+        return [_write_distributed_partition(client_arg, db_name, part, storage_mode, dir, dfile_prefix,
+                                             include_undefined, exclude_keys, collection, batch_size)]
+
+    if format == 'spark':
+        summaries = data.mapPartitions(write_partition).collect()
+    elif format == 'dask':
+        summaries = data.map_partitions(write_partition).compute()
+    else:
+        raise TypeError("Only spark and dask are supported")
+
+    summary = {'saved': 0, 'dead': 0, 'failed': 0, 'errors': []}
+    for x in summaries:
+        summary['saved'] += x['saved']
+        summary['dead'] += x['dead']
+        summary['failed'] += x['failed']
+        summary['errors'] += x['errors']
+    return summary
+
+
+def _write_distributed_partition(client_arg, db_name, mspass_objects, storage_mode='gridfs', dir=None,
+                                 dfile_prefix='partition', include_undefined=False, exclude_keys=[],
+                                 collection=None, batch_size=1000):
+    """
+     A helper method used by :func:`write_distributed_data` to save one partition. Objects are
+     grouped by type and saved in batches. A batch that fails is counted as failed and the
+     rest of the partition is still saved. When only some wf documents of a batch fail to
+     be written, the others are counted as saved.
+
+    :param client_arg: the argument to initialize a :class:`mspasspy.db.Client`.
+    :param db_name: the database name in mongodb.
+    :param mspass_objects: an iterable of mspasspy objects.
+    :param storage_mode: "gridfs" or "file".
+    :param dir: file directory of the partition file or None to use the dir and dfile of the objects.
+    :param dfile_prefix: prefix of the partition file name.
+    :param include_undefined: `True` to also save the metadata attributes not defined in the schema.
+    :param exclude_keys: the metadata attributes you want to exclude from being stored.
+    :type exclude_keys: a :class:`list` of :class:`str`
+    :param collection: the collection name you want to use. If not specified, use the defined collection in the metadata schema.
+    :param batch_size: number of objects saved with one set of bulk operations.
+    :return: a :class:`dict` summary as returned by :func:`write_distributed_data`.
+    """
+    summary = {'saved': 0, 'dead': 0, 'failed': 0, 'errors': []}
+    db = _get_cached_database(client_arg, db_name)
+    dfile = None
+    if storage_mode == 'file' and dir is not None:
+        dfile = '{}_{}'.format(dfile_prefix, uuid.uuid4().hex)
+
+    def flush(batch):
+        if not batch:
+            return
+        dfile_list = [dfile for _ in batch] if dfile else None
+        dir_list = [dir for _ in batch] if dfile else None
+        dead = sum(1 for x in batch if not x.live)
+        try:
+            db._bulk_save_data(batch, storage_mode, dfile_list, dir_list, include_undefined, exclude_keys,
+                               collection)
+        except pymongo.errors.BulkWriteError as err:
+            # only the unordered write of the wf documents raises this, so every live
+            # object without a write error was saved
+            write_errors = err.details['writeErrors']
+            summary['dead'] += dead
+            summary['saved'] += len(batch) - dead - len(write_errors)
+            summary['failed'] += len(write_errors)
+            summary['errors'].append('BulkWriteError: {} of {} documents failed, first error: {}'.format(
+                len(write_errors), len(batch) - dead, write_errors[0]['errmsg']))
+        except Exception as err:
+            summary['failed'] += len(batch)
+            summary['errors'].append('{}: {}'.format(type(err).__name__, err))
+        else:
+            summary['dead'] += dead
+            summary['saved'] += len(batch) - dead
+        batch.clear()
+
+    batches = {TimeSeries: [], Seismogram: []}
+    for mspass_object in mspass_objects:
+        batch = batches.get(type(mspass_object))
+        if batch is None:
+            summary['failed'] += 1
+            summary['errors'].append('TypeError: only TimeSeries and Seismogram are supported, got {}'.format(
+                type(mspass_object).__name__))
+            continue
+        batch.append(mspass_object)
+        if len(batch) >= batch_size:
+            flush(batch)
+    for batch in batches.values():
+        flush(batch)
+    return summary
+
+
+# Per process cache of Database handles used by the distributed readers and writers.
+# MongoClient is thread safe but not fork safe, so the process id is part of the key.
+_database_cache = {}
+_database_cache_lock = threading.Lock()
+
+
+def _get_cached_database(client_arg, db_name):
+    """
+     Return a :class:`Database` for the given client argument and database name that is shared
+     by all the tasks run in the current worker process. Constructing a new client per object
+     starts monitor threads and redoes server discovery, which dominates the cost of reading
+     small objects.
+
+    :param client_arg: the argument to initialize a :class:`mspasspy.db.Client`.
+    :param db_name: the database name in mongodb.
+    :return: :class:`Database`
+    """
+    from mspasspy.db.client import Client
+    try:
+        key = (os.getpid(), client_arg, db_name)
+        hash(key)
+    except TypeError:
+        # unhashable client_arg can't be cached
+        return Database(Client(client_arg), db_name)
+    with _database_cache_lock:
+        db = _database_cache.get(key)
+        if db is None:
+            db = Database(Client(client_arg), db_name)
+            _database_cache[key] = db
+    return db
+
+
 def _read_distributed_data(client_arg, db_name, id, load_history=True, include_undefined=False, exclude_keys=[], collection='wf'):
     """
-     A helper method used in the distributed map operation. It creates a mongodb connection with provided
-     configurations, reads data from the database, constructs a mspasspy object and returns it.
+     A helper method used in the distributed map operation. It gets the cached mongodb connection of the
+     worker process, reads data from the database, constructs a mspasspy object and returns it.
 
     :param client_arg: the argument to initialize a :class:`mspasspy.db.Client`.
     :param db_name: the database name in mongodb.
@@ -78,12 +379,32 @@ def _read_distributed_data(client_arg, db_name, id, load_history=True, include_u
     :param collection: the collection name in the database that the object is stored. If not specified, use the default wf collection in the schema.
     :return: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
     """
-    from mspasspy.db.client import Client
-    client = Client(client_arg)
-    db = Database(client, db_name)
+    db = _get_cached_database(client_arg, db_name)
     return db.read_data(id, load_history, include_undefined, exclude_keys, collection)
 
 
+def _read_distributed_partition(client_arg, db_name, ids, load_history=True, include_undefined=False, exclude_keys=[], collection='wf'):
+    """
+     A helper method used in the distributed map partitions operation. It reads all the objects
+     of a partition with one connection and the batched reader.
+
+    :param client_arg: the argument to initialize a :class:`mspasspy.db.Client`.
+    :param db_name: the database name in mongodb.
+    :param ids: an iterable of `bson.ObjectId` or dicts that contain such an "_id".
+    :param load_history: `True` to load object-level history into the mspasspy object.
+    :param include_undefined: `True` to also read the attributes in the collection that are not defined in the schema.
+    :param exclude_keys: the metadata attributes you want to exclude from being read.
+    :type exclude_keys: a :class:`list` of :class:`str`
+    :param collection: the collection name in the database that the object is stored. If not specified, use the default wf collection in the schema.
+    :return: a :class:`list` of either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
+    """
+    ids = list(ids)
+    if not ids:
+        return []
+    db = _get_cached_database(client_arg, db_name)
+    return db._read_data_list(ids, load_history, include_undefined, exclude_keys, collection)
+
+
 class Database(pymongo.database.Database):
     """
     A MongoDB database handler.
@@ -114,9 +435,19 @@ class Database(pymongo.database.Database):
         else:
             self.metadata_schema = MetadataSchema()
 
+        # cache of metadata schemas with the main collection swapped, keyed by
+        # (object type name, wf collection). See _resolve_read_schema.
+        self._read_schema_cache = {}
+        # optional in memory indexes of site and channel. See enable_seed_cache.
+        self._seed_cache = {}
+        # set once the fs.chunks index used by _bulk_save_gridfs is ensured
+        self._gridfs_index_created = False
+
     def __getstate__(self):
         ret = self.__dict__.copy()
         ret['_Database__client'] = self.client.__repr__()
+        # the seed cache holds collections and is not sent to workers
+        ret['_seed_cache'] = {}
         return ret
 
     def __setstate__(self, data):
@@ -131,6 +462,7 @@ class Database(pymongo.database.Database):
         :param schema: a instance of :class:`mspsspy.db.schema.MetadataSchema`
         """
         self.metadata_schema = schema
+        self._read_schema_cache = {}
 
     def set_database_schema(self, schema):
         """
@@ -139,6 +471,7 @@ class Database(pymongo.database.Database):
         :param schema: a instance of :class:`mspsspy.db.schema.DatabaseSchema`
         """
         self.database_schema = schema
+        self._read_schema_cache = {}
 
     def read_data(self, object_id, load_history=False, include_undefined=False, exclude_keys=[], collection='wf'):
         """
@@ -153,6 +486,55 @@ class Database(pymongo.database.Database):
         :param collection: the collection name in the database that the object is stored. If not specified, use the default wf collection in the schema.
         :return: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
         """
+        wf_collection, object_type, read_metadata_schema = self._resolve_read_schema(collection)
+
+        col = self[wf_collection]
+        try:
+            oid = object_id['_id']
+        except:
+            oid = object_id
+        object_doc = col.find_one({'_id': oid})
+        if not object_doc:
+            return None
+
+        col_dict = {}
+        for col in self._normalized_collections(read_metadata_schema, wf_collection):
+            col_dict[col] = self[col].find_one({'_id': object_doc[col + '_id']})
+
+        # 1. build metadata and the data object
+        mspass_object = self._build_data_object(object_doc, col_dict, object_type, read_metadata_schema,
+                                                wf_collection, include_undefined, exclude_keys)
+
+        # 2.load data from different modes
+        mode = object_doc['storage_mode']
+        if mode == "file":
+            self._read_data_from_dfile(mspass_object, object_doc['dir'], object_doc['dfile'], object_doc['foff'])
+        elif mode == "gridfs":
+            self._read_data_from_gridfs(mspass_object, object_doc['gridfs_id'], object_doc.get('gridfs_format'))
+        elif mode == "url":
+            pass  # todo for future
+        else:
+            raise TypeError("Unknown storage mode: {}".format(mode))
+
+        # 3.load history
+        if load_history:
+            history_obj_id_name = self.database_schema.default_name('history_object') + '_id'
+            if history_obj_id_name in object_doc:
+                self._load_history(mspass_object, object_doc[history_obj_id_name])
+
+        mspass_object.live = True
+        mspass_object.clear_modified()
+        return mspass_object
+
+    def _resolve_read_schema(self, collection):
+        """
+        Resolve the wf collection, data object type, and metadata schema used by the readers.
+
+        :param collection: the collection name in the database that the object is stored.
+        :return: a tuple of the wf collection name, the object type (either
+            :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`), and the
+            :class:`mspasspy.db.schema.MDSchemaDefinition` to read with.
+        """
         try:
             wf_collection = self.database_schema.default_name(collection)
         except MsPASSError as err:
@@ -168,24 +550,48 @@ class Database(pymongo.database.Database):
 
         # We temporarily swap the main collection defined by the metadata schema by 
         # the wf_collection. This ensures the method works consistently for any
-        # user-specified collection argument.
+        # user-specified collection argument. The deepcopy is expensive relative to
+        # reading a small object, so the swapped schema is cached until either
+        # schema is replaced with set_metadata_schema or set_database_schema.
         metadata_schema_collection = read_metadata_schema.collection('_id')
         if metadata_schema_collection != wf_collection:
-            temp_metadata_schema = copy.deepcopy(self.metadata_schema)
-            temp_metadata_schema[object_type.__name__].swap_collection(
-                metadata_schema_collection, wf_collection, self.database_schema)
-            read_metadata_schema = temp_metadata_schema[object_type.__name__]
+            cache_key = (object_type.__name__, wf_collection)
+            if cache_key not in self._read_schema_cache:
+                temp_metadata_schema = copy.deepcopy(self.metadata_schema)
+                temp_metadata_schema[object_type.__name__].swap_collection(
+                    metadata_schema_collection, wf_collection, self.database_schema)
+                self._read_schema_cache[cache_key] = temp_metadata_schema[object_type.__name__]
+            read_metadata_schema = self._read_schema_cache[cache_key]
+        return wf_collection, object_type, read_metadata_schema
 
-        col = self[wf_collection]
-        try:
-            oid = object_id['_id']
-        except:
-            oid = object_id
-        object_doc = col.find_one({'_id': oid})
-        if not object_doc:
-            return None
+    @staticmethod
+    def _normalized_collections(read_metadata_schema, wf_collection):
+        """
+        Return the set of collections normalized attributes are read from.
+        """
+        col_set = set()
+        for k in read_metadata_schema.keys():
+            col = read_metadata_schema.collection(k)
+            if col:
+                col_set.add(col)
+        col_set.discard(wf_collection)
+        return col_set
 
-        # 1. build metadata as dict
+    def _build_data_object(self, object_doc, col_dict, object_type, read_metadata_schema, wf_collection,
+                           include_undefined=False, exclude_keys=[]):
+        """
+        Construct a mspasspy object with its Metadata loaded from a wf document and the
+        documents of the normalized collections. The sample data are not loaded.
+
+        :param object_doc: the wf document.
+        :param col_dict: a dict of the normalized documents keyed by collection name.
+        :param object_type: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
+        :param read_metadata_schema: the :class:`mspasspy.db.schema.MDSchemaDefinition` to read with.
+        :param wf_collection: the name of the wf collection.
+        :param include_undefined: `True` to also read the attributes in the collection that are not defined in the schema.
+        :param exclude_keys: the metadata attributes you want to exclude from being read.
+        :return: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
+        """
         md = Metadata()
         for k in object_doc:
             if k in exclude_keys:
@@ -197,18 +603,6 @@ class Database(pymongo.database.Database):
             elif include_undefined:
                 md[k] = object_doc[k]
 
-        # build a set of collection to read in normalized attributes
-        col_set = set()
-        for k in read_metadata_schema.keys():
-            col = read_metadata_schema.collection(k)
-            if col:
-                col_set.add(col)
-        col_set.discard(wf_collection)
-
-        col_dict = {}
-        for col in col_set:
-            col_dict[col] = self[col].find_one({'_id': object_doc[col + '_id']})
-
         for k in read_metadata_schema.keys():
             col = read_metadata_schema.collection(k)
             if col != wf_collection and k not in exclude_keys:
@@ -227,26 +621,6 @@ class Database(pymongo.database.Database):
             mspass_object.npts = object_doc['npts']
         else:
             mspass_object = Seismogram(_CoreSeismogram(md, False))
-
-        # 2.load data from different modes
-        mode = object_doc['storage_mode']
-        if mode == "file":
-            self._read_data_from_dfile(mspass_object, object_doc['dir'], object_doc['dfile'], object_doc['foff'])
-        elif mode == "gridfs":
-            self._read_data_from_gridfs(mspass_object, object_doc['gridfs_id'])
-        elif mode == "url":
-            pass  # todo for future
-        else:
-            raise TypeError("Unknown storage mode: {}".format(mode))
-
-        # 3.load history
-        if load_history:
-            history_obj_id_name = self.database_schema.default_name('history_object') + '_id'
-            if history_obj_id_name in object_doc:
-                self._load_history(mspass_object, object_doc[history_obj_id_name])
-
-        mspass_object.live = True
-        mspass_object.clear_modified()
         return mspass_object
 
     def save_data(self, mspass_object, storage_mode='gridfs', dfile=None, dir=None, include_undefined=False,
@@ -276,31 +650,7 @@ class Database(pymongo.database.Database):
         # However, in the case that a storage is almost full, exceptions can still be 
         # thrown, which could mess up the database record.
         if storage_mode == 'file':
-            if not dfile and not dir:
-                # Note the following uses the dir and dfile defined in the data object.
-                # It will ignore these two keys already in the collection in an update
-                # transaction, and the dir and dfile in the collection will be replaced.
-                if ('dir' not in mspass_object) or ('dfile' not in mspass_object):
-                    raise ValueError(
-                        'dir or dfile is not specified in data object')
-                dir = os.path.abspath(mspass_object['dir'])
-                dfile = mspass_object['dfile']
-            else:
-                dir = os.path.abspath(dir)
-            fname = os.path.join(dir, dfile)
-            if os.path.exists(fname):
-                if not os.access(fname, os.W_OK):
-                    raise PermissionError(
-                        'No write permission to the save file: {}'.format(fname))
-            else:
-                # the following loop finds the top level of existing parents to fname
-                # and check for write permission to that directory. 
-                for path_item in pathlib.PurePath(fname).parents:
-                    if os.path.exists(path_item):
-                        if not os.access(path_item, os.W_OK | os.X_OK):
-                            raise PermissionError(
-                                'No write permission to the save directory: {}'.format(dir))
-                        break
+            dir, dfile = self._resolve_dfile(mspass_object, dir, dfile)
 
         schema = self.metadata_schema
         if isinstance(mspass_object, TimeSeries):
@@ -328,6 +678,7 @@ class Database(pymongo.database.Database):
                 old_gridfs_id = None if 'gridfs_id' not in object_doc else object_doc['gridfs_id']
                 gridfs_id = self._save_data_to_gridfs(mspass_object, old_gridfs_id)
                 update_dict['gridfs_id'] = gridfs_id
+                update_dict['gridfs_format'] = _GRIDFS_RAW_FORMAT
             #TODO will support url mode later 
             #elif storage_mode == "url":
             #    pass
@@ -340,6 +691,44 @@ class Database(pymongo.database.Database):
                 sys._getframe().f_code.co_name, "Skipped saving dead object")
             self._save_elog(mspass_object)
 
+    @staticmethod
+    def _resolve_dfile(mspass_object, dir, dfile):
+        """
+        Resolve the dir and dfile a mspasspy object is saved to in "file" storage mode and
+        check for write permission before anything is written to the database.
+
+        :param mspass_object: the object to be saved.
+        :param dir: file directory or None to use the dir defined in the object.
+        :param dfile: file name or None to use the dfile defined in the object.
+        :return: a tuple of the absolute dir and the dfile.
+        """
+        if not dfile and not dir:
+            # Note the following uses the dir and dfile defined in the data object.
+            # It will ignore these two keys already in the collection in an update
+            # transaction, and the dir and dfile in the collection will be replaced.
+            if ('dir' not in mspass_object) or ('dfile' not in mspass_object):
+                raise ValueError(
+                    'dir or dfile is not specified in data object')
+            dir = os.path.abspath(mspass_object['dir'])
+            dfile = mspass_object['dfile']
+        else:
+            dir = os.path.abspath(dir)
+        fname = os.path.join(dir, dfile)
+        if os.path.exists(fname):
+            if not os.access(fname, os.W_OK):
+                raise PermissionError(
+                    'No write permission to the save file: {}'.format(fname))
+        else:
+            # the following loop finds the top level of existing parents to fname
+            # and check for write permission to that directory. 
+            for path_item in pathlib.PurePath(fname).parents:
+                if os.path.exists(path_item):
+                    if not os.access(path_item, os.W_OK | os.X_OK):
+                        raise PermissionError(
+                            'No write permission to the save directory: {}'.format(dir))
+                    break
+        return dir, dfile
+
     def update_metadata(self, mspass_object, include_undefined=False, exclude_keys=[], collection=None):
         """
         Update (or save if it's a new object) the mspasspy object, including saving the processing history, elogs
@@ -374,36 +763,7 @@ class Database(pymongo.database.Database):
                 object_doc = col.find_one({'_id': mspass_object['_id']})
 
             # 1. create the dict of metadata to be saved in wf
-            insert_dict = {}
-
-            self._sync_metadata_before_update(mspass_object)
-            copied_metadata = Metadata(mspass_object)
-
-            update_metadata_def.clear_aliases(copied_metadata)
-
-            for k in copied_metadata:
-                if not str(copied_metadata[k]).strip():
-                    copied_metadata.erase(k)
-
-            for k in copied_metadata:
-                if k in exclude_keys:
-                    continue
-                if update_metadata_def.is_defined(k):
-                    if update_metadata_def.readonly(k):
-                        continue
-                    if not isinstance(copied_metadata[k], update_metadata_def.type(k)):
-                        try:
-                            # The following convert the actual value in a dict to a required type.
-                            # This is because the return of type() is the class reference.
-                            insert_dict[k] = update_metadata_def.type(
-                                k)(copied_metadata[k])
-                        except Exception as err:
-                            raise MsPASSError('Failure attempting to convert key {} from {} to {}'.format(
-                                k, copied_metadata[k], update_metadata_def.type(k)), 'Fatal') from err
-                    else:
-                        insert_dict[k] = copied_metadata[k]
-                elif include_undefined:
-                    insert_dict[k] = copied_metadata[k]
+            insert_dict = self._build_wf_document(mspass_object, update_metadata_def, include_undefined, exclude_keys)
 
             # 2. save history
             if not mspass_object.is_empty():
@@ -419,10 +779,10 @@ class Database(pymongo.database.Database):
                 elog_id = self._save_elog(mspass_object, old_elog_id)  # elog ids will be updated in the wf col when saving metadata
                 insert_dict.update({elog_id_name: elog_id})
 
-            if '_id' not in copied_metadata:  # new_insertion
+            if new_insertion:
                 mspass_object['_id'] = col.insert_one(insert_dict).inserted_id
             else:
-                filter_ = {'_id': copied_metadata['_id']}
+                filter_ = {'_id': mspass_object['_id']}
                 col.update_one(filter_, {'$set': insert_dict})
 
             # 4. need to save the wf_id back to elog entry if this is an insert
@@ -438,6 +798,49 @@ class Database(pymongo.database.Database):
                 sys._getframe().f_code.co_name, "Skipped updating the metadata of a dead object")
             self._save_elog(mspass_object)
 
+    def _build_wf_document(self, mspass_object, update_metadata_def, include_undefined=False, exclude_keys=[]):
+        """
+        Create the dict of metadata to be saved in a wf collection for a mspasspy object.
+        Processing history, elog and storage attributes are not included.
+
+        :param mspass_object: the object to be saved.
+        :param update_metadata_def: the :class:`mspasspy.db.schema.MDSchemaDefinition` of the object type.
+        :param include_undefined: `True` to also save the metadata attributes not defined in the schema.
+        :param exclude_keys: a list of metadata attributes you want to exclude.
+        :return: the wf document as a :class:`dict`.
+        """
+        insert_dict = {}
+
+        self._sync_metadata_before_update(mspass_object)
+        copied_metadata = Metadata(mspass_object)
+
+        update_metadata_def.clear_aliases(copied_metadata)
+
+        for k in copied_metadata:
+            if not str(copied_metadata[k]).strip():
+                copied_metadata.erase(k)
+
+        for k in copied_metadata:
+            if k in exclude_keys:
+                continue
+            if update_metadata_def.is_defined(k):
+                if update_metadata_def.readonly(k):
+                    continue
+                if not isinstance(copied_metadata[k], update_metadata_def.type(k)):
+                    try:
+                        # The following convert the actual value in a dict to a required type.
+                        # This is because the return of type() is the class reference.
+                        insert_dict[k] = update_metadata_def.type(
+                            k)(copied_metadata[k])
+                    except Exception as err:
+                        raise MsPASSError('Failure attempting to convert key {} from {} to {}'.format(
+                            k, copied_metadata[k], update_metadata_def.type(k)), 'Fatal') from err
+                else:
+                    insert_dict[k] = copied_metadata[k]
+            elif include_undefined:
+                insert_dict[k] = copied_metadata[k]
+        return insert_dict
+
     def read_ensemble_data(self, objectid_list, load_history=True, include_undefined=False, exclude_keys=[], collection='wf'):
         """
         Reads and returns the mspasspy ensemble object stored in the database.
@@ -450,25 +853,87 @@ class Database(pymongo.database.Database):
         :param collection: the collection name in the database that the object is stored. If not specified, use the default wf collection in the schema.
         :return: either :class:`mspasspy.ccore.seismic.TimeSeriesEnsemble` or
             :class:`mspasspy.ccore.seismic.SeismogramEnsemble`.
-        """
-        wf_collection = self.database_schema.default_name(collection)
-        object_type = self.database_schema[wf_collection].data_type()
 
-        if object_type not in [TimeSeries, Seismogram]:
-            raise MsPASSError('only TimeSeries and Seismogram are supported, but {} is requested. Please check the data_type of {} collection.'.format(
-                object_type, wf_collection), 'Fatal')
+        The members are read in batch. All wf documents are fetched with one query, each
+        normalized collection (e.g. site, channel, source) is resolved with one query over
+        the distinct ids, and the gridfs payloads and history are loaded in bulk. Members
+        are returned in the order of `objectid_list` and ids not found in the collection
+        are skipped.
+        """
+        wf_collection, object_type, read_metadata_schema = self._resolve_read_schema(collection)
 
         if object_type is TimeSeries:
             ensemble = TimeSeriesEnsemble(len(objectid_list))
         else:
             ensemble = SeismogramEnsemble(len(objectid_list))
 
-        for i in objectid_list:
-            ensemble.member.append(self.read_data(
-                i, load_history, include_undefined, exclude_keys, wf_collection))
-
+        for mspass_object in self._read_data_list(objectid_list, load_history, include_undefined, exclude_keys,
+                                                  wf_collection):
+            ensemble.member.append(mspass_object)
         return ensemble
 
+    def _read_data_list(self, objectid_list, load_history=True, include_undefined=False, exclude_keys=[], collection='wf'):
+        """
+        Batched reader behind :meth:`read_ensemble_data`. Returns a :class:`list` of the objects in the
+        order of `objectid_list` with ids not found in the collection skipped. Arguments are the same as
+        :meth:`read_ensemble_data`.
+        """
+        wf_collection, object_type, read_metadata_schema = self._resolve_read_schema(collection)
+
+        result = []
+        oid_list = []
+        for object_id in objectid_list:
+            try:
+                oid_list.append(object_id['_id'])
+            except:
+                oid_list.append(object_id)
+
+        # 1. fetch all the wf documents with one query
+        doc_dict = {}
+        for doc in self[wf_collection].find({'_id': {'$in': oid_list}}):
+            doc_dict[doc['_id']] = doc
+        object_docs = [doc_dict[oid] for oid in oid_list if oid in doc_dict]
+
+        # 2. fetch the normalized documents with one query per collection
+        normalized_docs = {}
+        for col in self._normalized_collections(read_metadata_schema, wf_collection):
+            ids = list({doc[col + '_id'] for doc in object_docs})
+            normalized_docs[col] = {x['_id']: x for x in self[col].find({'_id': {'$in': ids}})}
+
+        # 3. bulk load the gridfs payloads and history
+        gridfs_ids = [doc['gridfs_id'] for doc in object_docs if doc['storage_mode'] == 'gridfs']
+        gridfs_data = self._bulk_read_gridfs(gridfs_ids) if gridfs_ids else {}
+        history_obj_id_name = self.database_schema.default_name('history_object') + '_id'
+        history_docs = {}
+        if load_history:
+            history_ids = [doc[history_obj_id_name] for doc in object_docs if history_obj_id_name in doc]
+            if history_ids:
+                history_col = self[self.database_schema.default_name('history_object')]
+                history_docs = {x['_id']: x for x in history_col.find({'_id': {'$in': history_ids}})}
+
+        for object_doc in object_docs:
+            col_dict = {col: normalized_docs[col].get(object_doc[col + '_id']) for col in normalized_docs}
+            mspass_object = self._build_data_object(object_doc, col_dict, object_type, read_metadata_schema,
+                                                    wf_collection, include_undefined, exclude_keys)
+            mode = object_doc['storage_mode']
+            if mode == "file":
+                self._read_data_from_dfile(mspass_object, object_doc['dir'], object_doc['dfile'], object_doc['foff'])
+            elif mode == "gridfs":
+                self._load_sample_array(mspass_object, gridfs_data[object_doc['gridfs_id']])
+            elif mode == "url":
+                pass  # todo for future
+            else:
+                raise TypeError("Unknown storage mode: {}".format(mode))
+
+            if load_history and history_obj_id_name in object_doc:
+                mspass_object.load_history(pickle.loads(history_docs[object_doc[history_obj_id_name]]['nodesdata']))
+
+            mspass_object.live = True
+            mspass_object.clear_modified()
+            result.append(mspass_object)
+
+        return result
+
     def save_ensemble_data(self, ensemble_object, storage_mode='gridfs', dfile_list=None, dir_list=None,
                            include_undefined=False, exclude_keys=[], exclude_objects=[], collection=None):
         """
@@ -489,6 +954,12 @@ class Database(pymongo.database.Database):
         :param exclude_objects: A list of indexes, where each specifies a object in the ensemble you want to exclude from being saved. Starting from 0.
         :type exclude_objects: :class:`list`
         :param collection: the collection name you want to use. If not specified, use the defined collection in the metadata schema.
+
+        The members are saved in bulk. In "file" storage mode each distinct file is opened
+        once and the samples of all its members are appended with their own `foff`. In
+        "gridfs" mode all payloads are inserted with one batch. The wf, history_object and
+        elog documents are then committed with `insert_many`/`bulk_write` instead of one
+        round trip per member.
         """
         if not dfile_list:
             dfile_list = [None for _ in range(len(ensemble_object.member))]
@@ -496,17 +967,222 @@ class Database(pymongo.database.Database):
             dir_list = [None for _ in range(len(ensemble_object.member))]
 
         if storage_mode in ["file", "gridfs"]:
-            j = 0
-            for i in range(len(ensemble_object.member)):
-                if i not in exclude_objects:
-                    self.save_data(ensemble_object.member[i], storage_mode, dfile_list[j],
-                                   dir_list[j], include_undefined, exclude_keys, collection)
-                    j += 1
+            members = [ensemble_object.member[i] for i in range(len(ensemble_object.member))
+                       if i not in exclude_objects]
+            self._bulk_save_data(members, storage_mode, dfile_list[:len(members)], dir_list[:len(members)],
+                                 include_undefined, exclude_keys, collection)
         elif storage_mode == "url":
             pass
         else:
             raise TypeError("Unknown storage mode: {}".format(storage_mode))
 
+    def _bulk_save_data(self, mspass_objects, storage_mode='gridfs', dfile_list=None, dir_list=None,
+                        include_undefined=False, exclude_keys=[], collection=None):
+        """
+        Save a list of mspasspy objects of the same type with bulk database operations.
+        This is the implementation behind :meth:`save_ensemble_data` and produces the same
+        documents as calling :meth:`save_data` on each object.
+
+        :param mspass_objects: a :class:`list` of either :class:`mspasspy.ccore.seismic.TimeSeries` or
+            :class:`mspasspy.ccore.seismic.Seismogram`.
+        :param storage_mode: "gridfs" or "file".
+        :type storage_mode: :class:`str`
+        :param dfile_list: A :class:`list` of file names if using "file" storage mode.
+        :param dir_list: A :class:`list` of file directories if using "file" storage mode.
+        :param include_undefined: `True` to also save the metadata attributes not defined in the schema.
+        :param exclude_keys: the metadata attributes you want to exclude from being stored.
+        :type exclude_keys: a :class:`list` of :class:`str`
+        :param collection: the collection name you want to use. If not specified, use the defined collection in the metadata schema.
+        :exception: :class:`pymongo.errors.BulkWriteError` if some of the wf documents could not be written.
+            The wf documents are written unordered, so the others are saved and their objects get an `_id`.
+        """
+        if storage_mode not in ['file', 'gridfs']:
+            raise TypeError("Unknown storage mode: {}".format(storage_mode))
+        if not dfile_list:
+            dfile_list = [None for _ in range(len(mspass_objects))]
+        if not dir_list:
+            dir_list = [None for _ in range(len(mspass_objects))]
+
+        live_objects = []
+        for mspass_object, dfile, dir in zip(mspass_objects, dfile_list, dir_list):
+            if not isinstance(mspass_object, (TimeSeries, Seismogram)):
+                raise TypeError("only TimeSeries and Seismogram are supported")
+            if not mspass_object.live:
+                # dead objects only leave an elog entry - rare enough to handle one by one
+                self.save_data(mspass_object, storage_mode, dfile, dir, include_undefined, exclude_keys, collection)
+            else:
+                if storage_mode == 'file':
+                    dir, dfile = self._resolve_dfile(mspass_object, dir, dfile)
+                live_objects.append((mspass_object, dfile, dir))
+        if not live_objects:
+            return
+
+        if isinstance(live_objects[0][0], TimeSeries):
+            save_schema = self.metadata_schema.TimeSeries
+        else:
+            save_schema = self.metadata_schema.Seismogram
+        wf_collection = save_schema.collection('_id') if not collection else collection
+        col = self[wf_collection]
+        history_collection = self.database_schema.default_name('history_object')
+        history_obj_id_name = history_collection + '_id'
+        elog_collection = self.database_schema.default_name('elog')
+        elog_id_name = elog_collection + '_id'
+
+        existing_ids = [x[0]['_id'] for x in live_objects if '_id' in x[0]]
+        old_docs = {}
+        if existing_ids:
+            old_docs = {doc['_id']: doc for doc in col.find({'_id': {'$in': existing_ids}})}
+
+        # 1. build the wf, history and elog documents
+        wf_docs = []
+        history_docs = []
+        old_history_ids = []
+        elog_docs = []
+        old_elog_ids = []
+        for mspass_object, dfile, dir in live_objects:
+            new_insertion = '_id' not in mspass_object
+            object_doc = {} if new_insertion else old_docs.get(mspass_object['_id'], {})
+            insert_dict = self._build_wf_document(mspass_object, save_schema, include_undefined, exclude_keys)
+
+            if not mspass_object.is_empty():
+                proc_history = ProcessingHistory(mspass_object)
+                history_docs.append({'_id': proc_history.id(), 'nodesdata': pickle.dumps(proc_history)})
+                if history_obj_id_name in object_doc:
+                    old_history_ids.append(object_doc[history_obj_id_name])
+                insert_dict[history_obj_id_name] = proc_history.id()
+
+            elog_doc = self._build_elog_document(mspass_object)
+            if new_insertion:
+                # allocate the ObjectId here so the elog can link to the wf document directly
+                insert_dict['_id'] = ObjectId()
+            if elog_doc is not None:
+                elog_doc['_id'] = ObjectId()
+                if new_insertion:
+                    elog_doc[wf_collection + '_id'] = insert_dict['_id']
+                elif elog_id_name in object_doc:
+                    old_elog_ids.append(object_doc[elog_id_name])
+                elog_docs.append(elog_doc)
+                insert_dict[elog_id_name] = elog_doc['_id']
+            wf_docs.append(insert_dict)
+
+        # 2. save data
+        if storage_mode == 'file':
+            file_handles = {}
+            try:
+                for (mspass_object, dfile, dir), insert_dict in zip(live_objects, wf_docs):
+                    fname = os.path.join(dir, dfile)
+                    if fname not in file_handles:
+                        os.makedirs(os.path.dirname(fname), exist_ok=True)
+                        file_handles[fname] = open(fname, mode='a+b')
+                        file_handles[fname].seek(0, 2)
+                    fh = file_handles[fname]
+                    insert_dict['foff'] = fh.tell()
+                    self._write_samples(fh, mspass_object)
+                    insert_dict['storage_mode'] = storage_mode
+                    insert_dict['dir'] = dir
+                    insert_dict['dfile'] = dfile
+            finally:
+                for fh in file_handles.values():
+                    fh.close()
+        else:
+            old_gridfs_ids = [object_doc['gridfs_id'] for object_doc in old_docs.values() if 'gridfs_id' in object_doc]
+            if old_gridfs_ids:
+                self['fs.files'].delete_many({'_id': {'$in': old_gridfs_ids}})
+                self['fs.chunks'].delete_many({'files_id': {'$in': old_gridfs_ids}})
+            try:
+                gridfs_ids = self._bulk_save_gridfs([x[0] for x in live_objects])
+            except pymongo.errors.BulkWriteError as e:
+                raise MsPASSError("Failure saving the sample data to gridfs", "Fatal") from e
+            for insert_dict, gridfs_id in zip(wf_docs, gridfs_ids):
+                insert_dict['storage_mode'] = storage_mode
+                insert_dict['gridfs_id'] = gridfs_id
+                insert_dict['gridfs_format'] = _GRIDFS_RAW_FORMAT
+
+        # 3. commit history, elog and wf documents
+        if old_history_ids:
+            self[history_collection].delete_many({'_id': {'$in': old_history_ids}})
+        if history_docs:
+            try:
+                self[history_collection].insert_many(history_docs)
+            except pymongo.errors.BulkWriteError as e:
+                raise MsPASSError("The history object to be saved has a duplicate uuid", "Fatal") from e
+
+        if old_elog_ids:
+            # append to the previous elog entries as _save_elog does
+            old_elogs = {x['_id']: x for x in self[elog_collection].find({'_id': {'$in': old_elog_ids}})}
+            elog_dict = {x['_id']: x for x in elog_docs}
+            for (mspass_object, dfile, dir), insert_dict in zip(live_objects, wf_docs):
+                if '_id' not in mspass_object or elog_id_name not in insert_dict:
+                    continue
+                old_elog_id = old_docs.get(mspass_object['_id'], {}).get(elog_id_name)
+                if old_elog_id in old_elogs:
+                    elog_doc = elog_dict[insert_dict[elog_id_name]]
+                    old_logdata = old_elogs[old_elog_id]['logdata']
+                    [old_logdata.append(x) for x in elog_doc['logdata'] if x not in old_logdata]
+                    elog_doc['logdata'] = old_logdata
+            self[elog_collection].delete_many({'_id': {'$in': old_elog_ids}})
+        if elog_docs:
+            try:
+                self[elog_collection].insert_many(elog_docs)
+            except pymongo.errors.BulkWriteError as e:
+                raise MsPASSError("Failure saving the elog documents", "Fatal") from e
+
+        requests = []
+        failed = None
+        for (mspass_object, dfile, dir), insert_dict in zip(live_objects, wf_docs):
+            if '_id' in insert_dict:
+                requests.append(pymongo.InsertOne(insert_dict))
+            else:
+                requests.append(pymongo.UpdateOne({'_id': mspass_object['_id']}, {'$set': insert_dict}))
+        # only this write raises a BulkWriteError; the documents of the other collections
+        # are written first and their failures are raised as MsPASSError
+        try:
+            col.bulk_write(requests, ordered=False)
+            failed = set()
+        except pymongo.errors.BulkWriteError as e:
+            # the write is unordered, so every request without an error was committed
+            failed = {x['index'] for x in e.details['writeErrors']}
+            raise
+        finally:
+            if failed is not None:
+                for i, ((mspass_object, dfile, dir), insert_dict) in enumerate(zip(live_objects, wf_docs)):
+                    if '_id' in insert_dict and i not in failed:
+                        mspass_object['_id'] = insert_dict['_id']
+
+    def _bulk_save_gridfs(self, mspass_objects, chunk_size=gridfs.DEFAULT_CHUNK_SIZE):
+        """
+        Save the sample data of many mspasspy objects to gridfs with one insert_many on
+        fs.chunks and one on fs.files. The layout matches :meth:`_save_data_to_gridfs`,
+        so the files can be read back with :class:`gridfs.GridFS`.
+
+        :param mspass_objects: a :class:`list` of either :class:`mspasspy.ccore.seismic.TimeSeries` or
+            :class:`mspasspy.ccore.seismic.Seismogram`.
+        :param chunk_size: size in bytes of the gridfs chunks.
+        :return: a :class:`list` of the inserted gridfs object ids in the order of `mspass_objects`.
+        """
+        files = []
+        chunks = []
+        for mspass_object in mspass_objects:
+            if isinstance(mspass_object, Seismogram):
+                ub = np.asarray(mspass_object.data, dtype='<f8').tobytes(order='C')
+            else:
+                ub = np.asarray(mspass_object.data, dtype='<f8').tobytes()
+            file_id = ObjectId()
+            for n, pos in enumerate(range(0, len(ub), chunk_size)):
+                chunks.append({'files_id': file_id, 'n': n, 'data': ub[pos:pos + chunk_size]})
+            files.append({'_id': file_id, 'length': len(ub), 'chunkSize': chunk_size,
+                          'uploadDate': datetime.datetime.now(datetime.timezone.utc),
+                          'gridfs_format': _GRIDFS_RAW_FORMAT})
+        if chunks:
+            if not self._gridfs_index_created:
+                self['fs.chunks'].create_index([('files_id', pymongo.ASCENDING), ('n', pymongo.ASCENDING)],
+                                               unique=True)
+                self._gridfs_index_created = True
+            self['fs.chunks'].insert_many(chunks, ordered=False)
+        if files:
+            self['fs.files'].insert_many(files)
+        return [x['_id'] for x in files]
+
     def update_ensemble_metadata(self, ensemble_object, include_undefined=False, exclude_keys=[], exclude_objects=[],
                                  collection=None):
         """
@@ -646,18 +1322,13 @@ class Database(pymongo.database.Database):
         res = self[collection].find_one({'_id': history_object_id})
         mspass_object.load_history(pickle.loads(res['nodesdata']))
 
-    def _save_elog(self, mspass_object, elog_id=None, collection=None):
+    def _build_elog_document(self, mspass_object):
         """
-        Save error log for a data object. Data objects in MsPASS contain an error log object used to post any
-        errors handled by processing functions. This function will delete the old elog entry if `elog_id` is given.
+        Create the elog document of a data object.
 
         :param mspass_object: the target object.
         :type mspass_object: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
-        :param elog_id: the previous elog object id to be appended with.
-        :type elog_id: :class:`bson.objectid.ObjectId`
-        :param collection: the collection that you want to save the elogs. If not specified, use the defined
-        collection in the schema.
-        :return: updated elog_id.
+        :return: the elog document as a :class:`dict` or None if the error log is empty.
         """
         if isinstance(mspass_object, TimeSeries):
             update_metadata_def = self.metadata_schema.TimeSeries
@@ -667,9 +1338,6 @@ class Database(pymongo.database.Database):
             raise TypeError("only TimeSeries and Seismogram are supported")
         wf_id_name = update_metadata_def.collection('_id') + '_id'
 
-        if not collection:
-            collection = self.database_schema.default_name('elog')
-        
         #TODO: Need to discuss whether the _id should be linked in a dead elog entry. It 
         # might be confusing to link the dead elog to an alive wf record.
         oid = None
@@ -677,21 +1345,42 @@ class Database(pymongo.database.Database):
             oid = mspass_object['_id']
 
         elog = mspass_object.elog
-        n = elog.size()
-        if n != 0:
-            logdata = []
-            docentry = {'logdata': logdata}
-            errs = elog.get_error_log()
-            jobid = elog.get_job_id()
-            for x in errs:
-                logdata.append({'job_id': jobid, 'algorithm': x.algorithm, 'badness': str(x.badness),
-                            'error_message': x.message, 'process_id': x.p_id})
-            if oid:
-                docentry[wf_id_name] = oid
+        if elog.size() == 0:
+            return None
+        logdata = []
+        docentry = {'logdata': logdata}
+        errs = elog.get_error_log()
+        jobid = elog.get_job_id()
+        for x in errs:
+            logdata.append({'job_id': jobid, 'algorithm': x.algorithm, 'badness': str(x.badness),
+                        'error_message': x.message, 'process_id': x.p_id})
+        if oid:
+            docentry[wf_id_name] = oid
+
+        if not mspass_object.live:
+            docentry['gravestone'] = dict(mspass_object)
+        return docentry
 
-            if not mspass_object.live:
-                docentry['gravestone'] = dict(mspass_object)
+    def _save_elog(self, mspass_object, elog_id=None, collection=None):
+        """
+        Save error log for a data object. Data objects in MsPASS contain an error log object used to post any
+        errors handled by processing functions. This function will delete the old elog entry if `elog_id` is given.
+
+        :param mspass_object: the target object.
+        :type mspass_object: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
+        :param elog_id: the previous elog object id to be appended with.
+        :type elog_id: :class:`bson.objectid.ObjectId`
+        :param collection: the collection that you want to save the elogs. If not specified, use the defined
+        collection in the schema.
+        :return: updated elog_id.
+        """
+        docentry = self._build_elog_document(mspass_object)
+
+        if not collection:
+            collection = self.database_schema.default_name('elog')
 
+        if docentry is not None:
+            logdata = docentry['logdata']
             if elog_id:
                 # append elog
                 elog_doc = self[collection].find_one({'_id': elog_id})
@@ -728,21 +1417,31 @@ class Database(pymongo.database.Database):
         fname = os.path.join(dir, dfile)
         with open(fname, mode='rb') as fh:
             fh.seek(foff)
-            float_array = array('d')
             if isinstance(mspass_object, TimeSeries):
                 if not mspass_object.is_defined('npts'):
                     raise KeyError("npts is not defined")
-                float_array.frombytes(fh.read(mspass_object.get('npts') * 8))
+                npts = mspass_object.get('npts')
+                float_array = np.fromfile(fh, dtype=np.float64, count=npts)
+                if len(float_array) != npts:
+                    emess = "Size mismatch in sample data. Number of points read from file = %d but expected %d" \
+                            % (len(float_array), npts)
+                    raise ValueError(emess)
+                # DoubleVector supports the buffer protocol so this is a single block copy
                 mspass_object.data = DoubleVector(float_array)
             elif isinstance(mspass_object, Seismogram):
                 if not mspass_object.is_defined('npts'):
                     raise KeyError("npts is not defined")
-                float_array.frombytes(fh.read(mspass_object.get('npts') * 8 * 3))
-                print(len(float_array))
-                mspass_object.data = dmatrix(3, mspass_object.get('npts'))
-                for i in range(3):
-                    for j in range(mspass_object.get('npts')):
-                        mspass_object.data[i, j] = float_array[i * mspass_object.get('npts') + j]
+                npts = mspass_object.get('npts')
+                float_array = np.fromfile(fh, dtype=np.float64, count=3 * npts)
+                if len(float_array) != 3 * npts:
+                    emess = "Size mismatch in sample data. Number of points read from file = %d but expected %d" \
+                            % (len(float_array), 3 * npts)
+                    raise ValueError(emess)
+                # The file holds the three components one after another (C order) while
+                # dmatrix is stored in Fortran order. Assigning through the numpy view of
+                # the dmatrix buffer does the transpose in one vectorized copy.
+                mspass_object.data = dmatrix(3, npts)
+                np.asarray(mspass_object.data)[:] = float_array.reshape(3, npts)
             else:
                 raise TypeError("only TimeSeries and Seismogram are supported")
 
@@ -770,20 +1469,36 @@ class Database(pymongo.database.Database):
         os.makedirs(os.path.dirname(fname), exist_ok=True)
         with open(fname, mode='a+b') as fh:
             foff = fh.seek(0, 2)
-            if isinstance(mspass_object, TimeSeries):
-                ub = bytes(np.array(mspass_object.data))  # fixme DoubleVector
-            elif isinstance(mspass_object, Seismogram):
-                ub = bytes(mspass_object.data)
-            else:
-                raise TypeError("only TimeSeries and Seismogram are supported")
-            fh.write(ub)
+            Database._write_samples(fh, mspass_object)
         return foff
 
+    @staticmethod
+    def _write_samples(fh, mspass_object):
+        """
+        Write the sample data of a mspasspy object at the current position of an open binary file.
+
+        :param fh: file handle opened in binary write or append mode.
+        :param mspass_object: the target object.
+        :type mspass_object: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
+        """
+        if isinstance(mspass_object, TimeSeries):
+            # zero copy alias of the DoubleVector buffer
+            ub = np.asarray(mspass_object.data)
+        elif isinstance(mspass_object, Seismogram):
+            ub = bytes(mspass_object.data)
+        else:
+            raise TypeError("only TimeSeries and Seismogram are supported")
+        fh.write(ub)
+
     def _save_data_to_gridfs(self, mspass_object, gridfs_id=None):
         """
         Save a mspasspy object sample data to MongoDB grid file system. We recommend to use this method
         for saving a mspasspy object inside MongoDB.
 
+        The samples are written as raw little-endian float64 values (components one after
+        another for Seismogram) and split into chunks by gridfs. The fs.files entry is tagged
+        with gridfs_format so the reader knows the encoding.
+
         :param mspass_object: the target object.
         :type mspass_object: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
         :param gridfs_id: if the data is already stored and you want to update it, you should provide the object id
@@ -795,25 +1510,111 @@ class Database(pymongo.database.Database):
         if gridfs_id and gfsh.exists(gridfs_id):
             gfsh.delete(gridfs_id)
         if isinstance(mspass_object, Seismogram):
-            ub = bytes(mspass_object.data)
+            # C order of the 3xnpts view puts the components one after another
+            ub = np.asarray(mspass_object.data, dtype='<f8').tobytes(order='C')
         else:
-            ub = bytes(np.array(mspass_object.data))
-        return gfsh.put(pickle.dumps(ub))
+            ub = np.asarray(mspass_object.data, dtype='<f8').tobytes()
+        return gfsh.put(ub, gridfs_format=_GRIDFS_RAW_FORMAT)
 
-    def _read_data_from_gridfs(self, mspass_object, gridfs_id):
+    def _read_data_from_gridfs(self, mspass_object, gridfs_id, gridfs_format=None):
         """
         Read data stored in gridfs and load it into a mspasspy object.
 
+        The chunks are streamed into a preallocated numpy buffer. Data saved before the raw
+        format was introduced (no gridfs_format tag) are decoded from the legacy pickle.
+
         :param mspass_object: the target object.
         :type mspass_object: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
         :param gridfs_id: the object id of the data stored in gridfs.
         :type gridfs_id: :class:`bson.objectid.ObjectId`
+        :param gridfs_format: the gridfs_format tag from the wf document. If not given, the tag in
+            the fs.files entry is used.
+        :type gridfs_format: :class:`str`
         """
         gfsh = gridfs.GridFS(self)
         fh = gfsh.get(file_id=gridfs_id)
-        ub = pickle.load(fh)
-        fmt = "@%dd" % int(len(ub) / 8)
-        x = struct.unpack(fmt, ub)
+        if gridfs_format is None:
+            gridfs_format = getattr(fh, 'gridfs_format', None)
+        if gridfs_format is None:
+            ub = pickle.load(fh)
+            x = np.frombuffer(ub, dtype=np.float64)
+        elif gridfs_format == _GRIDFS_RAW_FORMAT:
+            x = np.empty(fh.length // 8, dtype='<f8')
+            buf = memoryview(x).cast('B')
+            pos = 0
+            try:
+                while pos < len(buf):
+                    chunk = fh.readchunk()
+                    if not chunk or pos + len(chunk) > len(buf):
+                        break
+                    buf[pos:pos + len(chunk)] = chunk
+                    pos += len(chunk)
+            except gridfs.errors.CorruptGridFile as err:
+                raise MsPASSError('Corrupted gridfs file {}: {}'.format(gridfs_id, err), 'Invalid') from err
+            if pos != len(buf):
+                raise MsPASSError('Truncated gridfs file {}: read {} of {} bytes'.format(
+                    gridfs_id, pos, len(buf)), 'Invalid')
+            x = x.astype(np.float64, copy=False)
+        else:
+            raise MsPASSError('Unknown gridfs_format: {}'.format(gridfs_format), 'Invalid')
+
+        self._load_sample_array(mspass_object, x)
+
+    def _bulk_read_gridfs(self, gridfs_ids):
+        """
+        Read the sample data of many gridfs files with one query on fs.files and one on
+        fs.chunks. Chunks are copied into a preallocated buffer for each file as they
+        stream from the cursor. A MsPASSError is raised if a file is missing or its chunks
+        do not add up to the file length.
+
+        :param gridfs_ids: a :class:`list` of :class:`bson.objectid.ObjectId` of the gridfs files.
+        :return: a :class:`dict` of 1D float64 numpy arrays keyed by the gridfs id.
+        """
+        files = {doc['_id']: doc for doc in self['fs.files'].find({'_id': {'$in': gridfs_ids}})}
+        missing = [x for x in gridfs_ids if x not in files]
+        if missing:
+            raise MsPASSError('gridfs files not found: {}'.format(missing), 'Invalid')
+        buffers = {}
+        for file_id, doc in files.items():
+            if doc.get('gridfs_format') == _GRIDFS_RAW_FORMAT:
+                buffers[file_id] = np.empty(doc['length'] // 8, dtype='<f8')
+            elif doc.get('gridfs_format') is None:
+                buffers[file_id] = bytearray(doc['length'])
+            else:
+                raise MsPASSError('Unknown gridfs_format: {}'.format(doc['gridfs_format']), 'Invalid')
+        views = {file_id: memoryview(buf).cast('B') for file_id, buf in buffers.items()}
+        nbytes = {file_id: 0 for file_id in files}
+        for chunk in self['fs.chunks'].find({'files_id': {'$in': list(files)}}):
+            file_id = chunk['files_id']
+            pos = chunk['n'] * files[file_id]['chunkSize']
+            data = chunk['data']
+            if pos + len(data) <= len(views[file_id]):
+                views[file_id][pos:pos + len(data)] = data
+            nbytes[file_id] += len(data)
+        for file_id, doc in files.items():
+            if nbytes[file_id] != doc['length']:
+                raise MsPASSError('Truncated gridfs file {}: read {} of {} bytes'.format(
+                    file_id, nbytes[file_id], doc['length']), 'Invalid')
+
+        result = {}
+        for file_id, buf in buffers.items():
+            if isinstance(buf, bytearray):
+                result[file_id] = np.frombuffer(pickle.loads(buf), dtype=np.float64)
+            else:
+                result[file_id] = buf.astype(np.float64, copy=False)
+        return result
+
+    @staticmethod
+    def _load_sample_array(mspass_object, x):
+        """
+        Load a 1D float64 numpy array of samples into a mspasspy object. Seismogram samples
+        are expected with the three components one after another.
+
+        :param mspass_object: the target object.
+        :type mspass_object: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
+        :param x: the sample data.
+        :type x: :class:`numpy.ndarray`
+        """
         if isinstance(mspass_object, TimeSeries):
             mspass_object.data = DoubleVector(x)
         elif isinstance(mspass_object, Seismogram):
@@ -824,9 +1625,7 @@ class Database(pymongo.database.Database):
                         % (len(x), (3 * mspass_object['npts']))
                 raise ValueError(emess)
             mspass_object.data = dmatrix(3, mspass_object['npts'])
-            for i in range(3):
-                for j in range(mspass_object['npts']):
-                    mspass_object.data[i, j] = x[i * mspass_object['npts'] + j]
+            np.asarray(mspass_object.data)[:] = x.reshape(3, mspass_object['npts'])
         else:
             raise TypeError("only TimeSeries and Seismogram are supported")
 
@@ -1262,25 +2061,16 @@ class Database(pymongo.database.Database):
         :return: MongoDB doc (dict) matching query
         :rtype:  python dict (document) of result.  None if there is no match.
         """
-        dbsite = self.site
-        query = {}
-        query['net'] = net
-        query['sta'] = sta
-        if (loc != 'NONE'):
-            query['loc'] = loc
-        if (time > 0.0):
-            query['starttime'] = {"$lt": time}
-            query['endtime'] = {"$gt": time}
-        matchsize = dbsite.count_documents(query)
+        if loc == 'NONE':
+            loc = ANY_LOC
+        matchsize, stadoc = self._seed_lookup('site', (net, sta), loc, time)
         if (matchsize == 0):
             return None
         else:
-            stations = dbsite.find(query)
             if (matchsize > 1):
-                print("get_seed_site (WARNING):  query=", query)
+                print("get_seed_site (WARNING):  query for net=", net, " sta=", sta, " time=", time)
                 print("Returned ", matchsize, " documents - should be exactly one")
                 print("Returning first entry found")
-            stadoc=dbsite.find_one(query)
             return stadoc
 
     def get_seed_channel(self, net, sta, chan, loc=None, time=-1.0):
@@ -1323,22 +2113,12 @@ class Database(pymongo.database.Database):
         :return: handle to query return
         :rtype:  MondoDB Cursor object of query result.
         """
-        dbchannel = self.channel
-        query = {}
-        query['net'] = net
-        query['sta'] = sta
-        query['chan'] = chan
-        if loc != None:
-            query['loc'] = loc
-        
-        if (time > 0.0):
-            query['starttime'] = {"$lt": time}
-            query['endtime'] = {"$gt": time}
-        matchsize = dbchannel.count_documents(query)
+        codes = (net, sta, chan)
+        matchsize, doc = self._seed_lookup('channel', codes, ANY_LOC if loc == None else loc, time)
         if (matchsize == 0):
             return None
         if matchsize==1:
-            return dbchannel.find_one(query)
+            return doc
         else:
             # Note we only land here when the above yields multiple matches
             if loc == None:
@@ -1348,18 +2128,16 @@ class Database(pymongo.database.Database):
                 # We also have to worry about the case where the 
                 # time was not specified but needed. 
                 # The complexity below tries to unravel all those possibities
-                testquery=query
-                testquery['loc']=None
-                matchsize=dbchannel.count_documents(testquery)
+                matchsize, doc = self._seed_lookup('channel', codes, None, time)
                 if matchsize == 1:
-                    return dbchannel.find_one(testquery)
+                    return doc
                 elif matchsize > 1:
                     if time>0.0:
                         print("get_seed_channel:  multiple matches found for net=",
                           net," sta=",sta," and channel=",chan, " with null loc code\n"
                              "Assuming database problem with duplicate documents in channel collection\n",
                             "Returning first one found")
-                        return dbchannel.find_one(testquery)
+                        return doc
                     else:
                         raise MsPASSError("get_seed_channel:  "
                             + "query with "+net+":"+sta+":"+chan+" and null loc is ambiguous\n"
@@ -1369,23 +2147,88 @@ class Database(pymongo.database.Database):
                     # we land here if a null match didn't work.  
                     #Try one more recovery with setting loc to an emtpy 
                     # string
-                    testquery['loc']=""  
-                    matchsize=dbchannel.count_documents(testquery)
+                    matchsize, doc = self._seed_lookup('channel', codes, "", time)
                     if matchsize == 1:
-                        return dbchannel.find_one(testquery)
+                        return doc
                     elif matchsize > 1:
                         if time>0.0:
                             print("get_seed_channel:  multiple matches found for net=",
                                net," sta=",sta," and channel=",chan, " with null loc code tested with empty string\n"
                                "Assuming database problem with duplicate documents in channel collection\n",
                                "Returning first one found")
-                            return dbchannel.find_one(testquery)
+                            return doc
                         else:
                             raise MsPASSError("get_seed_channel:  "
                               + "recovery query attempt with "+net+":"+sta+":"+chan+" and null loc converted to empty string is ambiguous\n"
                               + "Specify at least time but a loc code if is not truly null",
                               "Fatal")
 
+    def enable_seed_cache(self, max_documents=1000000,
+                          exclude_keys=['serialized_inventory', 'serialized_channel_data']):
+        """
+        Load the site and channel collections into in memory indexes used by
+        :meth:`get_seed_site` and :meth:`get_seed_channel` instead of querying
+        MongoDB on every call.  The cache is a snapshot of the collections.
+        Call :meth:`refresh_seed_cache` after they change and
+        :meth:`disable_seed_cache` to release the memory.
+
+        :param max_documents: a collection with more documents than this is not
+          cached and is queried as before.
+        :type max_documents: :class:`int`
+        :param exclude_keys: attributes left out of the cached documents to limit
+          memory use.  The documents returned while the cache is enabled do not
+          have these attributes.
+        :type exclude_keys: a :class:`list` of :class:`str`
+        :return: a :class:`dict` with the collection names as keys and `True` for each
+          collection that was loaded.
+        """
+        self._seed_cache = {
+            'site': SeedIntervalCache(self.site, ['net', 'sta'], max_documents, exclude_keys),
+            'channel': SeedIntervalCache(self.channel, ['net', 'sta', 'chan'], max_documents, exclude_keys),
+        }
+        return self.refresh_seed_cache()
+
+    def refresh_seed_cache(self):
+        """
+        Reload the site and channel caches created by :meth:`enable_seed_cache`.
+
+        :return: a :class:`dict` with the collection names as keys and `True` for each
+          collection that was loaded.
+        """
+        return {name: cache.refresh() for name, cache in self._seed_cache.items()}
+
+    def disable_seed_cache(self):
+        """
+        Release the site and channel caches.  Lookups go back to MongoDB.
+        """
+        self._seed_cache = {}
+
+    def _seed_lookup(self, collection, codes, loc=ANY_LOC, time=-1.0):
+        """
+        Find the documents of site or channel matching the seed codes, loc and
+        time.  Uses the cache when it is loaded and MongoDB otherwise.
+
+        :param collection: "site" or "channel".
+        :param codes: tuple of (net, sta) for site or (net, sta, chan) for channel.
+        :param loc: loc code to match, None for a null loc, or ANY_LOC to ignore loc.
+        :param time: epoch time that must be inside (starttime, endtime).  Ignored if not positive.
+        :return: a tuple of the number of matches and the first match (None if no match).
+        """
+        cache = self._seed_cache.get(collection)
+        if cache is not None and cache.loaded:
+            docs = cache.find(codes, loc, time)
+            return len(docs), (docs[0] if docs else None)
+        query = dict(zip(['net', 'sta', 'chan'], codes))
+        if loc is not ANY_LOC:
+            query['loc'] = loc
+        if (time > 0.0):
+            query['starttime'] = {"$lt": time}
+            query['endtime'] = {"$gt": time}
+        matchsize = self[collection].count_documents(query)
+        if matchsize == 0:
+            return 0, None
+        return matchsize, self[collection].find_one(query)
+
     def get_response(self, net=None, sta=None, chan=None, loc=None, time=None):
         """
         Returns an obspy Response object for seed channel defined by 
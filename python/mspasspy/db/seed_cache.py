@@ -0,0 +1,115 @@
+"""
+In memory index of the seed site and channel collections.
+"""
+import bisect
+
+# sentinel for a lookup that ignores the loc code
+ANY_LOC = object()
+
+
+class SeedIntervalCache:
+    """
+    In memory copy of a site or channel collection indexed for the
+    net:sta:chan:loc plus time interval lookups done by
+    :meth:`mspasspy.db.database.Database.get_seed_site` and
+    :meth:`mspasspy.db.database.Database.get_seed_channel`.
+
+    Documents are stored in a dict keyed by the tuple of seed codes
+    (including loc) where each entry is a list sorted by starttime.  A time
+    lookup uses bisect on the starttimes so only documents starting before
+    the requested time are tested.  A second dict maps the codes without loc
+    to the full keys to handle lookups that ignore loc.
+
+    The cache is a snapshot.  Call :meth:`refresh` after the collection is
+    changed.  Collections with more than max_documents documents are not
+    loaded (:attr:`loaded` stays False) and the caller is expected to query
+    MongoDB instead.
+    """
+    def __init__(self, collection, keys, max_documents=1000000, exclude_keys=[]):
+        """
+        :param collection: the :class:`pymongo.collection.Collection` to cache.
+        :param keys: the names of the seed codes used as the index without loc,
+          e.g. ['net','sta'] for site and ['net','sta','chan'] for channel.
+        :param max_documents: the cache is not loaded if the collection has more documents than this.
+        :type max_documents: :class:`int`
+        :param exclude_keys: attributes not loaded in the cached documents.  Used to leave
+          out large attributes like serialized obspy objects.
+        :type exclude_keys: a :class:`list` of :class:`str`
+        """
+        self.collection = collection
+        self.keys = list(keys)
+        self.max_documents = max_documents
+        self.exclude_keys = list(exclude_keys)
+        self.loaded = False
+        self._index = {}
+        self._loc_index = {}
+
+    def refresh(self):
+        """
+        (Re)load the collection into memory.
+
+        :return: `True` if the collection was loaded, `False` if it is larger than max_documents.
+        """
+        self.clear()
+        if self.collection.estimated_document_count() > self.max_documents:
+            return False
+        projection = {k: False for k in self.exclude_keys} if self.exclude_keys else None
+        index = {}
+        ndocs = 0
+        for doc in self.collection.find({}, projection):
+            ndocs += 1
+            if ndocs > self.max_documents:
+                return False
+            key = tuple(doc.get(k) for k in self.keys) + (doc.get('loc'),)
+            index.setdefault(key, []).append(doc)
+        for key, docs in index.items():
+            docs.sort(key=lambda doc: doc.get('starttime', float('-inf')))
+            self._index[key] = ([doc.get('starttime', float('-inf')) for doc in docs], docs)
+            self._loc_index.setdefault(key[:-1], []).append(key)
+        self.loaded = True
+        return True
+
+    def clear(self):
+        """
+        Release the cached documents.
+        """
+        self._index = {}
+        self._loc_index = {}
+        self.loaded = False
+
+    def __len__(self):
+        return sum(len(x[1]) for x in self._index.values())
+
+    def find(self, codes, loc=ANY_LOC, time=-1.0):
+        """
+        Return the cached documents matching the seed codes, loc and time with
+        the same rules as the MongoDB queries they replace.  loc=None matches
+        documents with a null or undefined loc.
+
+        :param codes: tuple of the values of the keys given to the constructor.
+        :param loc: loc code to match.  ANY_LOC (default) ignores loc.
+        :param time: epoch time that must be inside (starttime, endtime).  Ignored if not positive.
+        :return: :class:`list` of shallow copies of the documents sorted by starttime.
+          As with a fresh query the caller can modify them without changing the cache.
+        """
+        codes = tuple(codes)
+        if loc is ANY_LOC:
+            full_keys = self._loc_index.get(codes, [])
+        else:
+            full_keys = [codes + (loc,)]
+        result = []
+        for key in full_keys:
+            entry = self._index.get(key)
+            if entry is None:
+                continue
+            starttimes, docs = entry
+            if time > 0.0:
+                # only documents with starttime < time can match
+                n = bisect.bisect_left(starttimes, time)
+                result.extend(dict(doc) for doc in docs[:n]
+                              if 'starttime' in doc and doc.get('endtime', float('-inf')) > time)
+            else:
+                result.extend(dict(doc) for doc in docs)
+        if len(full_keys) > 1:
+            result.sort(key=lambda doc: doc.get('starttime', float('-inf')))
+        return result
@@ -4,9 +4,67 @@ from matplotlib import pyplot
 from mspasspy.ccore.seismic import Seismogram, TimeSeries, TimeSeriesEnsemble, SeismogramEnsemble
 from mspasspy.ccore.algorithms.basic import ExtractComponent,EnsembleComponent
 from mspasspy.algorithms.window import scale as alg_scale
+from mspasspy.util.converter import TimeSeriesEnsemble2ndarray
+
+def minmax_envelope(y, ncols):
+    """
+    Level of detail reduction of a trace for display.  The samples
+    of y are split into ncols contiguous bins (normally one per pixel
+    column of the plot) and each bin is replaced by its minimum and maximum.
+    Plotting the result as a line draws a vertical segment per column
+    spanning the full amplitude range of the bin, which is what the full
+    resolution line looks like at that screen resolution.  Traces with no
+    more than 2*ncols samples are returned unaltered.  NaN samples are
+    ignored unless every sample of a bin is a NaN.
+
+    :param y:  1D numpy array of samples.
+    :param ncols:  number of output bins.
+    :return: tuple of (index,envelope) where index is the sample number
+      (center of the bin) used for the time axis of each point of envelope.
+      The min and max of each bin alternate in envelope.
+    """
+    npts=len(y)
+    if(ncols is None or ncols<1 or npts<=2*ncols):
+        return numpy.arange(npts),y
+    ncols=int(ncols)
+    edges=numpy.linspace(0,npts,ncols+1).astype(int)
+    envelope=numpy.empty(2*ncols)
+    envelope[0::2]=numpy.fmin.reduceat(y,edges[:-1])
+    envelope[1::2]=numpy.fmax.reduceat(y,edges[:-1])
+    index=numpy.repeat((edges[:-1]+edges[1:]-1)//2,2)
+    return index,envelope
+def _positive_envelope(index, envelope, npts, base=0.0):
+    """
+    Returns the curve used to shade the positive lobes of a trace reduced
+    by minmax_envelope.  Shading the alternating min/max points directly
+    fills the triangles between them, not the area between the trace and
+    base.  The bin maximum clipped at base is the edge of the shading of
+    the full resolution trace at that pixel column.
+
+    :param index:  index returned by minmax_envelope.
+    :param envelope:  envelope returned by minmax_envelope.
+    :param npts:  number of samples in the trace passed to minmax_envelope.
+    :param base:  value of the zero line of the trace.
+    :return: tuple of (index,fill) with the sample number and shading edge
+      of each bin or None if the trace was returned unaltered.
+    """
+    if(len(envelope)>=npts):
+        return None
+    return index[1::2],numpy.maximum(envelope[1::2],base)
+def _axes_pixels(vertical=False):
+    """
+    Returns the size in pixels of the current matplotlib axes along the
+    horizontal (default) or vertical direction.  Used to size the
+    minmax_envelope reduction.
+    """
+    bbox=pyplot.gca().get_window_extent()
+    if(vertical):
+        return max(int(bbox.height),1)
+    else:
+        return max(int(bbox.width),1)
 
 def wtva_raw(section, t0, dt, ranges=None, scale=1., color='k',
-                   normalize=False):
+                   normalize=False, lod=False):
     """
     Plot a numpy 2D array (matrix) in a wiggle trace, variable area
     format as used in paper seismic section displays.   This is the low
@@ -48,10 +106,13 @@ def wtva_raw(section, t0, dt, ranges=None, scale=1., color='k',
     * normalize :
         True to normalizes all trace in the section using global max/min
         data will be in the range (-0.5, 0.5) zero centered
+    * lod :
+        True to reduce each trace to the min/max envelope of each
+        pixel row with minmax_envelope before drawing (added for mspass)
 
     .. warning::
         Slow for more than 200 traces, in this case decimate your
-        data or use ``image_raw``.
+        data, use lod=True, or use ``image_raw``.
 
     """
     npts, ntraces = section.shape  # time/traces
@@ -75,12 +136,23 @@ def wtva_raw(section, t0, dt, ranges=None, scale=1., color='k',
     # horizontal increment
     dx = (x1 - x0)/ntraces
     pyplot.xlim(x0-dx/2.0, x1+dx/2.0)
+    nrows = _axes_pixels(vertical=True) if lod else None
     for i, trace in enumerate(section.transpose()):
         tr = (((trace - gmin)/amp) - toffset)*scale*dx
         x = x0 + i*dx  # x position for this trace
-        pyplot.plot(x + tr, t, 'k')
+        tt = t
+        fill = None
+        if lod:
+            index, tr = minmax_envelope(tr, nrows)
+            tt = t[index]
+            fill = _positive_envelope(index, tr, npts)
+        pyplot.plot(x + tr, tt, 'k')
         if(color!=None):
-            pyplot.fill_betweenx(t, x + tr, x, tr > 0, color=color)
+            if fill is None:
+                pyplot.fill_betweenx(tt, x + tr, x, tr > 0, color=color)
+            else:
+                pyplot.fill_betweenx(t[fill[0]], x + fill[1], x, fill[1] > 0,
+                                     color=color)
 
 
 def image_raw(section, t0, dt, ranges=None, cmap=pyplot.cm.gray,
@@ -149,69 +221,27 @@ def image_raw(section, t0, dt, ranges=None, cmap=pyplot.cm.gray,
                   extent=extent, vmin=vmin, vmax=vmax)
 
 def tse2nparray(ens):
-    nseis=len(ens.member)
-    tmax=0.0
-    tmin=0.0
-    dt=0.0
-    for i in range(nseis):
-        if(i==0):
-            tmin=ens.member[i].t0
-            tmax=ens.member[i].endtime()
-            dt=ens.member[i].dt
-        else:
-            tmin=min(tmin,ens.member[i].t0)
-            tmax=max(tmax,ens.member[i].endtime())
-            # check for irregular sample rates.  Test uses a fractional
-            # tolerance that is a frozen constant here
-            delta_dt=abs(dt-ens.member[i].dt)
-            if( delta_dt/dt > 0.01):
-                raise RuntimeError("tse2dmatrix:  Irregular sample rates - cannot convert")
-    #A naive user might pass an ensemble of data with absolute times
-    #spanning years.  The calculation here uses a threshold on size
-    # as a sanity check to avoid absurd malloc requests
-    n=nseis
-    m=int((tmax-tmin)/dt + 1)
-    Mmax=10000000   # size limit hard wired
-    if(m>Mmax):
-        raise RuntimeError("tse2dmatix:  irrational computed time range - you are probably incorrectly using data with large range of absolute times")
-    work=numpy.zeros(shape=[m,n])
-    # The algorithm used here is horribly inefficient if there are large
-    # differences in start and end times but this approach is safer
-    for j in range(n):
-        tjstart=ens.member[j].t0
-        tjend=ens.member[j].endtime()
-        for i in range(m):
-            t=tmin+i*dt
-            if( (t >= tjstart) and (t <= tjend) ):
-                k=ens.member[j].sample_number(t)
-                work[i,j]=ens.member[j].data[k]
-    return [tmin,dt,work]
+    return TimeSeriesEnsemble2ndarray(ens)
 def seis2nparray(d):
     tmin=d.t0
     dt=d.dt
-    m=d.npts
-    n=3
-    work=numpy.zeros(shape=[m,n])
-    # this is a very slow way to do a matrix transpose of u dmatrix
-    for k in range(n):
-        for j in range(m):
-            work[j,k]=d.data[k,j]
+    # the dmatrix buffer is 3 x npts - the plot functions want npts x 3
+    work=numpy.array(d.data).T
     return [tmin,dt,work]
 def ts2nparray(d):
     tmin=d.t0
     dt=d.dt
     m=d.npts
-    # There is likely a faster way to do this, but for now we want to
     # be sure this looks like a 2d array as input to the plot function
-    work=numpy.zeros(shape=[m,1])
-    for j in range(m):
-        work[j,0]=d.data[j]
+    work=numpy.array(d.data).reshape(m,1)
     return [tmin,dt,work]
 
 def wtvaplot(d,ranges=None,scale=1.0,fill_color='k',normalize=False,
-             cmap=None,title=None):
+             cmap=None,title=None,lod=False):
     """
     Wiggle trace variable area plotter for mspass ensemble objects.
+    Set lod True to draw min/max envelopes per pixel row instead of
+    every sample (see wtva_raw).
     """
     # We have to handle 3C ensembles specially to make 3 separate
     # windows.   this logic is potentially confusing.  the else
@@ -230,7 +260,7 @@ def wtvaplot(d,ranges=None,scale=1.0,fill_color='k',normalize=False,
                 title3c='%s:%d' % (title,i)
             try:
                 [t0,dt,section]=tse2nparray(dcomp)
-                wtva_raw(section,t0,dt,ranges,scale,fill_color,normalize)
+                wtva_raw(section,t0,dt,ranges,scale,fill_color,normalize,lod)
                 if(cmap!=None):
                     image_raw(section,t0,dt,ranges,cmap)
                 if(title3c!=None):
@@ -254,7 +284,7 @@ def wtvaplot(d,ranges=None,scale=1.0,fill_color='k',normalize=False,
             t0=plotdata[0]
             dt=plotdata[1]
             section=plotdata[2]
-            wtva_raw(section,t0,dt,ranges,scale,fill_color,normalize)
+            wtva_raw(section,t0,dt,ranges,scale,fill_color,normalize,lod)
             if(cmap!=None):
                 image_raw(section,t0,dt,ranges,cmap)
             if(title!=None):
@@ -383,6 +413,7 @@ class SectionPlotter:
         self._fill_color='k'  #black in matplotlib
         self._color_background=True
         self._color_map='seismic'
+        self._lod=False
         # these are options to raw codes adapted from  fatiando a terra
         # that are currently ignored.   Convert to args for __init__ if
         # it proves useful to have them in the api
@@ -392,7 +423,7 @@ class SectionPlotter:
         self._vmax=None
         # use change_style to simply default style
         self.change_style('wtvaimg')
-    def change_style(self,newstyle,fill_color='k',color_map='seismic'):
+    def change_style(self,newstyle,fill_color='k',color_map='seismic',lod=False):
         """
         Use this method to change the plot style.   Options are described
         below.   Some parameter combinations are illegal and will result in
@@ -421,6 +452,12 @@ class SectionPlotter:
             black line (that feature is currently frozen).   color_map and
             fill_color are ignored for this style so no exceptions should
             occur when the method is called with this value of newstyle.
+        :param lod:  level of detail switch for the wiggle trace styles
+          (wtva, wtvaimg, and wt).  When True each trace is reduced to
+          the min/max envelope of each pixel column (row for SectionPlotter)
+          of the plot before drawing.  The result is visually the same as
+          drawing every sample but much faster for large ensembles of long
+          traces.  Ignored by img.
         """
         if(newstyle=='wtva'):
             if(fill_color==None):
@@ -457,6 +494,7 @@ class SectionPlotter:
             self._use_variable_area=False
         else:
             raise RuntimeError('SectionPlotter.change_style:  unknown style type='+newstyle)
+        self._lod=lod
     def plot(self,d):
         """
         Call this method to plot any data using the current style setup and any
@@ -475,7 +513,7 @@ class SectionPlotter:
         # these are all handled by the same function with argument combinations defined by
         # change_style determining the behavior.
         if(self._style=='wtva' or self._style=='wtvaimg' or self._style=='wt'):
-            handle=wtvaplot(d,self._ranges,self.scale,self._fill_color,self.normalize,self._color_map,self.title)
+            handle=wtvaplot(d,self._ranges,self.scale,self._fill_color,self.normalize,self._color_map,self.title,self._lod)
             return handle
         elif(self._style=='img'):
             handle=imageplot(d,self._ranges,self._color_map,self._aspect,self._vmin,self._vmax,self.title)
@@ -538,6 +576,7 @@ class SeismicPlotter:
         self._style='wtvaimg'
         self._fill_color='k'  #black in matplotlib
         self._color_map='seismic'
+        self._lod=False
         # these are options to raw codes adapted from  fatiando a terra
         # that are currently ignored.   Convert to args for __init__ if
         # it proves useful to have them in the api
@@ -552,7 +591,7 @@ class SeismicPlotter:
         self._default_single_ts_aspect=0.25
         # use change_style to simply default style
         self.change_style('wtvaimg')
-    def change_style(self,newstyle,fill_color='k',color_map='seismic'):
+    def change_style(self,newstyle,fill_color='k',color_map='seismic',lod=False):
         """
         Use this method to change the plot style.   Options are described
         below.   Some parameter combinations are illegal and will result in
@@ -581,6 +620,12 @@ class SeismicPlotter:
             black line (that feature is currently frozen).   color_map and
             fill_color are ignored for this style so no exceptions should
             occur when the method is called with this value of newstyle.
+        :param lod:  level of detail switch for the wiggle trace styles
+          (wtva, wtvaimg, and wt).  When True each trace is reduced to
+          the min/max envelope of each pixel column (row for SectionPlotter)
+          of the plot before drawing.  The result is visually the same as
+          drawing every sample but much faster for large ensembles of long
+          traces.  Ignored by img.
         """
         if(newstyle=='wtva'):
             if(fill_color==None):
@@ -609,6 +654,7 @@ class SeismicPlotter:
             self._fill_color=None
         else:
             raise RuntimeError('SectionPlotter.change_style:  unknown style type='+newstyle)
+        self._lod=lod
     # These two method should perhaps be implemented as decorators
     def topdown(self):
         """
@@ -774,13 +820,23 @@ class SeismicPlotter:
         # shading.  It assumes d is a TimeSeries.
 
         t = numpy.linspace(d.t0, d.t0+d.dt*d.npts, d.npts)
+        # Necessary because fill_between doesn't support the pybind11
+        # wrapped vector directly - need to convert to numpy array
+        y=numpy.array(d.data)
+        envfill=None
+        if(self._lod):
+            index,y=minmax_envelope(y,_axes_pixels())
+            envfill=_positive_envelope(index,y,d.npts)
+            t_full=t
+            t=t[index]
         # We don't need a gain factor here - will be needed for an image overlay through
-        pyplot.plot(t,d.data,'k')
+        pyplot.plot(t,y,'k')
         if(fill):
-            # Necessary because fill_between doesn't support the pybind11
-            # wrapped vector directly - need to convert to numpy array
-            y=numpy.array(d.data)
-            pyplot.fill_between(t,0,y,where=y>0.0, interpolate=True,color=self._fill_color)
+            if(envfill is None):
+                pyplot.fill_between(t,0,y,where=y>0.0, interpolate=True,color=self._fill_color)
+            else:
+                pyplot.fill_between(t_full[envfill[0]],0,envfill[1],where=envfill[1]>0.0,
+                                    interpolate=True,color=self._fill_color)
         return pyplot.gcf()
     def _wtva_Seismogram(self,d,fill):
         # this could be implemented by converting d to an ensemble
@@ -830,6 +886,9 @@ class SeismicPlotter:
         # unlike SectionPlotter we just compute the range as the number of
         # intervals + 1 for padding
         pyplot.ylim(-0.5,float(ndata)-0.5)
+        if(self._lod):
+            # pixel columns per unit time
+            pixel_rate=_axes_pixels()/(tmax-tmin)
         for i in range(ndata):
             # skip data marked dead - this will leave a hole in plot.  We could 
             # plot a line but this is proably better unless proven otherwise
@@ -847,10 +906,21 @@ class SeismicPlotter:
             endtime=d.member[i].endtime()
             npts=d.member[i].npts
             t=numpy.linspace(t0, endtime, npts)
+            envfill=None
+            if(self._lod):
+                index,y=minmax_envelope(y,int(pixel_rate*(endtime-t0))+1)
+                envfill=_positive_envelope(index,y,npts,offset)
+                t_full=t
+                t=t[index]
             pyplot.plot(t,y,'k')
             if(fill):
-                pyplot.fill_between(t, offset, y, where=y>offset, 
-                                    interpolate=True, color=self._fill_color)
+                if(envfill is None):
+                    pyplot.fill_between(t, offset, y, where=y>offset, 
+                                        interpolate=True, color=self._fill_color)
+                else:
+                    pyplot.fill_between(t_full[envfill[0]], offset, envfill[1],
+                                        where=envfill[1]>offset, interpolate=True,
+                                        color=self._fill_color)
         return pyplot.gcf()
 
     def _wtva_SeismogramEnsemble(self,d,fill):
@@ -1,9 +1,18 @@
 import os
+import io
+import calendar
+import fnmatch
+import glob
+import hashlib
+import struct
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from obspy import (read,
                 UTCDateTime)
 import pandas as pd
 import numpy as np
+from pymongo import UpdateOne, ASCENDING
+from pymongo.errors import BulkWriteError, OperationFailure
 from mspasspy.ccore.utility import (Metadata,
                                     MsPASSError,
                                     ErrorSeverity,
@@ -14,22 +23,208 @@ from mspasspy.ccore.seismic import TimeSeriesEnsemble
 #from mspasspy.io.converter import Trace2TimeSeries
 from mspasspy.util.converter import Trace2TimeSeries
 
+# fixed section of data header less the sequence number, quality
+# indicator and the seed codes
+_MSEED_BTIME_FORMAT='HHBBBxHHhhBBBBiHH'
+_MSEED_FIXED_HEADER_SIZE=48
+# smallest record length allowed by the seed standard.  Used as the step
+# to skip over garbage (e.g. zero padding) between records.
+_MSEED_MIN_RECORD_LENGTH=128
+
+def _parse_mseed_record_header(buf):
+    """
+    Parses the 48 byte fixed section of a miniseed data header.  Returns
+    None if buf does not look like a data header.  Otherwise returns a
+    tuple of the byte order character for struct, the seed codes tuple
+    (net,sta,chan,loc), the start time as an epoch time without the
+    blockette 1001 microsecond correction, the number of samples, the
+    sample rate, and the offset of the first blockette.
+    """
+    if len(buf)<_MSEED_FIXED_HEADER_SIZE or buf[6:7] not in (b'D',b'R',b'Q',b'M'):
+        return None
+    # byte order is not flagged in the fixed header.  The standard trick
+    # is to test if the year and day are sensible
+    for order in ('>','<'):
+        (year,day,hour,minute,sec,frac,nsamp,factor,mult,
+            activity,io,quality,nblockettes,tcorr,doff,boff)=struct.unpack_from(
+                order+_MSEED_BTIME_FORMAT,buf,20)
+        if 1900<=year<=2100 and 1<=day<=366:
+            break
+    else:
+        return None
+    if hour>23 or minute>59 or sec>60:
+        return None
+    net=buf[18:20].decode('ascii','replace').strip()
+    sta=buf[8:13].decode('ascii','replace').strip()
+    loc=buf[13:15].decode('ascii','replace').strip()
+    chan=buf[15:18].decode('ascii','replace').strip()
+    # calendar.timegm handles a day of year as a day of January
+    t=calendar.timegm((year,1,day,hour,minute,sec))+frac*1.0e-4
+    # bit 1 of the activity flags means the time correction was already applied
+    if tcorr!=0 and not (activity & 0x02):
+        t+=tcorr*1.0e-4
+    if factor>0 and mult>0:
+        samprate=float(factor*mult)
+    elif factor>0 and mult<0:
+        samprate=-factor/mult
+    elif factor<0 and mult>0:
+        samprate=-mult/factor
+    elif factor<0 and mult<0:
+        samprate=1.0/(factor*mult)
+    else:
+        samprate=0.0
+    return (order,(net,sta,chan,loc),t,nsamp,samprate,boff)
+
+def scan_mseed_headers(file):
+    """
+    Builds the index of a miniseed file by reading only the record headers.
+    No data are decoded so the memory use does not depend on the file size
+    and the time is dominated by seeking through the file.
+
+    Each record is parsed from the 48 byte fixed header and the blockettes
+    that follow it.  Blockette 1000 is required as it defines the record
+    length and blockette 1001, if present, adds the microsecond time
+    correction.  Records with zero sample rate (e.g. log channels) are
+    skipped.  Consecutive records in the file with the same
+    net:sta:chan:loc and sample rate that are contiguous in time (within
+    half a sample) are merged into one trace.  Unlike obspy's reader,
+    records of one channel interleaved with other channels start a new
+    trace.  This guarantees each trace is a contiguous block of the file
+    that can be read with a single seek and read.
+
+    :param file:  miniseed file to be scanned.
+    :return:  list of python dict with one entry for each trace.  The keys
+      are net, sta, chan, loc, starttime, endtime, sampling_rate, delta,
+      npts, foff (byte offset of the first record of the trace), and
+      nbytes (length of the trace in bytes).
+    :exception: MsPASSError is thrown if a record has no blockette 1000.
+    """
+    traces=[]
+    current=None
+    with open(file,'rb') as fh:
+        filesize=os.fstat(fh.fileno()).st_size
+        foff=0
+        while foff+_MSEED_FIXED_HEADER_SIZE<=filesize:
+            fh.seek(foff)
+            hdr=_parse_mseed_record_header(fh.read(_MSEED_FIXED_HEADER_SIZE))
+            if hdr is None:
+                foff+=_MSEED_MIN_RECORD_LENGTH
+                current=None
+                continue
+            order,codes,t,nsamp,samprate,boff=hdr
+            reclen=0
+            microsec=0
+            visited=set()
+            while boff>=_MSEED_FIXED_HEADER_SIZE and boff not in visited:
+                visited.add(boff)
+                fh.seek(foff+boff)
+                blk=fh.read(8)
+                if len(blk)<8:
+                    break
+                btype,bnext=struct.unpack_from(order+'HH',blk)
+                if btype==1000:
+                    reclen=1<<blk[6]
+                elif btype==1001:
+                    microsec=struct.unpack_from('b',blk,5)[0]
+                boff=bnext
+            if reclen<_MSEED_FIXED_HEADER_SIZE:
+                raise MsPASSError('scan_mseed_headers:  record at byte offset '
+                                  +str(foff)+' of file '+str(file)
+                                  +' has no blockette 1000 - cannot determine record length',
+                                  'Invalid')
+            t+=microsec*1.0e-6
+            if samprate>0.0 and nsamp>0:
+                dt=1.0/samprate
+                if (current is not None and current['codes']==codes
+                        and current['sampling_rate']==samprate
+                        and current['foff']+current['nbytes']==foff
+                        and abs(t-(current['starttime']+current['npts']*dt))<=0.5*dt):
+                    current['npts']+=nsamp
+                    current['nbytes']+=reclen
+                else:
+                    current={'codes':codes,
+                             'starttime':t,
+                             'sampling_rate':samprate,
+                             'npts':nsamp,
+                             'foff':foff,
+                             'nbytes':reclen}
+                    traces.append(current)
+            else:
+                current=None
+            foff+=reclen
+    result=[]
+    for tr in traces:
+        net,sta,chan,loc=tr['codes']
+        dt=1.0/tr['sampling_rate']
+        result.append({'net':net,
+                       'sta':sta,
+                       'chan':chan,
+                       'loc':loc,
+                       'starttime':tr['starttime'],
+                       'endtime':tr['starttime']+(tr['npts']-1)*dt,
+                       'sampling_rate':tr['sampling_rate'],
+                       'delta':dt,
+                       'npts':tr['npts'],
+                       'foff':tr['foff'],
+                       'nbytes':tr['nbytes']})
+    return result
+
+# bytes hashed from each of the start, middle and end of a file by file_fingerprint
+_FINGERPRINT_BLOCK_SIZE=65536
+# keys of the unique index of the raw index collection
+_RAW_INDEX_KEYS=['dir','dfile','net','sta','chan','loc','starttime']
+# selects the raw index documents.  The default collection is shared with
+# the ensemble documents of dbsave_seed_ensemble_file that have no net.
+_RAW_INDEX_FILTER={'net':{'$exists':True}}
+# selects the ensemble documents of the same collection
+_ENSEMBLE_FILTER={'net':{'$exists':False}}
+
+def file_fingerprint(file):
+    """
+    Returns the fingerprint of a file used to decide if it changed since
+    it was indexed.   The fingerprint is a python dict with the size
+    (file_size), modification time (file_mtime) and a fast checksum
+    (file_checksum) of the file.  The checksum is a blake2b hash of the
+    size and of 64 kbytes at the start, middle and end of the file.
+    It only reads 192 kbytes so it is fast for any file size.  It is not
+    a full content hash but it catches the common changes of miniseed
+    archives: appended, truncated and replaced files.
+
+    :param file:  name of the file.
+    :return:  python dict with keys file_size, file_mtime, file_checksum.
+    """
+    fstat=os.stat(file)
+    size=fstat.st_size
+    h=hashlib.blake2b(str(size).encode(),digest_size=16)
+    with open(file,'rb') as fh:
+        for foff in sorted(set([0,max(0,size//2-_FINGERPRINT_BLOCK_SIZE//2),
+                                max(0,size-_FINGERPRINT_BLOCK_SIZE)])):
+            fh.seek(foff)
+            h.update(fh.read(_FINGERPRINT_BLOCK_SIZE))
+    return {'file_size':size,
+            'file_mtime':fstat.st_mtime,
+            'file_checksum':h.hexdigest()}
+
 def obspy_mseed_file_indexer(file):
     """
-    Use obspy's miniseed reader to eat up a (potentially large) file and
-    build an index as a table (returned) of data that can be written to
-    a database.   Obspy's reader was written to accept the abomination of
-    miniseed with random packets scattered through the file (or so it seems,
-    since they have no foff concept in their reader).  Hence, what this reader
-    does is make a table entry for each net:sta:chan:loc trace object their
-    reader returns.   It does this with panda dataframes to build the
-    table.  One required argument is the file name containing the miniseed data.
+    Scan a (potentially large) miniseed file and build an index as a
+    table (returned) of data that can be written to a database.
+    The file is scanned with scan_mseed_headers so only the record headers
+    are read and no samples are decoded.  The table has one entry for each
+    block of contiguous records of a net:sta:chan:loc in the file with the
+    byte offset (foff) and size (nbytes) of that block so a reader can seek
+    to the data.  Every entry also has the fingerprint of the file
+    (file_size, file_mtime and file_checksum - see file_fingerprint) used by
+    dbsave_raw_index to skip unchanged files.  It does this with panda
+    dataframes to build the table.  One required argument is the file
+    name containing the miniseed data.
     """
     try:
         pr=Path(file)
         fullpath=pr.absolute()
         [dirself,dfileself]=os.path.split(fullpath)
-        dseis=read(file,format='mseed')
+        dseis=scan_mseed_headers(file)
+        fingerprint=file_fingerprint(file)
         net=[]
         sta=[]
         chan=[]
@@ -40,29 +235,31 @@ def obspy_mseed_file_indexer(file):
         delta=[]
         npts=[]
         calib=[]
+        foff=[]
+        nbytes=[]
         dfile=[]
         dir=[]
         mover=[]
         tref=[]
         format=[]
-        mover_self='obspy_read'
+        # the index comes from the record headers, not from obspy's reader
+        mover_self='mseed_header_scan'
         tref_self='UTC'
         format_self='miniseed'
-        # Note obspy uses a more verbose name for net:sta:chan:loc
-        # We change to mspass definition below that uses css3.0 names
         for x in dseis:
-            net.append(x.stats['network'])
-            sta.append(x.stats['station'])
-            chan.append(x.stats['channel'])
-            loc.append(x.stats['location'])
-            sutc=x.stats['starttime']
-            stime.append(sutc.timestamp)
-            eutc=x.stats['endtime']
-            etime.append(eutc.timestamp)
-            samprate.append(x.stats['sampling_rate'])
-            delta.append(x.stats['delta'])
-            npts.append(x.stats['npts'])
-            calib.append(x.stats['calib'])
+            net.append(x['net'])
+            sta.append(x['sta'])
+            chan.append(x['chan'])
+            loc.append(x['loc'])
+            stime.append(x['starttime'])
+            etime.append(x['endtime'])
+            samprate.append(x['sampling_rate'])
+            delta.append(x['delta'])
+            npts.append(x['npts'])
+            # miniseed has no calib - this is obspy's default
+            calib.append(1.0)
+            foff.append(x['foff'])
+            nbytes.append(x['nbytes'])
             dfile.append(dfileself)
             dir.append(dirself)
             tref.append(tref_self)
@@ -82,46 +279,115 @@ def obspy_mseed_file_indexer(file):
                'delta':delta,
                'npts':npts,
                'calib':calib,
+               'foff':foff,
+               'nbytes':nbytes,
                'dfile':dfile,
                'dir':dir,
                'treftype':tref,
                'format':format,
                'mover':mover
                }
+        for k in fingerprint:
+            ddict[k]=[fingerprint[k]]*len(dseis)
         return pd.DataFrame(ddict)
     except FileNotFoundError as err:
         print('mseed_file_indexer:  invalid file named received')
         print(err)
-def dbsave_raw_index(db,pdframe,collection='import_miniseed_ensemble'):
+def dbsave_raw_index(db,pdframe,collection='import_miniseed_ensemble',
+                     incremental=False):
     """
     Database save to db for a panda data frame pdframe.
-    This crude version collection name is frozen as import_miniseed_ensemble.  db is
-    assumed to be the client root for mongodb or the mspasspy Client
+    db is assumed to be the client root for mongodb or the mspasspy Client
     that is a child of MongoClient.
 
+    A unique compound index on (dir,dfile,net,sta,chan,loc,starttime) is
+    created on the collection so saving the same frame twice does not
+    duplicate documents.  Rows already in the collection are skipped.
+    The index is partial.  It only applies to documents with a net
+    attribute so the ensemble documents saved in the same collection by
+    dbsave_seed_ensemble_file are not constrained by it.
+
+    With incremental set True pdframe must contain the file fingerprint
+    columns created by obspy_mseed_file_indexer (file_size, file_mtime and
+    file_checksum).  The rows of a file whose fingerprint matches the one
+    saved in the collection are skipped without touching the database
+    documents.  The documents of a file whose fingerprint has changed are
+    deleted and replaced by the rows in pdframe.  This makes a nightly
+    rerun over a growing archive cost only the new and changed files.
+
     :param db:  MongoClient or mspass Client to save data desired
     :param pdframe:  panda data frame to be saved
     :param collection:  collection to which the data in pdframe is to be
       saved.  Default is 'import_miniseed_ensemble'
+    :param incremental:  when True skip unchanged files and replace
+      changed files as described above.  Default is False.
+    :return:  python dict with the number of documents inserted
+      ("inserted"), and the number of files skipped ("skipped_files") and
+      replaced ("replaced_files") in incremental mode.
+    :exception: MsPASSError is thrown if incremental is True and pdframe
+      does not have the fingerprint columns.
     """
     col=db[collection]
+    try:
+        col.create_index([(k,ASCENDING) for k in _RAW_INDEX_KEYS],unique=True,
+                         partialFilterExpression=_RAW_INDEX_FILTER)
+    except OperationFailure as err:
+        print('dbsave_raw_index(WARNING):  could not create the unique index on ',
+              _RAW_INDEX_KEYS,' of collection ',collection)
+        print('The collection probably already has duplicate documents.  Error message:')
+        print(err)
     # records is a keyword that makes rows of the dataframe docs for mongo
     dtmp=pdframe.to_dict('records')
-    col.insert_many(dtmp)
+    result={'inserted':0,'skipped_files':0,'replaced_files':0}
+    if incremental:
+        fpkeys=['file_size','file_mtime','file_checksum']
+        for k in fpkeys:
+            if k not in pdframe:
+                raise MsPASSError('dbsave_raw_index:  incremental mode requires column '
+                                  +k+' in the input data frame.  Use obspy_mseed_file_indexer to create it',
+                                  'Invalid')
+        files={}
+        for doc in dtmp:
+            files.setdefault((doc['dir'],doc['dfile']),[]).append(doc)
+        # fingerprints of the files already in the collection fetched with one query
+        saved={}
+        query={'dir':{'$in':list(set(k[0] for k in files))},
+               'dfile':{'$in':list(set(k[1] for k in files))}}
+        query.update(_RAW_INDEX_FILTER)
+        for doc in col.find(query,{k:1 for k in ['dir','dfile']+fpkeys}):
+            key=(doc['dir'],doc['dfile'])
+            if key in files:
+                saved.setdefault(key,set()).add(tuple(doc.get(k) for k in fpkeys))
+        dtmp=[]
+        for key,rows in files.items():
+            if key in saved:
+                if saved[key]==set(tuple(row[k] for k in fpkeys) for row in rows):
+                    result['skipped_files']+=1
+                    continue
+                col.delete_many(dict(_RAW_INDEX_FILTER,dir=key[0],dfile=key[1]))
+                result['replaced_files']+=1
+            dtmp+=rows
+    if len(dtmp)>0:
+        try:
+            result['inserted']=len(col.insert_many(dtmp,ordered=False).inserted_ids)
+        except BulkWriteError as err:
+            # duplicate key errors are rows already saved and are ignored
+            others=[e for e in err.details['writeErrors'] if e['code']!=11000]
+            if len(others)>0:
+                raise
+            result['inserted']=err.details['nInserted']
+    return result
 def dbsave_seed_ensemble_file(db,file,gather_type="event",
                 keys=None):
     """
     Indexer for SEED files that are already assembled in a
     "gather" meaning the data have some relation through one or more
     keys.   The association may be predefined by input though a
-    keys array or left null for later association.   There is a large
-    overhead in this function as it has to read the entire seed file
-    to acquire the metadata it needs.  This version uses a bigger
-    memory bloat than required because it uses obspy's seed reader
-    that always eats up the whole file and returns a list of
-    Trace object.  A less memory intensive approach would be to
-    scan the seed blockettes to assemble the metadata, but
-    that would be a future development.
+    keys array or left null for later association.   The metadata are
+    acquired with scan_mseed_headers that reads only the record headers
+    so the memory use does not depend on the size of the file.  Each
+    member document has the byte offset (foff) and size (nbytes) of the
+    block of the file holding its data.
 
     A KEY POINT about this function is that it ONLY builds an index
     for the data file it is given.  That index is loosely equivalent to
@@ -178,53 +444,194 @@ def dbsave_seed_ensemble_file(db,file,gather_type="event",
     """
 
     try:
-        his=ProcessingHistory()  # used only to create uuids
         dbh=db['import_miniseed_ensemble']
-        pr=Path(file)
-        fullpath=pr.absolute()
-        [dirself,dfileself]=os.path.split(fullpath)
-        dseis=read(file,format='mseed')
-        # This holds the ensemble metatdata
-        ensemblemd={'dir':dirself}
-        ensemblemd['dfile']=dfileself
-        ensemblemd['format']='mseed'
-        # this is a placeholder not really necessary for seed data \
-        # as seed data by definition yield TimeSeries type data although
-        # not necessarily seismic data (e.g. MT data are distributed as mseed
-        ensemblemd['member_type']='TimeSeries'
-        ensemblemd['mover']='obspy_seed_ensemble_reader'
-        members=[]   # this list will contain one dict for each dseis Trace
-        # we want to put time range of the data into enemblemd - we use these for that
-        stimes=[]
-        etimes=[]
-        for d in dseis:
-            mddict={}
-            mddict['net']=d.stats['network']
-            mddict['sta']=d.stats['station']
-            mddict['chan']=d.stats['channel']
-            mddict['loc']=d.stats['location']
-            st=d.stats['starttime']
-            et=d.stats['endtime']
-            mddict['starttime']=st.timestamp
-            mddict['endtime']=et.timestamp
-            stimes.append(st.timestamp)
-            etimes.append(et.timestamp)
-            mddict['sampling_rate']=d.stats['sampling_rate']
-            mddict['delta']=d.stats['delta']
-            mddict['npts']=d.stats['npts']
-            mddict['calib']=d.stats['calib']
-            # this key name could change
-            mddict['seed_file_id']=his.newid()
-            members.append(mddict)
-        ensemblemd['members'] = members
-        tmin=np.median(stimes)
-        tmax=np.median(etimes)
-        ensemblemd['starttime']=tmin
-        ensemblemd['endtime']=tmax
+        ensemblemd=_seed_ensemble_document(file)
         result=dbh.insert_one(ensemblemd)
         return result.inserted_id
     except:
         print('something threw an exception - this needs detailed handlers')
+
+def _seed_ensemble_document(file):
+    """
+    Builds the import_miniseed_ensemble document for one miniseed file.
+    The document includes the fingerprint of the file (see
+    file_fingerprint) used to detect changed files when indexing is rerun.  Used by dbsave_seed_ensemble_file and
+    dbsave_seed_ensemble_files.  The latter runs it in worker processes
+    so it must not touch the database.
+    """
+    his=ProcessingHistory()  # used only to create uuids
+    pr=Path(file)
+    fullpath=pr.absolute()
+    [dirself,dfileself]=os.path.split(fullpath)
+    fingerprint=file_fingerprint(fullpath)
+    dseis=scan_mseed_headers(fullpath)
+    if len(dseis)==0:
+        raise MsPASSError('No miniseed data records found in file '+str(fullpath),
+                          'Invalid')
+    # This holds the ensemble metatdata
+    ensemblemd={'dir':dirself}
+    ensemblemd['dfile']=dfileself
+    ensemblemd.update(fingerprint)
+    ensemblemd['format']='mseed'
+    # this is a placeholder not really necessary for seed data \
+    # as seed data by definition yield TimeSeries type data although
+    # not necessarily seismic data (e.g. MT data are distributed as mseed
+    ensemblemd['member_type']='TimeSeries'
+    ensemblemd['mover']='obspy_seed_ensemble_reader'
+    members=[]   # this list will contain one dict for each dseis Trace
+    # we want to put time range of the data into enemblemd - we use these for that
+    stimes=[]
+    etimes=[]
+    for d in dseis:
+        mddict=dict(d)
+        stimes.append(d['starttime'])
+        etimes.append(d['endtime'])
+        # miniseed has no calib - this is obspy's default
+        mddict['calib']=1.0
+        # this key name could change
+        mddict['seed_file_id']=his.newid()
+        members.append(mddict)
+    ensemblemd['members'] = members
+    tmin=np.median(stimes)
+    tmax=np.median(etimes)
+    ensemblemd['starttime']=tmin
+    ensemblemd['endtime']=tmax
+    return ensemblemd
+
+def _find_seed_files(path,pattern='*'):
+    """
+    Returns a sorted list of the files to be indexed by
+    dbsave_seed_ensemble_files.  If path is a directory the tree under it
+    is walked and the files with a name matching pattern are returned.
+    Otherwise path is treated as a glob pattern (** is allowed).
+    """
+    if os.path.isdir(path):
+        files=[]
+        for dirpath,dirnames,filenames in os.walk(path):
+            for f in fnmatch.filter(filenames,pattern):
+                files.append(os.path.join(dirpath,f))
+    else:
+        files=[f for f in glob.glob(path,recursive=True) if os.path.isfile(f)]
+    return sorted(os.path.abspath(f) for f in files)
+
+def _try_seed_ensemble_document(file):
+    """
+    Worker function of dbsave_seed_ensemble_files.  Returns a tuple of
+    the file name, the document (None if indexing failed) and an error
+    message (None on success).
+    """
+    try:
+        return (file,_seed_ensemble_document(file),None)
+    except Exception as err:
+        return (file,None,str(err))
+
+def dbsave_seed_ensemble_files(db,path,pattern='*',
+                collection='import_miniseed_ensemble',
+                format='process',nprocs=None,
+                batch_size=1000,verbose=False):
+    """
+    Parallel driver to run the indexing of dbsave_seed_ensemble_file over
+    many files.  One document is created per file as in
+    dbsave_seed_ensemble_file.  The files are scanned in parallel either
+    in a local process pool or with dask, and the documents are saved
+    with insert_many in batches of batch_size.
+
+    Reruns are incremental.   Each document records the fingerprint of
+    its file (size, modification time and checksum - see file_fingerprint).
+    A file already indexed in collection with the same fingerprint is
+    skipped.  If the fingerprint has changed the file is indexed again and
+    the old document is deleted once the new one is saved.  A file that
+    cannot be indexed keeps its old document.
+
+    :param db:  MongoDB database pointer - may also be a mspass Database
+      class
+    :param path:  if a directory, all files under it (recursively) with
+      names matching pattern are indexed.  Otherwise treated as a glob
+      pattern defining the files (e.g. "/data/*/*.mseed" or
+      "/data/**/*.ms").
+    :param pattern:  fnmatch pattern of file names used when path is a
+      directory.  Default is all files.
+    :param collection:  collection where the documents are saved.
+      Default is 'import_miniseed_ensemble'.
+    :param format:  "process" (default) to use a process pool on this
+      host or "dask" to use dask (the current dask scheduler is used).
+    :param nprocs:  number of worker processes with format "process".
+      Default (None) is the number of cpus.   With format "dask" this is
+      the number of partitions per batch (default is one per file).
+    :param batch_size:  number of files handled per batch.  The documents
+      of each batch are saved with one insert_many call.
+    :param verbose:  when true print a line for each batch saved.
+    :return:  dict with the number of files indexed ("indexed"), the
+      number skipped because they were unchanged ("skipped"), and a list
+      of (file,error message) tuples for files that could not be
+      indexed ("failed").
+    :exception: MsPASSError is thrown if format is not supported.
+    """
+    if format not in ('process','dask'):
+        raise MsPASSError('dbsave_seed_ensemble_files:  format='+str(format)
+                          +' is not supported.  Must be process or dask',
+                          'Invalid')
+    dbh=db[collection]
+    files=_find_seed_files(path,pattern)
+    fpkeys=['file_size','file_mtime','file_checksum']
+    existing={}
+    # raw index rows of dbsave_raw_index in the same collection are not ours
+    for doc in dbh.find(_ENSEMBLE_FILTER,{k:1 for k in ['dir','dfile']+fpkeys}):
+        key=os.path.join(doc['dir'],doc['dfile'])
+        existing.setdefault(key,[]).append(doc)
+    todo=[]
+    # ids of the documents of changed files deleted after the file is indexed again
+    stale={}
+    skipped=0
+    for f in files:
+        if f in existing:
+            fingerprint=file_fingerprint(f)
+            if all(doc.get(k)==fingerprint[k] for doc in existing[f] for k in fpkeys):
+                skipped+=1
+                continue
+            stale[f]=[doc['_id'] for doc in existing[f]]
+        todo.append(f)
+    result={'indexed':0,'skipped':skipped,'failed':[]}
+    nworkers=nprocs if nprocs else os.cpu_count()
+    executor=ProcessPoolExecutor(nworkers) if format=='process' else None
+    try:
+        for i in range(0,len(todo),batch_size):
+            batch=todo[i:i+batch_size]
+            if executor is not None:
+                outputs=executor.map(_try_seed_ensemble_document,batch,
+                            chunksize=max(1,len(batch)//(4*nworkers)))
+            else:
+                import dask.bag
+                outputs=dask.bag.from_sequence(batch,
+                            npartitions=nprocs if nprocs else len(batch)).map(
+                            _try_seed_ensemble_document).compute()
+            docs=[]
+            replaced=[]
+            for f,doc,errmsg in outputs:
+                if doc is None:
+                    result['failed'].append((f,errmsg))
+                else:
+                    docs.append(doc)
+                    replaced+=stale.get(f,[])
+            if len(docs)>0:
+                dbh.insert_many(docs,ordered=False)
+            if len(replaced)>0:
+                dbh.delete_many({'_id':{'$in':replaced}})
+            result['indexed']+=len(docs)
+            if verbose:
+                print('dbsave_seed_ensemble_files:  indexed ',result['indexed'],
+                      ' of ',len(todo),' files')
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return result
+
+# obspy stats names of the member attributes usable in select
+_TRACE_STATS_KEYS={'net':'network',
+                   'sta':'station',
+                   'chan':'channel',
+                   'loc':'location'}
+
 def _load_md(rec,keys):
     """
     Helper for load ensemble.   Extracts metadata defined by keys list and
@@ -236,6 +643,62 @@ def _load_md(rec,keys):
         x=rec[k]
         md.put(k,x)
     return md
+def _read_mseed_members(fname,members,apply_calib=False,max_gap=1048576):
+    """
+    Helper for load_one_ensemble.  Reads only the byte ranges of the file
+    defined by the foff and nbytes attributes of each member document and
+    decodes them with obspy's miniseed reader.   Ranges closer than max_gap
+    bytes are coalesced so members stored next to each other in the file
+    are fetched with one read.  Returns a list of obspy Trace objects
+    in the same order as members.
+    """
+    if len(members)==0:
+        return []
+    order=sorted(range(len(members)),key=lambda i: members[i]['foff'])
+    # list of [start,end,[member index]] for each coalesced read
+    blocks=[]
+    for i in order:
+        start=members[i]['foff']
+        end=start+members[i]['nbytes']
+        if len(blocks)>0 and start-blocks[-1][1]<=max_gap:
+            blocks[-1][1]=max(blocks[-1][1],end)
+            blocks[-1][2].append(i)
+        else:
+            blocks.append([start,end,[i]])
+    traces=[None]*len(members)
+    with open(fname,'rb') as fh:
+        for start,end,ilist in blocks:
+            fh.seek(start)
+            buf=memoryview(fh.read(end-start))
+            for i in ilist:
+                foff=members[i]['foff']-start
+                st=read(io.BytesIO(buf[foff:foff+members[i]['nbytes']]),
+                        format='mseed',apply_calib=apply_calib)
+                # a member is one contiguous trace by construction, but
+                # merge in case obspy splits it
+                if len(st)>1:
+                    st.merge()
+                traces[i]=st[0]
+    return traces
+
+def _select_members(members,select,getter=dict.get):
+    """
+    Helper for load_one_ensemble.  Returns the members with the values
+    of all keys in the select dict in the list of accepted values.
+    getter(member,key) returns the value of key for a member.
+    """
+    result=[]
+    for m in members:
+        for k in select:
+            ok=select[k]
+            if isinstance(ok,str) or not hasattr(ok,'__iter__'):
+                ok=[ok]
+            if getter(m,k) not in ok:
+                break
+        else:
+            result.append(m)
+    return result
+
 def load_one_ensemble(doc,
                   create_history=False,
                   jobname='Default job',
@@ -243,13 +706,18 @@ def load_one_ensemble(doc,
                   algid='99999',
                   ensemble_mdkeys=[],  # default is to load nothing for ensemble
 		  apply_calib=False,
-                  verbose=False):
+                  verbose=False,
+                  select=None):
     """
     This function can be used to load a full ensemble indexed in the
-    collection import_miniseed_ensemble.  It uses a large memory model
-    that eat up the entire file using obspy's miniseed reader.   It contains
-    some relics of early ideas of potentially having the function
-    utilize the history mechanism.  Those may not work, but were retained.
+    collection import_miniseed_ensemble.  When the member documents have
+    the foff and nbytes attributes (written by dbsave_seed_ensemble_file)
+    only the byte ranges of the requested members are read and decoded.
+    Members that are near each other in the file are fetched with one
+    read.  Older index documents without foff fall back to a large memory
+    model that eats up the entire file using obspy's miniseed reader.
+    It contains some relics of early ideas of potentially having the
+    function utilize the history mechanism.  Those may not work, but were retained.
 
     :param doc: is one record in the import_miniseed_ensemble collection
     :param create_history:  if true each member of the ensemble will be
@@ -263,6 +731,12 @@ def load_one_ensemble(doc,
     :param apply_calib:  if True tells obspy's reader to apply the calibration
       factor to convert the data to ground motion units.  Default is false.
     :param verbose:  write informational messages while processing
+    :param select:  optional dict used to load only some members.  Keys
+      are member attributes and values are a value or list of values to
+      accept (e.g. {'chan':['BHE','BHN','BHZ']}).  Only the data of the
+      selected members are read when the index has foff and nbytes and
+      the result is an empty ensemble if no member is selected.
+      Default (None) loads all members.
     """
     try:
         ensemblemd=Metadata()
@@ -277,9 +751,25 @@ def load_one_ensemble(doc,
         dir=doc['dir']
         dfile=doc['dfile']
         fname=dir+"/"+dfile
-        # Note this algorithm actually should work with any format
-        # supported by obspy's read function - should generalize it for release
-        dseis=read(fname,format='mseed',apply_calib=apply_calib)
+        members=doc['members'] if 'members' in doc else []
+        # decided before select so a select matching no member returns an
+        # empty ensemble instead of reading the whole file
+        byte_ranges=len(members)>0 and all(('foff' in m) and ('nbytes' in m) for m in members)
+        if select is not None:
+            members=_select_members(members,select)
+        if byte_ranges:
+            dseis=_read_mseed_members(fname,members,apply_calib)
+            if verbose:
+                print('load_one_ensemble:  read ',sum(m['nbytes'] for m in members),
+                      ' bytes for ',len(members),' members from file ',fname)
+        else:
+            # Note this algorithm actually should work with any format
+            # supported by obspy's read function - should generalize it for release
+            dseis=read(fname,format='mseed',apply_calib=apply_calib)
+            members=[]
+            if select is not None:
+                dseis=_select_members(dseis,select,
+                        lambda d,k: d.stats.get(_TRACE_STATS_KEYS.get(k,k)))
         if len(ensemble_mdkeys)>0:
             ensemblemd=_load_md(doc,ensemble_mdkeys)
         else:
@@ -305,7 +795,10 @@ def load_one_ensemble(doc,
             dts=Trace2TimeSeries(d)
             if create_history:
                 dts.load_history(his)  # This should just define jobname and jobid
-                seedid=d['seed_file_id']
+                if len(members)>0:
+                    seedid=members[count-1]['seed_file_id']
+                else:
+                    seedid=d['seed_file_id']
                 dts.set_as_origin('load_ensemble',algid,seedid,
                           AtomicType.TIMESERIES,True)
             result.member.append(dts)
@@ -313,7 +806,7 @@ def load_one_ensemble(doc,
     except:
         print('something threw an exception - needs more complete error handlers')
 
-def link_source_collection(db,dt=10.0,prefer_evid=False,verbose=False):
+def link_source_collection(db,dt=10.0,prefer_evid=False,verbose=False,bulk=False):
     """
     This prototype function uses a not at all generic method to link data
     indexed in a import_miniseed_ensemble collection to source data assumed stored
@@ -339,9 +832,23 @@ def link_source_collection(db,dt=10.0,prefer_evid=False,verbose=False):
     :param prefer_evid:  As noted above if True select the source doc with
       evid set when there are multiple matches.
     :param verbose:  when true output will be more verbose.
+    :param bulk:  when True the origin times of all source documents are
+      loaded into a sorted array and all ensembles are matched with one
+      vectorized search.  The updates are then sent as a single bulk_write.
+      This avoids two to three queries per ensemble and is much faster for
+      large collections.  The matching rules are the same but when there
+      are multiple matches and no preferred evid the ensemble is linked to
+      the one with the latest origin time.
     """
     dbwf=db['import_miniseed_ensemble']
     dbsource=db['source']
+    if bulk:
+        try:
+            _link_source_collection_bulk(dbwf,dbsource,dt,prefer_evid,verbose)
+        except Exception as err:
+            raise MsPASSError('Something threw an unexpected exception',
+                ErrorSeverity.Invalid) from err
+        return
     try:
         ensrec=dbwf.find({})
         for ens in ensrec:
@@ -409,6 +916,58 @@ def link_source_collection(db,dt=10.0,prefer_evid=False,verbose=False):
         raise MsPASSError('Something threw an unexpected exception',
             ErrorSeverity.Invalid) from err
 
+def _link_source_collection_bulk(dbwf,dbsource,dt,prefer_evid,verbose):
+    """
+    Bulk algorithm of link_source_collection.  Source origin times are
+    sorted once and the +-dt window of every ensemble start time is found
+    with searchsorted.  All updates are applied with one bulk_write.
+    """
+    srcdocs=list(dbsource.find({'time':{'$exists':True}},
+                               {'time':1,'source_id':1,'evid':1}))
+    srctimes=np.array([doc['time'] for doc in srcdocs],dtype=np.float64)
+    order=np.argsort(srctimes,kind='stable')
+    srctimes=srctimes[order]
+    srcdocs=[srcdocs[i] for i in order]
+    enslist=list(dbwf.find({},{'starttime':1}))
+    t=np.array([ens['starttime'] for ens in enslist],dtype=np.float64)
+    # index range of source documents with tlow <= time <= thigh
+    first=np.searchsorted(srctimes,t-dt,side='left')
+    last=np.searchsorted(srctimes,t+dt,side='right')
+    updates=[]
+    for i,ens in enumerate(enslist):
+        n=last[i]-first[i]
+        if n==0:
+            if verbose:
+                print('link_source_collection:  no match in source for time=',
+                    UTCDateTime(t[i]))
+                print("This enemble cannot be processed")
+            continue
+        matches=srcdocs[first[i]:last[i]]
+        srcrec=matches[-1]
+        if prefer_evid:
+            for doc in matches:
+                if 'evid' in doc:
+                    srcrec=doc
+                    break
+        source_id=srcrec['source_id']
+        if prefer_evid and ('evid' in srcrec):
+            evid=srcrec['evid']
+            update_record={'$set':{'source_id' :source_id,'evid':evid}}
+            if verbose:
+                print('Found evid=',evid,' for ensembled with start time=',UTCDateTime(t[i]))
+        else:
+            update_record={'$set':{'source_id' :source_id}}
+            if n==1 and prefer_evid:
+                print('link_source_collection(WARNING): unique match for source at time=',
+                      UTCDateTime(t[i]), ' does not have evid set but function was called with prefer_evid true')
+            elif n>1 and verbose:
+                print('Found ',n,' matches in source collection for ensemble start time=',
+                      UTCDateTime(t[i]))
+                print('Linking to document with source_id=',source_id)
+        updates.append(UpdateOne({'_id' : ens['_id']},update_record))
+    if len(updates)>0:
+        dbwf.bulk_write(updates,ordered=False)
+
 def load_source_data_by_id(db,mspass_object):
     """
     Prototype function to load source data to any MsPASS data object
@@ -564,35 +1123,58 @@ def load_hypocenter_data_by_time(db=None,
         print(err)
         raise err
 
+def _fetch_interval_records(dbcol,keys,names,times):
+    """
+    Helper for load_site_data and load_channel_data.  Fetches all the
+    documents of dbcol that can match any of keys with a single query and
+    returns them in a dict keyed by the tuple of values of names.  Time
+    interval matching is left to the caller.
+
+    :param dbcol: site or channel collection
+    :param keys: iterable of tuples of values for names
+    :param names: list of the attribute names of the values in keys
+    :param times: list of the reference times of the members
+    """
+    keys=set(keys)
+    records={}
+    if len(keys)==0:
+        return records
+    query={
+        '$or' : [dict(zip(names,k)) for k in keys],
+        'starttime' : {'$lt' : max(times)},
+        'endtime' : {'$gt' : min(times)}
+        }
+    for doc in dbcol.find(query):
+        k=tuple(doc[name] for name in names)
+        records.setdefault(k,[]).append(doc)
+    return records
+
 def load_site_data(db,ens):
     """
     Loads site data into ens.  Similar to load_source_data but uses a diffrent
     match:  net,sta, time matching startdate->enddate.   Mark members dead and
     post an elog message if the site coordinates are not found.
+
+    All candidate site documents for the ensemble are fetched with one
+    query and the time interval matching is done in memory.
     """
     dbsite=db.site
     try:
-
-        for d in ens.member:
-            if d.dead():
-                continue
-            t0=d['starttime']
-            net=d['net']
-            sta=d['sta']
-            query={
-                'net' : {'$eq' : net},
-                'sta' : {'$eq' : sta},
-                'starttime' : {'$lt' : t0},
-                'endtime' : {'$gt' : t0}
-                }
-            n=dbsite.count_documents(query)
+        members=[d for d in ens.member if not d.dead()]
+        keys=[(d['net'],d['sta']) for d in members]
+        times=[d['starttime'] for d in members]
+        records=_fetch_interval_records(dbsite,keys,['net','sta'],times)
+        for d,(net,sta),t0 in zip(members,keys,times):
+            matches=[rec for rec in records.get((net,sta),[])
+                     if rec['starttime']<t0 and rec['endtime']>t0]
+            n=len(matches)
             if n==0:
                 d.kill()
                 d.elog.log_error('load_site_data',
                  'no match found in site collection for net='+net+' sta='+sta+' for this event',
                  ErrorSeverity.Invalid)
             else:
-                siterec=dbsite.find_one(query)
+                siterec=matches[0]
                 d['site_lat']=siterec['lat']
                 d['site_lon']=siterec['lon']
                 d['site_elev']=siterec['elev']
@@ -609,52 +1191,47 @@ def load_channel_data(db,ens):
     Loads channel data into ens.  Similar to load_source_data but uses a diffrent
     match:  net,sta,loc,time matching startdate->enddate.   Mark members dead and
     post an elog message if required metadata are not found.
+
+    All candidate channel documents for the ensemble are fetched with one
+    query and the time interval matching is done in memory.
     """
     dbchannel=db.channel
     try:
+        members=[]
         for d in ens.member:
             if d.dead():
                 continue
-            t0=d['starttime']
             # this is a sanity check to avoid throwing exceptions
             if( d.is_defined('net')
               and d.is_defined('sta')
               and d.is_defined('loc')
               and d.is_defined('chan')):
-                net=d['net']
-                sta=d['sta']
-                chan=d['chan']
-                loc=d['loc']
-                query={
-                        'net' : {'$eq' : net},
-                        'sta' : {'$eq' : sta},
-                        'chan' : {'$eq' : chan},
-                        'loc' : {'$eq' : loc},
-                        'starttime' : {'$lt' : t0},
-                        'endtime' : {'$gt' : t0}
-                }
-                n=dbchannel.count_documents(query)
-                if n==0:
-                    d.kill()
-                    d.elog.log_error('load_channel_data',
-                        'no match found in channel collection for net='+net+' sta='+sta+" chan="+chan+" loc="+loc+' for this event',
-                            ErrorSeverity.Invalid)
-                    continue
-                if n==1:
-                    chanrec=dbchannel.find_one(query)
-                else:
-                # In this case we just complain - and keep use the first record
-                # that is what find_one returns.  We use the count to make
-                # the eror message cleaer
-                    chanrec=dbchannel.find_one(query)
-                    message = "Multiple ({n}) matches found for net={net} and sta={sta} with reference time {t0}".format(n=n,net=net,sta=sta,t0=t0)
-                    d.elog.log_error('load_site_data',message,ErrorSeverity.Complaint)
-                d['site_lat']=chanrec['lat']
-                d['site_lon']=chanrec['lon']
-                d['site_elev']=chanrec['elev']
-                d['vang']=chanrec['vang']
-                d['hang']=chanrec['hang']
-                d['site_id']=chanrec['_id']
+                members.append(d)
+        keys=[(d['net'],d['sta'],d['chan'],d['loc']) for d in members]
+        times=[d['starttime'] for d in members]
+        records=_fetch_interval_records(dbchannel,keys,['net','sta','chan','loc'],times)
+        for d,(net,sta,chan,loc),t0 in zip(members,keys,times):
+            matches=[rec for rec in records.get((net,sta,chan,loc),[])
+                     if rec['starttime']<t0 and rec['endtime']>t0]
+            n=len(matches)
+            if n==0:
+                d.kill()
+                d.elog.log_error('load_channel_data',
+                    'no match found in channel collection for net='+net+' sta='+sta+" chan="+chan+" loc="+loc+' for this event',
+                        ErrorSeverity.Invalid)
+                continue
+            # With multiple matches we just complain - and use the first record
+            # We use the count to make the eror message cleaer
+            chanrec=matches[0]
+            if n>1:
+                message = "Multiple ({n}) matches found for net={net} and sta={sta} with reference time {t0}".format(n=n,net=net,sta=sta,t0=t0)
+                d.elog.log_error('load_site_data',message,ErrorSeverity.Complaint)
+            d['site_lat']=chanrec['lat']
+            d['site_lon']=chanrec['lon']
+            d['site_elev']=chanrec['elev']
+            d['vang']=chanrec['vang']
+            d['hang']=chanrec['hang']
+            d['site_id']=chanrec['_id']
 
         return ens
     except Exception as err:
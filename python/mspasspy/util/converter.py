@@ -519,6 +519,66 @@ def Stream2SeismogramEnsemble(stream):
 
 obspy.core.Stream.toSeismogramEnsemble = Stream2SeismogramEnsemble
 
+
+def TimeSeriesEnsemble2ndarray(tse, max_samples=10000000):
+    """
+    Convert a timeseries ensemble to a 2D numpy array with one column
+    per member on a common time grid.  The grid starts at the earliest t0,
+    ends at the latest endtime, and uses the dt of the first member.  Output
+    samples outside the span of a member are zero.  Each member is copied
+    with one slice assignment from a view of its sample buffer.
+
+    :param tse: timeseries ensemble
+    :param max_samples: limit on the number of rows of the output. Mainly a
+      sanity check against ensembles of data with a large range of absolute times.
+    :return: list of [tmin, dt, array] where array has shape (nsamples, nmembers)
+    :raise RuntimeError: if the sample rates are irregular or the time range
+      exceeds max_samples
+    """
+    nseis = len(tse.member)
+    if nseis == 0:
+        return [0.0, 0.0, np.zeros(shape=[0, 0])]
+    dt = tse.member[0].dt
+    t0 = np.array([d.t0 for d in tse.member])
+    tend = np.array([d.endtime() for d in tse.member])
+    member_dt = np.array([d.dt for d in tse.member])
+    # check for irregular sample rates.  Test uses a fractional
+    # tolerance that is a frozen constant here
+    if np.any(np.abs(dt - member_dt) / dt > 0.01):
+        raise RuntimeError("TimeSeriesEnsemble2ndarray:  Irregular sample rates - cannot convert")
+    tmin = t0.min()
+    tmax = tend.max()
+    m = int((tmax - tmin) / dt + 1)
+    if m > max_samples:
+        raise RuntimeError("TimeSeriesEnsemble2ndarray:  irrational computed time range - you are probably incorrectly using data with large range of absolute times")
+    work = np.zeros(shape=[m, nseis])
+    for j in range(nseis):
+        d = tse.member[j]
+        # output rows i with t0 <= tmin+i*dt <= endtime.  The estimates are
+        # adjusted so the comparisons match those done on the time values
+        i0 = max(int(np.ceil((t0[j] - tmin) / dt)), 0)
+        while i0 > 0 and tmin + (i0 - 1) * dt >= t0[j]:
+            i0 -= 1
+        while i0 < m and tmin + i0 * dt < t0[j]:
+            i0 += 1
+        i1 = min(int(np.floor((tend[j] - tmin) / dt)), m - 1)
+        while i1 + 1 < m and tmin + (i1 + 1) * dt <= tend[j]:
+            i1 += 1
+        while i1 >= i0 and tmin + i1 * dt > tend[j]:
+            i1 -= 1
+        if i1 < i0:
+            continue
+        data = np.asarray(d.data)
+        # same rounding as BasicTimeSeries::sample_number
+        k0 = int(np.floor((tmin + i0 * dt - t0[j]) / member_dt[j] + 0.5))
+        if member_dt[j] == dt:
+            work[i0:i1 + 1, j] = data[k0:k0 + i1 + 1 - i0]
+        else:
+            t = tmin + np.arange(i0, i1 + 1) * dt
+            k = np.floor((t - t0[j]) / member_dt[j] + 0.5).astype(int)
+            work[i0:i1 + 1, j] = data[np.clip(k, 0, len(data) - 1)]
+    return [tmin, dt, work]
+
 def _all_members_match(ens,key):
     """
     This is a helper function for below.  I scans ens to assure all members
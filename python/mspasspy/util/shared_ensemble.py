@@ -0,0 +1,237 @@
+"""
+Ensembles with sample data held in shared memory.
+
+A SharedEnsemble copies the samples of a TimeSeriesEnsemble or
+SeismogramEnsemble once into a :class:`multiprocessing.shared_memory.SharedMemory`
+block.  The small :class:`SharedEnsembleHandle` returned by its handle
+attribute pickles to the block name, the member headers and the offsets of
+the samples.  Any process on the same host can attach to the block with the
+handle and read the samples through numpy views or rebuild the ensemble
+without the samples going through pickle.
+"""
+import os
+import pickle
+
+import numpy as np
+
+from mspasspy.ccore.seismic import (TimeSeriesEnsemble,
+                                    SeismogramEnsemble)
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    # shared memory and pickle protocol 5 require python 3.8 or later
+    resource_tracker = shared_memory = None
+
+# offsets of the member buffers are multiples of this many bytes
+_ALIGNMENT = 64
+
+
+def _check_shared_memory():
+    if shared_memory is None:
+        raise RuntimeError("SharedEnsemble requires python 3.8 or later")
+
+
+def _tracker_id():
+    """
+    Return an identifier of the resource tracker used by this process.
+
+    Processes started by multiprocessing inherit the pipe to the tracker of
+    their parent, so processes sharing a tracker see the same pipe.  None is
+    returned on platforms where shared memory is not tracked.
+    """
+    if os.name != 'posix':
+        return None
+    resource_tracker.ensure_running()
+    st = os.fstat(resource_tracker.getfd())
+    return (st.st_dev, st.st_ino)
+
+
+class SharedEnsembleHandle:
+    """
+    Picklable reference to the data of a :class:`SharedEnsemble`.
+
+    The handle holds the name of the shared memory block, the pickled
+    ensemble metadata and, for each member, the protocol 5 pickle of the
+    member without its samples plus the offsets and sizes of its out-of-band
+    buffers in the block.  It does not hold any sample data.
+    """
+    def __init__(self, name, ensemble_type, metadata, headers, buffers, size, tracker=None):
+        """
+        :param name: name of the shared memory block.
+        :param ensemble_type: either :class:`mspasspy.ccore.seismic.TimeSeriesEnsemble` or
+          :class:`mspasspy.ccore.seismic.SeismogramEnsemble`.
+        :param metadata: pickle of the ensemble metadata.
+        :type metadata: :class:`bytes`
+        :param headers: a :class:`list` of the protocol 5 pickles of the members.
+        :param buffers: a :class:`list` with a :class:`list` of (offset, nbytes) tuples for each member.
+        :param size: total size in bytes of the data in the block.
+        :param tracker: identifier of the resource tracker of the creating process.
+        """
+        self.name = name
+        self.ensemble_type = ensemble_type
+        self.metadata = metadata
+        self.headers = headers
+        self.buffers = buffers
+        self.size = size
+        self.tracker = tracker
+
+    def __len__(self):
+        return len(self.headers)
+
+
+class SharedEnsemble:
+    """
+    Ensemble whose sample data live in a shared memory block.
+
+    Use :meth:`create` in the process that owns the data and :meth:`attach`
+    with the handle in the other processes.  Every process should call
+    :meth:`close` when done and the owner should call :meth:`unlink` to
+    release the block.  Both are done on exit when used as a context manager.
+    Numpy views returned by :meth:`member_data` must be deleted before
+    :meth:`close` is called.
+    """
+    def __init__(self, handle, shm, owner=False):
+        """
+        Normally not called directly.  Use :meth:`create` or :meth:`attach`.
+
+        :param handle: the :class:`SharedEnsembleHandle` describing the data.
+        :param shm: the attached :class:`multiprocessing.shared_memory.SharedMemory`.
+        :param owner: `True` if this object created the block.
+        """
+        self.handle = handle
+        self._shm = shm
+        self._owner = owner
+
+    @classmethod
+    def create(cls, ens, name=None):
+        """
+        Copy the samples of an ensemble into a new shared memory block.
+
+        :param ens: the ensemble to share.
+        :type ens: either :class:`mspasspy.ccore.seismic.TimeSeriesEnsemble` or
+          :class:`mspasspy.ccore.seismic.SeismogramEnsemble`
+        :param name: name of the shared memory block.  A unique name is generated when None.
+        :return: :class:`SharedEnsemble` owning the block.
+        """
+        _check_shared_memory()
+        if isinstance(ens, TimeSeriesEnsemble):
+            ensemble_type = TimeSeriesEnsemble
+        elif isinstance(ens, SeismogramEnsemble):
+            ensemble_type = SeismogramEnsemble
+        else:
+            raise TypeError("SharedEnsemble.create:  only TimeSeriesEnsemble and SeismogramEnsemble are supported")
+        headers = []
+        member_buffers = []
+        buffer_list = []
+        size = 0
+        for d in ens.member:
+            raw = []
+            headers.append(pickle.dumps(d, protocol=5, buffer_callback=raw.append))
+            offsets = []
+            for b in raw:
+                view = b.raw()
+                offsets.append((size, view.nbytes))
+                buffer_list.append(view)
+                size += -(-view.nbytes // _ALIGNMENT) * _ALIGNMENT
+            member_buffers.append(offsets)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        for view, (offset, nbytes) in zip(buffer_list,
+                                          [x for offsets in member_buffers for x in offsets]):
+            shm.buf[offset:offset + nbytes] = view
+        handle = SharedEnsembleHandle(shm.name, ensemble_type, pickle.dumps(ens._get_ensemble_md()),
+                                      headers, member_buffers, size, tracker=_tracker_id())
+        return cls(handle, shm, owner=True)
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        Attach to the shared memory block of a handle created in another process.
+
+        :param handle: the handle of the ensemble.
+        :type handle: :class:`SharedEnsembleHandle`
+        :return: :class:`SharedEnsemble` that does not own the block.
+        """
+        _check_shared_memory()
+        try:
+            shm = shared_memory.SharedMemory(name=handle.name, track=False)
+        except TypeError:
+            # before python 3.13 attaching registers the block with the resource
+            # tracker, which unlinks it when the tracker exits.  The tracker
+            # keeps one entry per name, so when it is shared with the creating
+            # process (children started by multiprocessing) unregistering would
+            # drop the creator's registration.  Only a tracker of our own must
+            # forget the block.
+            shm = shared_memory.SharedMemory(name=handle.name)
+            if _tracker_id() != handle.tracker:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(handle, shm)
+
+    def __len__(self):
+        return len(self.handle)
+
+    def member_data(self, i):
+        """
+        Return a numpy view of the samples of member i in the shared memory block.
+        No data are copied.  TimeSeries samples are a 1D array and Seismogram
+        samples a 3 by npts array in the layout of :class:`mspasspy.ccore.utility.dmatrix`.
+
+        :param i: index of the member.
+        :return: :class:`numpy.ndarray`
+        """
+        offsets = self.handle.buffers[i]
+        if not offsets:
+            return np.zeros(0)
+        offset, nbytes = offsets[0]
+        data = np.frombuffer(self._shm.buf, dtype=np.float64, count=nbytes // 8, offset=offset)
+        if self.handle.ensemble_type is SeismogramEnsemble:
+            data = data.reshape((3, -1), order='F')
+        return data
+
+    def member(self, i):
+        """
+        Rebuild member i as a TimeSeries or Seismogram.  The samples are copied
+        once from the shared memory block into the new object.
+
+        :param i: index of the member.
+        :return: either :class:`mspasspy.ccore.seismic.TimeSeries` or :class:`mspasspy.ccore.seismic.Seismogram`
+        """
+        views = [self._shm.buf[offset:offset + nbytes] for offset, nbytes in self.handle.buffers[i]]
+        try:
+            return pickle.loads(self.handle.headers[i], buffers=views)
+        finally:
+            for view in views:
+                view.release()
+
+    def to_ensemble(self):
+        """
+        Rebuild the full ensemble.  The samples are copied once from the shared memory block.
+
+        :return: either :class:`mspasspy.ccore.seismic.TimeSeriesEnsemble` or
+          :class:`mspasspy.ccore.seismic.SeismogramEnsemble`
+        """
+        ens = self.handle.ensemble_type(pickle.loads(self.handle.metadata), len(self))
+        for i in range(len(self)):
+            ens.member.append(self.member(i))
+        return ens
+
+    def close(self):
+        """
+        Detach this process from the shared memory block.
+        """
+        self._shm.close()
+
+    def unlink(self):
+        """
+        Release the shared memory block.  Only the owner should call this,
+        and the data are gone for every process once it is called.
+        """
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if self._owner:
+            self.unlink()
@@ -1,5 +1,6 @@
 import copy
 import os
+import pickle
 
 import dask.bag
 import gridfs
@@ -14,11 +15,14 @@ from mspasspy.ccore.utility import dmatrix, ErrorSeverity, Metadata, MsPASSError
 from mspasspy.db.schema import DatabaseSchema, MetadataSchema
 from mspasspy.util import logging_helper
 from bson.objectid import ObjectId
-from datetime import datetime
+from datetime import datetime, timezone
 
 sys.path.append("python/tests")
 
-from mspasspy.db.database import Database, read_distributed_data
+from mspasspy.db.database import (Database, read_distributed_data, read_distributed_data_by_query,
+                                  write_distributed_data, _get_cached_database, _read_distributed_range,
+                                  _write_distributed_partition,
+                                  _split_id_range)
 from mspasspy.db.client import Client
 from helper import (get_live_seismogram,
                     get_live_timeseries,
@@ -128,6 +132,7 @@ class TestDatabase():
         tmp_seis_2.npts = 255
         self.db._read_data_from_dfile(tmp_seis_2, dir, dfile, foff)
         assert all(a.any() == b.any() for a, b in zip(tmp_seis.data, tmp_seis_2.data))
+        assert np.array_equal(np.asarray(tmp_seis.data), np.asarray(tmp_seis_2.data))
 
         tmp_ts = get_live_timeseries()
         foff = self.db._save_data_to_dfile(tmp_ts, dir, dfile)
@@ -136,6 +141,10 @@ class TestDatabase():
         self.db._read_data_from_dfile(tmp_ts_2, dir, dfile, foff)
         assert all(a == b for a, b in zip(tmp_ts.data, tmp_ts_2.data))
 
+        with pytest.raises(ValueError, match='Size mismatch'):
+            tmp_ts_2.npts = 256
+            self.db._read_data_from_dfile(tmp_ts_2, dir, dfile, foff)
+
     def test_save_and_read_gridfs(self):
         tmp_seis = get_live_seismogram()
         gridfs_id = self.db._save_data_to_gridfs(tmp_seis)
@@ -163,9 +172,53 @@ class TestDatabase():
 
         gfsh = gridfs.GridFS(self.db)
         assert gfsh.exists(gridfs_id)
+        assert gfsh.get(gridfs_id).gridfs_format == 'raw_v1'
         self.db._save_data_to_gridfs(tmp_ts, gridfs_id)
         assert not gfsh.exists(gridfs_id)
 
+        # legacy pickled data without a gridfs_format tag
+        legacy_id = gfsh.put(pickle.dumps(bytes(tmp_seis.data)))
+        tmp_seis_3 = Seismogram()
+        tmp_seis_3.npts = 255
+        self.db._read_data_from_gridfs(tmp_seis_3, legacy_id)
+        assert np.array_equal(np.asarray(tmp_seis.data), np.asarray(tmp_seis_3.data))
+        legacy_id = gfsh.put(pickle.dumps(bytes(np.array(tmp_ts.data))))
+        tmp_ts_3 = TimeSeries()
+        self.db._read_data_from_gridfs(tmp_ts_3, legacy_id)
+        assert all(a == b for a, b in zip(tmp_ts.data, tmp_ts_3.data))
+
+        with pytest.raises(MsPASSError, match='Unknown gridfs_format'):
+            self.db._read_data_from_gridfs(tmp_ts_3, legacy_id, 'unknown')
+
+        # a raw file with its last chunk missing
+        truncated_id = gfsh.put(np.zeros(100000).tobytes(), gridfs_format='raw_v1')
+        last = self.db['fs.chunks'].find_one({'files_id': truncated_id}, sort=[('n', -1)])
+        self.db['fs.chunks'].delete_one({'_id': last['_id']})
+        tmp_ts_4 = TimeSeries()
+        tmp_ts_4.npts = 100000
+        with pytest.raises(MsPASSError, match='gridfs file'):
+            self.db._read_data_from_gridfs(tmp_ts_4, truncated_id)
+
+    def test_bulk_save_gridfs(self):
+        tmp_ts = get_live_timeseries()
+        tmp_seis = get_live_seismogram()
+        ids = self.db._bulk_save_gridfs([tmp_ts, tmp_seis])
+        assert self.db._gridfs_index_created
+        ids += self.db._bulk_save_gridfs([tmp_ts])
+        assert 'files_id_1_n_1' in self.db['fs.chunks'].index_information()
+        doc = self.db['fs.files'].find_one({'_id': ids[0]})
+        assert doc['gridfs_format'] == 'raw_v1'
+        upload_date = doc['uploadDate'].replace(tzinfo=timezone.utc)
+        assert abs((datetime.now(timezone.utc) - upload_date).total_seconds()) < 60
+        tmp_ts_2 = TimeSeries()
+        tmp_ts_2.npts = 255
+        self.db._read_data_from_gridfs(tmp_ts_2, ids[2])
+        assert np.array_equal(np.asarray(tmp_ts.data), np.asarray(tmp_ts_2.data))
+        tmp_seis_2 = Seismogram()
+        tmp_seis_2.npts = 255
+        self.db._read_data_from_gridfs(tmp_seis_2, ids[1])
+        assert np.array_equal(np.asarray(tmp_seis.data), np.asarray(tmp_seis_2.data))
+
     def test_mspass_type_helper(self):
         schema = self.metadata_def.Seismogram
         assert type([1.0, 1.2]) == schema.type('tmatrix')
@@ -382,6 +435,22 @@ class TestDatabase():
         with pytest.raises(MsPASSError, match='is not defined'):
             self.db2.read_data(seis['_id'], collection='wf_test2')
 
+    def test_read_schema_cache(self):
+        client = Client('localhost')
+        db = Database(client, 'dbtest')
+        db_schema = copy.deepcopy(db.database_schema)
+        db_schema['wf_test'] = copy.deepcopy(db.database_schema.wf_Seismogram)
+        db.set_database_schema(db_schema)
+        wf_collection, object_type, read_schema = db._resolve_read_schema('wf_test')
+        assert wf_collection == 'wf_test'
+        assert object_type is Seismogram
+        assert read_schema.collection('_id') == 'wf_test'
+        assert db.metadata_schema.Seismogram.collection('_id') == 'wf_Seismogram'
+        # the swapped schema is reused until one of the schemas is replaced
+        assert db._resolve_read_schema('wf_test')[2] is read_schema
+        db.set_metadata_schema(copy.deepcopy(db.metadata_schema))
+        assert db._resolve_read_schema('wf_test')[2] is not read_schema
+
     # def test_delete_wf(self):
     #     id = self.db['wf'].insert_one({'test': 'test'}).inserted_id
     #     res = self.db['wf'].find_one({'_id': id})
@@ -510,6 +579,13 @@ class TestDatabase():
         res = self.db.read_data(ts_ensemble.member[2]['_id'])
         assert np.isclose(ts_ensemble.member[2].data, res.data).all()
         assert '_id' not in ts_ensemble.member[1]
+        # members sharing a dfile are appended one after another
+        doc0 = self.db['wf_TimeSeries'].find_one({'_id': ts_ensemble.member[0]['_id']})
+        doc2 = self.db['wf_TimeSeries'].find_one({'_id': ts_ensemble.member[2]['_id']})
+        assert doc2['foff'] - doc0['foff'] == 8 * ts_ensemble.member[0].npts
+        assert self.db['history_object'].find_one({'_id': doc0['history_object_id']})
+        elog_doc = self.db['elog'].find_one({'_id': doc0['elog_id']})
+        assert elog_doc['wf_TimeSeries_id'] == ts_ensemble.member[0]['_id']
 
         self.db.save_ensemble_data(ts_ensemble, 'gridfs', exclude_objects=[1])
         res = self.db.read_data(ts_ensemble.member[0]['_id'])
@@ -517,6 +593,11 @@ class TestDatabase():
         assert '_id' not in ts_ensemble.member[1]
         res = self.db.read_data(ts_ensemble.member[2]['_id'])
         assert np.isclose(ts_ensemble.member[2].data, res.data).all()
+        # the update replaces the old elog entry with the merged one
+        assert not self.db['elog'].find_one({'_id': doc0['elog_id']})
+        doc0 = self.db['wf_TimeSeries'].find_one({'_id': ts_ensemble.member[0]['_id']})
+        assert doc0['storage_mode'] == 'gridfs'
+        assert len(self.db['elog'].find_one({'_id': doc0['elog_id']})['logdata']) == 2
 
         # using seismogram
         seis1 = copy.deepcopy(self.test_seis)
@@ -563,6 +644,17 @@ class TestDatabase():
         for i in range(3):
             assert np.isclose(res.member[i].data, ts_ensemble.member[i].data).all()
 
+        # batched read keeps the order of the ids, skips unknown ids and
+        # matches the metadata of read_data
+        res = self.db.read_ensemble_data([ts_ensemble.member[2]['_id'], ObjectId(),
+                                          ts_ensemble.member[0]['_id']])
+        assert len(res.member) == 2
+        assert res.member[0]['_id'] == ts_ensemble.member[2]['_id']
+        assert res.member[1]['_id'] == ts_ensemble.member[0]['_id']
+        single = self.db.read_data(ts_ensemble.member[2]['_id'], load_history=True)
+        assert dict(res.member[0]) == dict(single)
+        assert str(res.member[0].get_nodes()) == str(single.get_nodes())
+
         # using seismogram
         seis1 = copy.deepcopy(self.test_seis)
         seis2 = copy.deepcopy(self.test_seis)
@@ -582,6 +674,17 @@ class TestDatabase():
         for i in range(3):
             assert np.isclose(res.member[i].data, seis_ensemble.member[i].data).all()
 
+        # a missing chunk or fs.files document is an error, not garbage samples
+        seis_ids = [x['_id'] for x in seis_ensemble.member]
+        gridfs_id = self.db['wf'].find_one({'_id': seis_ids[0]})['gridfs_id']
+        self.db['fs.chunks'].delete_one({'files_id': gridfs_id})
+        with pytest.raises(MsPASSError, match='Truncated gridfs file'):
+            self.db.read_ensemble_data(seis_ids)
+        gridfs_id = self.db['wf'].find_one({'_id': seis_ids[1]})['gridfs_id']
+        self.db['fs.files'].delete_one({'_id': gridfs_id})
+        with pytest.raises(MsPASSError, match='gridfs files not found'):
+            self.db.read_ensemble_data(seis_ids[1:])
+
     def test_get_response(self):
         inv = obspy.read_inventory('python/tests/data/TA.035A.xml')
         net = 'TA'
@@ -596,6 +699,37 @@ class TestDatabase():
             self.db.get_response()
         assert self.db.get_response(net='TA', sta='036A', chan='BHE', time=time) is None
 
+    def test_seed_cache(self):
+        time = 1263254400.0+100.0
+        queries = [('get_seed_site', ('TA', '035A'), {'time': time}),
+                   ('get_seed_site', ('TA', '035A'), {'loc': '', 'time': time}),
+                   ('get_seed_site', ('TA', '036A'), {}),
+                   ('get_seed_channel', ('TA', '035A', 'BHE'), {'time': time}),
+                   ('get_seed_channel', ('TA', '035A', 'BHZ'), {'loc': '', 'time': time}),
+                   ('get_seed_channel', ('TA', '035A', 'BHZ'), {'loc': '', 'time': 1.0}),
+                   ('get_seed_channel', ('TA', '035A', 'XXX'), {})]
+        expected = [getattr(self.db, f)(*args, **kwargs) for f, args, kwargs in queries]
+        assert self.db.enable_seed_cache() == {'site': True, 'channel': True}
+        for (f, args, kwargs), doc in zip(queries, expected):
+            cached = getattr(self.db, f)(*args, **kwargs)
+            if doc is None:
+                assert cached is None
+            else:
+                assert cached['_id'] == doc['_id']
+                assert 'serialized_channel_data' not in cached
+                # editing a returned document does not change the cache
+                cached['lat'] = None
+                assert getattr(self.db, f)(*args, **kwargs)['lat'] == doc['lat']
+        # pickling for workers drops the cache
+        db_copy = pickle.loads(pickle.dumps(self.db))
+        assert db_copy._seed_cache == {}
+        self.db.disable_seed_cache()
+        assert self.db.get_seed_channel('TA', '035A', 'BHE', time=time)['_id'] == expected[3]['_id']
+        # collections over the size limit are queried as before
+        assert self.db.enable_seed_cache(max_documents=0) == {'site': False, 'channel': False}
+        assert self.db.get_seed_site('TA', '035A', time=time)['_id'] == expected[0]['_id']
+        self.db.disable_seed_cache()
+
     def teardown_class(self):
         try:
             os.remove('python/tests/data/test_db_output')
@@ -696,8 +830,125 @@ def test_read_distributed_data_dask():
         assert l
         assert np.isclose(l.data, test_ts.data).all()
 
+    cursors = db['wf_TimeSeries'].find({})
+    dask_list = read_distributed_data('localhost', 'mspasspy_test_db', cursors, collection='wf_TimeSeries', format='dask',
+                                      read_by_partition=True)
+    list = dask_list.compute()
+    assert len(list) == 3
+    for l in list:
+        assert l
+        assert np.isclose(l.data, test_ts.data).all()
+
+    # workers in the same process share one connection
+    assert _get_cached_database('localhost', 'mspasspy_test_db') is _get_cached_database('localhost', 'mspasspy_test_db')
+
+    dask_list = read_distributed_data_by_query('localhost', 'mspasspy_test_db', {}, npartitions=2,
+                                               collection='wf_TimeSeries', format='dask', batch_size=2)
+    list = dask_list.compute()
+    assert len(list) == 3
+    for l in list:
+        assert l
+        assert np.isclose(l.data, test_ts.data).all()
+
+    # a range is read lazily one batch at a time
+    objects = _read_distributed_range('localhost', 'mspasspy_test_db', {}, None, None,
+                                      collection='wf_TimeSeries', batch_size=2)
+    assert not isinstance(objects, list)
+    objects = [l for l in objects]
+    assert len(objects) == 3
+    for l in objects:
+        assert np.isclose(l.data, test_ts.data).all()
+
+    dask_list = read_distributed_data_by_query('localhost', 'mspasspy_test_db', {'_id': {'$in': []}},
+                                               collection='wf_TimeSeries', format='dask')
+    assert dask_list.compute() == []
+
+    # ranges are contiguous and cover every document exactly once
+    ranges = _split_id_range(db['wf_TimeSeries'], {}, 3, sample_per_partition=1)
+    assert ranges[0][0] is None and ranges[-1][1] is None
+    for i in range(1, len(ranges)):
+        assert ranges[i][0] == ranges[i - 1][1]
+
+    client = Client('localhost')
+    client.drop_database('mspasspy_test_db')
+
+def test_write_distributed_data(spark_context):
+    client = Client('localhost')
+    client.drop_database('mspasspy_test_db')
+    db = Database(client, 'mspasspy_test_db')
+
+    test_ts = get_live_timeseries()
+    ts_list = [copy.deepcopy(test_ts) for _ in range(4)]
+    ts_list[3].kill()
+    ts_list.append(get_live_seismogram())
+    ts_list.append('not a seismic object')
+
+    summary = write_distributed_data(spark_context.parallelize(ts_list, 2), 'localhost', 'mspasspy_test_db',
+                                     format='spark')
+    assert summary['saved'] == 4
+    assert summary['dead'] == 1
+    assert summary['failed'] == 1
+    assert len(summary['errors']) == 1
+    assert db['wf_TimeSeries'].count_documents({}) == 3
+    assert db['wf_Seismogram'].count_documents({}) == 1
+    for doc in db['wf_TimeSeries'].find():
+        ts = db.read_data(doc['_id'])
+        assert np.isclose(ts.data, test_ts.data).all()
+
+    client.drop_database('mspasspy_test_db')
+
+
+def test_write_distributed_data_dask():
+    client = Client('localhost')
+    client.drop_database('mspasspy_test_db')
+    db = Database(client, 'mspasspy_test_db')
+
+    test_ts = get_live_timeseries()
+    ts_list = [copy.deepcopy(test_ts) for _ in range(4)]
+    dir = 'python/tests/data/write_distributed'
+    summary = write_distributed_data(dask.bag.from_sequence(ts_list, npartitions=2), 'localhost',
+                                     'mspasspy_test_db', storage_mode='file', dir=dir, format='dask',
+                                     batch_size=1)
+    assert summary == {'saved': 4, 'dead': 0, 'failed': 0, 'errors': []}
+    # one file per partition, samples appended in order
+    docs = list(db['wf_TimeSeries'].find())
+    assert len(docs) == 4
+    assert len({doc['dfile'] for doc in docs}) == 2
+    for doc in docs:
+        ts = db.read_data(doc['_id'])
+        assert np.isclose(ts.data, test_ts.data).all()
+
+    for doc in docs:
+        try:
+            os.remove(os.path.join(doc['dir'], doc['dfile']))
+        except OSError:
+            pass
+    client.drop_database('mspasspy_test_db')
+
+
+def test_write_distributed_partition_partial_failure():
     client = Client('localhost')
     client.drop_database('mspasspy_test_db')
+    db = Database(client, 'mspasspy_test_db')
+    # all copies have the same npts, so only the first wf document can be inserted
+    db['wf_TimeSeries'].create_index('npts', unique=True)
+
+    test_ts = get_live_timeseries()
+    ts_list = [copy.deepcopy(test_ts) for _ in range(4)]
+    ts_list[3].kill()
+    summary = _write_distributed_partition('localhost', 'mspasspy_test_db', ts_list)
+    assert summary['saved'] == 1
+    assert summary['dead'] == 1
+    assert summary['failed'] == 2
+    assert len(summary['errors']) == 1
+    assert summary['errors'][0].startswith('BulkWriteError: 2 of 3 documents failed')
+    assert db['wf_TimeSeries'].count_documents({}) == 1
+    # only the saved object has an _id, so a rerun of the others does not update it
+    saved = [ts for ts in ts_list[:3] if '_id' in ts]
+    assert len(saved) == 1
+    assert db['wf_TimeSeries'].find_one()['_id'] == saved[0]['_id']
+
+    client.drop_database('mspasspy_test_db')
 
 if __name__ == '__main__':
     pass
@@ -0,0 +1,377 @@
+import io
+import os
+import sys
+
+import numpy as np
+import obspy
+import pytest
+
+from mspasspy.ccore.seismic import TimeSeriesEnsemble
+from mspasspy.ccore.utility import ErrorSeverity, MsPASSError
+from mspasspy.db.client import Client
+from mspasspy.db.database import Database
+from mspasspy.preprocessing.seed.ensembles import (_read_mseed_members,
+                                                   _seed_ensemble_document,
+                                                   dbsave_raw_index,
+                                                   dbsave_seed_ensemble_files,
+                                                   file_fingerprint,
+                                                   link_source_collection,
+                                                   load_channel_data,
+                                                   load_one_ensemble,
+                                                   load_site_data,
+                                                   obspy_mseed_file_indexer,
+                                                   scan_mseed_headers)
+
+sys.path.append("python/tests")
+from helper import get_live_timeseries
+
+# blockette 1001 is needed for the microseconds of this start time
+T0 = obspy.UTCDateTime(2020, 1, 2, 3, 4, 5.123456)
+
+
+def _trace(sta, chan, starttime, npts, dtype):
+    data = (np.random.rand(npts) * 1000.0).astype(dtype)
+    return obspy.Trace(data, header={'network': 'XX', 'station': sta, 'location': '00',
+                                     'channel': chan, 'starttime': starttime,
+                                     'sampling_rate': 20.0})
+
+
+def _check_index_ranges(fname):
+    """
+    Checks each foff/nbytes range of the index of fname decodes to exactly
+    one trace with the indexed attributes.  Returns the index and the traces.
+    """
+    index = scan_mseed_headers(fname)
+    with open(fname, 'rb') as fh:
+        raw = fh.read()
+    traces = []
+    for x in index:
+        st = obspy.read(io.BytesIO(raw[x['foff']:x['foff'] + x['nbytes']]), format='MSEED')
+        assert len(st) == 1
+        tr = st[0]
+        assert (tr.stats.network, tr.stats.station, tr.stats.channel, tr.stats.location) == \
+            (x['net'], x['sta'], x['chan'], x['loc'])
+        assert tr.stats.npts == x['npts']
+        assert tr.stats.sampling_rate == x['sampling_rate']
+        assert abs(tr.stats.starttime.timestamp - x['starttime']) < 1.0e-6
+        assert abs(tr.stats.endtime.timestamp - x['endtime']) < 1.0e-6
+        traces.append(tr)
+    return index, traces
+
+
+@pytest.mark.parametrize('encoding,dtype', [('STEIM2', np.int32), ('FLOAT64', np.float64)])
+@pytest.mark.parametrize('byteorder', ['>', '<'])
+def test_scan_mseed_headers(tmp_path, encoding, dtype, byteorder):
+    # the gap in S1 BHZ makes two traces
+    st = obspy.Stream([_trace('S1', 'BHZ', T0, 3000, dtype),
+                       _trace('S1', 'BHZ', T0 + 3000 / 20.0 + 5.0, 1000, dtype),
+                       _trace('S2', 'BHN', T0, 500, dtype)])
+    fname = str(tmp_path / 'test.mseed')
+    st.write(fname, format='MSEED', encoding=encoding, byteorder=byteorder, reclen=512)
+    index, traces = _check_index_ranges(fname)
+    ref = obspy.read(fname)
+    assert len(index) == len(ref) == 3
+    for x, tr, reftr in zip(index, traces, ref):
+        assert tr.id == reftr.id
+        assert tr.stats.starttime == reftr.stats.starttime
+        assert tr.stats.npts == reftr.stats.npts
+        assert np.array_equal(tr.data, reftr.data)
+    assert abs(index[0]['starttime'] - T0.timestamp) < 1.0e-6
+
+    df = obspy_mseed_file_indexer(fname)
+    assert list(df['foff']) == [x['foff'] for x in index]
+    assert (df['mover'] == 'mseed_header_scan').all()
+
+
+def test_scan_mseed_headers_interleaved(tmp_path):
+    # records of two channels written alternately
+    records = []
+    for chan in ['BHZ', 'BHN']:
+        buf = io.BytesIO()
+        obspy.Stream([_trace('S1', chan, T0, 2000, np.int32)]).write(buf, format='MSEED',
+                                                                     encoding='STEIM2', reclen=512)
+        raw = buf.getvalue()
+        records.append([raw[i:i + 512] for i in range(0, len(raw), 512)])
+    fname = str(tmp_path / 'interleaved.mseed')
+    with open(fname, 'wb') as fh:
+        for pair in zip(*records):
+            fh.write(b''.join(pair))
+    index, traces = _check_index_ranges(fname)
+    # every record starts a new trace so each is one contiguous byte range
+    assert len(index) == 2 * len(records[0])
+    for reftr in obspy.read(fname):
+        parts = [tr for tr in traces if tr.id == reftr.id]
+        assert parts[0].stats.starttime == reftr.stats.starttime
+        assert sum(tr.stats.npts for tr in parts) == reftr.stats.npts
+        assert np.array_equal(np.concatenate([tr.data for tr in parts]), reftr.data)
+
+
+
+def test_load_one_ensemble_byte_ranges(tmp_path):
+    st = obspy.Stream([_trace('S' + str(i), chan, T0, 1000, np.int32)
+                       for i in range(3) for chan in ['BHE', 'BHN', 'BHZ']])
+    fname = str(tmp_path / 'event.mseed')
+    st.write(fname, format='MSEED', encoding='STEIM2', reclen=512)
+    doc = _seed_ensemble_document(fname)
+    ref = obspy.read(fname)
+    assert len(doc['members']) == len(ref)
+    # max_gap=0 reads each member alone, the default coalesces all of them
+    for max_gap in [0, 1048576]:
+        traces = _read_mseed_members(fname, doc['members'], max_gap=max_gap)
+        assert len(traces) == len(ref)
+        for tr, reftr in zip(traces, ref):
+            assert tr.id == reftr.id
+            assert np.array_equal(tr.data, reftr.data)
+    # a subset out of file order is returned in the order requested
+    order = [7, 1, 4]
+    traces = _read_mseed_members(fname, [doc['members'][i] for i in order])
+    for tr, i in zip(traces, order):
+        assert tr.id == ref[i].id
+        assert np.array_equal(tr.data, ref[i].data)
+
+    ens = load_one_ensemble(doc, select={'chan': 'BHZ'})
+    zref = [tr for tr in ref if tr.stats.channel == 'BHZ']
+    assert len(ens.member) == len(zref) == 3
+    for d, reftr in zip(ens.member, zref):
+        assert d.npts == reftr.stats.npts
+        assert np.allclose(np.array(d.data), reftr.data)
+    # a select matching nothing does not read the file
+    os.rename(fname, fname + '.moved')
+    ens = load_one_ensemble(doc, select={'chan': 'XXX'})
+    assert ens is not None
+    assert len(ens.member) == 0
+
+
+def test_dbsave_seed_ensemble_files(tmp_path):
+    client = Client('localhost')
+    client.drop_database('mspasspy_test_db')
+    db = Database(client, 'mspasspy_test_db')
+    # FLOAT64 files of the same length always have the same size
+    for name in ['a', 'b']:
+        obspy.Stream([_trace(name, 'BHZ', T0, 1000, np.float64)]).write(
+            str(tmp_path / (name + '.mseed')), format='MSEED', encoding='FLOAT64', reclen=512)
+    result = dbsave_seed_ensemble_files(db, str(tmp_path), pattern='*.mseed', nprocs=2)
+    assert result == {'indexed': 2, 'skipped': 0, 'failed': []}
+    col = db['import_miniseed_ensemble']
+    assert col.count_documents({}) == 2
+
+    # unchanged files are skipped on a rerun
+    result = dbsave_seed_ensemble_files(db, str(tmp_path), pattern='*.mseed', nprocs=2)
+    assert result == {'indexed': 0, 'skipped': 2, 'failed': []}
+    assert col.count_documents({}) == 2
+
+    # same size and modification time but new content is found by the checksum
+    fname = str(tmp_path / 'b.mseed')
+    old = col.find_one({'dfile': 'b.mseed'})
+    fstat = os.stat(fname)
+    obspy.Stream([_trace('b', 'BHZ', T0, 1000, np.float64)]).write(
+        fname, format='MSEED', encoding='FLOAT64', reclen=512)
+    os.utime(fname, ns=(fstat.st_atime_ns, fstat.st_mtime_ns))
+    assert os.stat(fname).st_size == fstat.st_size
+    result = dbsave_seed_ensemble_files(db, str(tmp_path), pattern='*.mseed', nprocs=2)
+    assert result == {'indexed': 1, 'skipped': 1, 'failed': []}
+    assert col.count_documents({}) == 2
+    new = col.find_one({'dfile': 'b.mseed'})
+    assert new['_id'] != old['_id']
+    assert new['file_checksum'] != old['file_checksum']
+
+    # a changed file that cannot be indexed keeps its old document
+    with open(fname, 'wb') as fh:
+        fh.write(bytes(4096))
+    result = dbsave_seed_ensemble_files(db, str(tmp_path), pattern='*.mseed', nprocs=2)
+    assert result['indexed'] == 0
+    assert result['skipped'] == 1
+    assert [f for f, errmsg in result['failed']] == [os.path.abspath(fname)]
+    assert col.count_documents({}) == 2
+    assert col.find_one({'dfile': 'b.mseed'})['_id'] == new['_id']
+    client.drop_database('mspasspy_test_db')
+
+
+def test_file_fingerprint(tmp_path):
+    fname = str(tmp_path / 'data')
+    data = np.random.bytes(300000)
+    with open(fname, 'wb') as fh:
+        fh.write(data)
+    fp = file_fingerprint(fname)
+    assert fp['file_size'] == 300000
+    assert fp['file_mtime'] == os.stat(fname).st_mtime
+    # the checksum depends only on the content
+    os.utime(fname, (0, 0))
+    assert file_fingerprint(fname)['file_checksum'] == fp['file_checksum']
+    # appended, changed in the middle and truncated files
+    for new in [data + b'x', data[:150000] + b'x' + data[150001:], data[:-1]]:
+        with open(fname, 'wb') as fh:
+            fh.write(new)
+        assert file_fingerprint(fname)['file_checksum'] != fp['file_checksum']
+    # files smaller than the blocks hashed
+    with open(fname, 'wb') as fh:
+        fh.write(b'abc')
+    assert file_fingerprint(fname)['file_size'] == 3
+
+
+def test_dbsave_raw_index_incremental(tmp_path):
+    client = Client('localhost')
+    client.drop_database('mspasspy_test_db')
+    db = Database(client, 'mspasspy_test_db')
+    col = db['import_miniseed_ensemble']
+    fname = str(tmp_path / 'raw.mseed')
+    obspy.Stream([_trace('S1', 'BHZ', T0, 1000, np.int32),
+                  _trace('S2', 'BHZ', T0, 1000, np.int32)]).write(fname, format='MSEED',
+                                                                 encoding='STEIM2', reclen=512)
+    result = dbsave_raw_index(db, obspy_mseed_file_indexer(fname), incremental=True)
+    assert result == {'inserted': 2, 'skipped_files': 0, 'replaced_files': 0}
+    # the ensemble documents of the same collection are outside the unique index
+    col.insert_one(_seed_ensemble_document(fname))
+    col.insert_one(_seed_ensemble_document(fname))
+    assert col.count_documents({'members': {'$exists': True}}) == 2
+
+    result = dbsave_raw_index(db, obspy_mseed_file_indexer(fname), incremental=True)
+    assert result == {'inserted': 0, 'skipped_files': 1, 'replaced_files': 0}
+    # without incremental the rows already saved are skipped by the unique index
+    assert dbsave_raw_index(db, obspy_mseed_file_indexer(fname))['inserted'] == 0
+    assert col.count_documents({'net': {'$exists': True}}) == 2
+
+    obspy.Stream([_trace('S1', 'BHZ', T0, 1000, np.int32)]).write(fname, format='MSEED',
+                                                                 encoding='STEIM2', reclen=512)
+    result = dbsave_raw_index(db, obspy_mseed_file_indexer(fname), incremental=True)
+    assert result == {'inserted': 1, 'skipped_files': 0, 'replaced_files': 1}
+    assert col.count_documents({'net': {'$exists': True}}) == 1
+    assert col.count_documents({'members': {'$exists': True}}) == 2
+
+    with pytest.raises(MsPASSError, match='incremental mode requires'):
+        dbsave_raw_index(db, obspy_mseed_file_indexer(fname).drop(columns=['file_checksum']),
+                         incremental=True)
+    client.drop_database('mspasspy_test_db')
+
+
+def test_raw_index_and_ensemble_files_shared_collection(tmp_path):
+    client = Client('localhost')
+    client.drop_database('mspasspy_test_db')
+    db = Database(client, 'mspasspy_test_db')
+    col = db['import_miniseed_ensemble']
+    fname = str(tmp_path / 'shared.mseed')
+    obspy.Stream([_trace('S1', 'BHZ', T0, 1000, np.int32),
+                  _trace('S2', 'BHZ', T0, 1000, np.int32)]).write(fname, format='MSEED',
+                                                                 encoding='STEIM2', reclen=512)
+    dbsave_raw_index(db, obspy_mseed_file_indexer(fname), incremental=True)
+    assert col.count_documents({'net': {'$exists': True}}) == 2
+
+    # a file with only raw index rows still gets its ensemble document
+    result = dbsave_seed_ensemble_files(db, str(tmp_path), pattern='*.mseed', nprocs=1)
+    assert result == {'indexed': 1, 'skipped': 0, 'failed': []}
+    assert col.count_documents({'members': {'$exists': True}}) == 1
+    result = dbsave_seed_ensemble_files(db, str(tmp_path), pattern='*.mseed', nprocs=1)
+    assert result == {'indexed': 0, 'skipped': 1, 'failed': []}
+
+    # reindexing a changed file replaces only its ensemble document
+    obspy.Stream([_trace('S1', 'BHZ', T0, 1000, np.int32)]).write(fname, format='MSEED',
+                                                                 encoding='STEIM2', reclen=512)
+    result = dbsave_seed_ensemble_files(db, str(tmp_path), pattern='*.mseed', nprocs=1)
+    assert result == {'indexed': 1, 'skipped': 0, 'failed': []}
+    assert col.count_documents({'members': {'$exists': True}}) == 1
+    assert col.count_documents({'net': {'$exists': True}}) == 2
+    result = dbsave_raw_index(db, obspy_mseed_file_indexer(fname), incremental=True)
+    assert result == {'inserted': 1, 'skipped_files': 0, 'replaced_files': 1}
+    assert col.count_documents({'members': {'$exists': True}}) == 1
+    client.drop_database('mspasspy_test_db')
+
+def _source_links(db):
+    return {doc['dfile']: (doc.get('source_id'), doc.get('evid'))
+            for doc in db['import_miniseed_ensemble'].find()}
+
+
+@pytest.mark.parametrize('prefer_evid', [False, True])
+def test_link_source_collection_bulk(prefer_evid):
+    client = Client('localhost')
+    client.drop_database('mspasspy_test_db')
+    db = Database(client, 'mspasspy_test_db')
+    # sources are inserted in time order so the last match of the per
+    # document mode is also the latest origin time used by the bulk mode
+    sources = [(995.0, None), (1995.0, None), (2003.0, 7), (2992.0, 8), (3005.0, None),
+               (4010.0, None)]
+    for time, evid in sources:
+        doc = {'source_id': 's' + str(int(time)), 'time': time}
+        if evid is not None:
+            doc['evid'] = evid
+        db['source'].insert_one(doc)
+    for dfile, starttime in [('A', 1000.0), ('B', 2000.0), ('C', 3000.0), ('D', 5000.0), ('E', 4000.0)]:
+        db['import_miniseed_ensemble'].insert_one({'dfile': dfile, 'starttime': starttime})
+
+    link_source_collection(db, dt=10.0, prefer_evid=prefer_evid)
+    expected = _source_links(db)
+    db['import_miniseed_ensemble'].update_many({}, {'$unset': {'source_id': '', 'evid': ''}})
+    link_source_collection(db, dt=10.0, prefer_evid=prefer_evid, bulk=True)
+    assert _source_links(db) == expected
+
+    assert expected['A'] == ('s995', None)
+    # no source within dt
+    assert expected['D'] == (None, None)
+    # the window includes its end points
+    assert expected['E'] == ('s4010', None)
+    if prefer_evid:
+        assert expected['B'] == ('s2003', 7)
+        assert expected['C'] == ('s2992', 8)
+    else:
+        assert expected['B'] == ('s2003', None)
+        assert expected['C'] == ('s3005', None)
+    client.drop_database('mspasspy_test_db')
+
+
+def _seed_member(net, sta, chan, t0):
+    ts = get_live_timeseries()
+    ts['net'] = net
+    ts['sta'] = sta
+    ts['chan'] = chan
+    ts['loc'] = ''
+    ts['starttime'] = t0
+    return ts
+
+
+def test_load_site_channel_data():
+    client = Client('localhost')
+    client.drop_database('mspasspy_test_db')
+    db = Database(client, 'mspasspy_test_db')
+    # S1 has two epochs, S2 two overlapping documents and S3 none
+    site = [('S1', 0.0, 100.0, 1.0), ('S1', 100.0, 200.0, 2.0),
+            ('S2', 0.0, 200.0, 3.0), ('S2', 0.0, 200.0, 4.0)]
+    for sta, stime, etime, lat in site:
+        db['site'].insert_one({'net': 'AA', 'sta': sta, 'lat': lat, 'lon': -lat, 'elev': 0.1,
+                               'site_id': sta + str(stime), 'starttime': stime, 'endtime': etime})
+        db['channel'].insert_one({'net': 'AA', 'sta': sta, 'chan': 'BHZ', 'loc': '', 'lat': lat,
+                                  'lon': -lat, 'elev': 0.1, 'vang': 0.0, 'hang': 0.0,
+                                  'starttime': stime, 'endtime': etime})
+    # a document of another net is not a match
+    db['site'].insert_one({'net': 'BB', 'sta': 'S3', 'lat': 9.0, 'lon': 9.0, 'elev': 0.1,
+                           'site_id': 'BB', 'starttime': 0.0, 'endtime': 200.0})
+
+    for loader in [load_site_data, load_channel_data]:
+        ens = TimeSeriesEnsemble()
+        for sta, t0 in [('S1', 50.0), ('S1', 150.0), ('S2', 50.0), ('S3', 50.0), ('S1', 60.0)]:
+            ens.member.append(_seed_member('AA', sta, 'BHZ', t0))
+        ens.member[4].kill()
+        loader(db, ens)
+        assert ens.member[0].live
+        assert ens.member[0]['site_lat'] == 1.0
+        assert ens.member[0].elog.size() == 0
+        assert ens.member[1]['site_lat'] == 2.0
+        # multiple matches use the first and post a complaint
+        assert ens.member[2].live
+        assert ens.member[2]['site_lat'] in [3.0, 4.0]
+        assert ens.member[2].elog.size() == 1
+        assert ens.member[2].elog.get_error_log()[0].badness == ErrorSeverity.Complaint
+        # no match kills the member with an error
+        assert ens.member[3].dead()
+        assert ens.member[3].elog.size() == 1
+        assert ens.member[3].elog.get_error_log()[0].badness == ErrorSeverity.Invalid
+        assert not ens.member[3].is_defined('site_lat')
+        # dead members are not touched
+        assert ens.member[4].dead()
+        assert ens.member[4].elog.size() == 0
+        assert not ens.member[4].is_defined('site_lat')
+
+    # an ensemble with only dead members does not query the database
+    ens = TimeSeriesEnsemble()
+    ens.member.append(_seed_member('AA', 'S1', 'BHZ', 50.0))
+    ens.member[0].kill()
+    assert load_site_data(db, ens).member[0].elog.size() == 0
+    client.drop_database('mspasspy_test_db')
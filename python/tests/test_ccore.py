@@ -1,12 +1,15 @@
 import array
+import concurrent.futures
 import copy
 import pickle
+import sys
 
 import numpy as np
 import pytest
 
 from mspasspy.ccore.seismic import (_CoreSeismogram,
                                     _CoreTimeSeries,
+                                    DoubleVector,
                                     Seismogram,
                                     SeismogramEnsemble,
                                     SlownessVector,
@@ -22,9 +25,24 @@ from mspasspy.ccore.utility import (AtomicType,
                                     MetadataDefinitions,
                                     MsPASSError,
                                     ProcessingHistory,
-                                    SphericalCoordinate)
-
-from mspasspy.ccore.algorithms.basic import ExtractComponent
+                                    SphericalCoordinate,
+                                    set_thread_pool_size,
+                                    thread_pool_size)
+
+from mspasspy.ccore.algorithms.basic import (agc,
+                                             Butterworth,
+                                             EnsembleComponent,
+                                             ExtractComponent)
+from mspasspy.ccore.algorithms.amplitudes import (_scale,
+                                                  _scale_ensemble_members,
+                                                  ScalingMethod)
+from mspasspy.ccore.algorithms.deconvolution import (MTPowerSpectrumEngine,
+                                                     WaterLevelDecon,
+                                                     clear_fft_plan_cache,
+                                                     decon_ensemble,
+                                                     fft_plan_cache_capacity,
+                                                     fft_plan_cache_size,
+                                                     set_fft_plan_cache_capacity)
 
 
 def make_constant_data_ts(d, t0=0.0, dt=0.1, nsamp=5, val=1.0):
@@ -637,6 +655,32 @@ def test_Seismogram():
     assert (seis.transformation_matrix == a).all()
 
 
+@pytest.mark.skipif(sys.version_info < (3, 8),
+                    reason="pickle protocol 5 requires python 3.8 or later")
+def test_pickle_out_of_band():
+    ts = TimeSeries(100)
+    ts = make_constant_data_ts(ts, nsamp=100)
+    ts.data = DoubleVector(np.random.rand(100))
+    # with protocol 5 the samples are passed out-of-band
+    buffers = []
+    ts_pickle = pickle.dumps(ts, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) == 1
+    assert len(ts_pickle) < 8 * ts.npts
+    ts_copy = pickle.loads(ts_pickle, buffers=buffers)
+    assert ts.data == ts_copy.data
+    assert ts_copy.npts == ts.npts
+
+    seis = Seismogram(100)
+    seis = make_constant_data_seis(seis, nsamp=100)
+    seis.data = dmatrix(np.random.rand(3, 100))
+    buffers = []
+    seis_pickle = pickle.dumps(seis, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) == 1
+    seis_copy = pickle.loads(seis_pickle, buffers=buffers)
+    assert (seis_copy.data[:] == seis.data[:]).all()
+    assert (seis_copy.transformation_matrix == seis.transformation_matrix).all()
+
+
 @pytest.fixture(params=[TimeSeriesEnsemble, SeismogramEnsemble])
 def Ensemble(request):
     return request.param
@@ -673,6 +717,36 @@ def test_Ensemble(Ensemble):
     es.update_metadata(Metadata({'k': 'v'}))
     assert es['k'] == 'v'
 
+    es_copy = pickle.loads(pickle.dumps(es))
+    assert es_copy['k'] == 'v'
+    assert len(es_copy.member) == 3
+    assert (np.array(es_copy.member[2].data) == np.array(es.member[2].data)).all()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8),
+                    reason="pickle protocol 5 requires python 3.8 or later")
+def test_Ensemble_pickle_out_of_band(Ensemble):
+    md = Metadata()
+    md['double'] = 3.14
+    es = Ensemble(md, 3)
+    for i in range(3):
+        if isinstance(es, TimeSeriesEnsemble):
+            d = make_constant_data_ts(TimeSeries(10), val=float(i))
+        else:
+            d = make_constant_data_seis(Seismogram(10), val=float(i))
+        es.member.append(d)
+    es.sync_metadata()
+    # pickle protocol 5 sends one out-of-band buffer per member
+    buffers = []
+    es_pickle = pickle.dumps(es, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) == 3
+    es_copy = pickle.loads(es_pickle, buffers=buffers)
+    assert es_copy['double'] == 3.14
+    assert len(es_copy.member) == 3
+    for i in range(3):
+        assert es_copy.member[i]['double'] == 3.14
+        assert (np.array(es_copy.member[i].data) == np.array(es.member[i].data)).all()
+
 
 def test_operators():
     d = _CoreTimeSeries(10)
@@ -986,6 +1060,212 @@ def test_ExtractComponent():
         assert (ts[i].data == seis.data[i]).all()
 
 
+def test_fft_plan_cache():
+    capacity = fft_plan_cache_capacity()
+    clear_fft_plan_cache()
+    assert fft_plan_cache_size() == 0
+    data = list(np.random.rand(100))
+    engine = MTPowerSpectrumEngine(100, 2.5, 4)
+    assert fft_plan_cache_size() == 1
+    spec = engine.apply(data)
+    # operators of the same length share the cached plan
+    engine2 = MTPowerSpectrumEngine(100, 2.5, 4)
+    assert fft_plan_cache_size() == 1
+    assert np.allclose(engine2.apply(data), spec)
+    MTPowerSpectrumEngine(75, 2.5, 4)
+    assert fft_plan_cache_size() == 2
+    # evicted plans stay valid for operators holding them
+    set_fft_plan_cache_capacity(1)
+    assert fft_plan_cache_size() == 1
+    clear_fft_plan_cache()
+    assert np.allclose(MTPowerSpectrumEngine(engine).apply(data), spec)
+    assert np.allclose(engine.apply(data), spec)
+    set_fft_plan_cache_capacity(capacity)
+
+
+def test_decon_ensemble():
+    md = Metadata({'water_level': 0.1,
+                   'operator_nfft': 1024,
+                   'shaping_wavelet_dt': 0.05,
+                   'deconvolution_data_window_start': -5.0,
+                   'deconvolution_data_window_end': 30.0,
+                   'target_sample_interval': 0.05,
+                   'shaping_wavelet_type': 'ricker',
+                   'shaping_wavelet_frequency': 1.0,
+                   'shaping_wavelet_frequency_for_inverse': 1.0})
+    npts = 701
+    tse = TimeSeriesEnsemble()
+    se = SeismogramEnsemble()
+    for i in range(3):
+        seis = Seismogram(npts)
+        seis = make_constant_data_seis(seis, t0=-5.0, dt=0.05, nsamp=npts)
+        seis.data = dmatrix(np.random.rand(3, npts))
+        se.member.append(seis)
+        tse.member.append(ExtractComponent(seis, 0))
+    wavelet = ExtractComponent(se.member[0], 2).data
+    tse.member[2].kill()
+
+    op = WaterLevelDecon(md)
+    rfe = decon_ensemble(op, tse, wavelet)
+    ref = WaterLevelDecon(md)
+    for i in range(2):
+        ref.loadwavelet(wavelet)
+        ref.loaddata(tse.member[i].data)
+        ref.process()
+        assert rfe.member[i].npts == npts
+        assert np.allclose(rfe.member[i].data, ref.getresult()[:npts])
+    # dead members are returned unaltered
+    assert rfe.member[2].dead()
+    assert np.allclose(rfe.member[2].data, tse.member[2].data)
+
+    # all three components use the same wavelet inverse
+    rfe3c = decon_ensemble(op, se, wavelet)
+    for k in range(3):
+        rfk = decon_ensemble(op, EnsembleComponent(se, k), wavelet)
+        for i in range(3):
+            assert np.allclose(rfe3c.member[i].data[k], rfk.member[i].data)
+
+    # one wavelet per member
+    wavelets = TimeSeriesEnsemble()
+    for i in range(3):
+        wavelets.member.append(ExtractComponent(se.member[i], 2))
+    rfe = decon_ensemble(op, se, wavelets)
+    ref.loadwavelet(wavelets.member[1].data)
+    ref.loaddata(ExtractComponent(se.member[1], 1).data)
+    ref.process()
+    assert np.allclose(rfe.member[1].data[1], ref.getresult()[:npts])
+
+    # python objects in member Metadata keep the GIL and are copied intact
+    obj = [1, 2]
+    se.member[1]['obj'] = obj
+    wavelets.member[1]['obj'] = obj
+    tse.member[0]['obj'] = obj
+    rfe_obj = decon_ensemble(op, se, wavelets)
+    assert rfe_obj.member[1]['obj'] == [1, 2]
+    assert np.allclose(rfe_obj.member[1].data, rfe.member[1].data)
+    rfe_obj = decon_ensemble(op, tse, wavelet)
+    assert rfe_obj.member[0]['obj'] == [1, 2]
+    wavelets.member.pop()
+    with pytest.raises(MsPASSError, match='size mismatch'):
+        decon_ensemble(op, se, wavelets)
+
+
+def test_thread_pool():
+    nthreads = thread_pool_size()
+    set_thread_pool_size(4)
+    assert thread_pool_size() == 4
+    se = SeismogramEnsemble()
+    for i in range(20):
+        seis = Seismogram(100)
+        seis = make_constant_data_seis(seis, nsamp=100)
+        seis.data = dmatrix(np.random.rand(3, 100))
+        se.member.append(seis)
+    se.member[3].kill()
+    se_copy = SeismogramEnsemble(se)
+    gains = agc(se, 2.0)
+    assert len(gains.member) == 20
+    assert gains.member[3].npts == 0
+    for i in [0, 7, 19]:
+        seis = Seismogram(se_copy.member[i])
+        gain = agc(seis, 2.0)
+        assert np.allclose(se.member[i].data, seis.data)
+        assert np.allclose(gains.member[i].data, gain.data)
+    # python objects in Metadata force the serial path
+    se_copy.member[5]['obj'] = [1, 2]
+    gains_serial = agc(se_copy, 2.0)
+    assert gains_serial.member[5]['obj'] == [1, 2]
+    assert np.allclose(gains_serial.member[7].data, gains.member[7].data)
+
+    ref = Seismogram(se.member[10])
+    amps = _scale_ensemble_members(se, ScalingMethod.Peak, 1.0)
+    assert len(amps) == 20
+    assert np.isclose(amps[10], _scale(ref, ScalingMethod.Peak, 1.0))
+    assert np.allclose(se.member[10].data, ref.data)
+    assert se.member[10]['calib'] == ref['calib']
+    set_thread_pool_size(1)
+    assert thread_pool_size() == 1
+    set_thread_pool_size(nthreads)
+
+
+def test_Butterworth_ensemble():
+    op = Butterworth(True, True, True, 2, 0.5, 2, 2.0, 0.1)
+    se = SeismogramEnsemble()
+    for i in range(10):
+        seis = Seismogram(200)
+        seis = make_constant_data_seis(seis, dt=0.1, nsamp=200)
+        seis.data = dmatrix(np.random.rand(3, 200))
+        se.member.append(seis)
+    # a different sample interval uses a second cached operator
+    se.member[4].dt = 0.02
+    se.member[6].kill()
+    se_copy = SeismogramEnsemble(se)
+    tse = EnsembleComponent(se_copy, 1)
+    op.apply(se)
+    assert op.dt() == 0.1
+    for i in [0, 4, 9]:
+        seis = Seismogram(se_copy.member[i])
+        Butterworth(op).apply(seis)
+        assert np.allclose(se.member[i].data, seis.data)
+    assert np.allclose(se.member[6].data, se_copy.member[6].data)
+
+    ts = TimeSeries(tse.member[4])
+    op.apply(tse)
+    Butterworth(op).apply(ts)
+    assert np.allclose(tse.member[4].data, ts.data)
+    assert np.allclose(tse.member[4].data, se.member[4].data[1])
+    assert tse.member[6].dead()
+
+    # upper corner too close to Nyquist is disabled with a complaint
+    tse2 = TimeSeriesEnsemble()
+    ts = TimeSeries(tse.member[0])
+    ts.dt = 1.0
+    tse2.member.append(ts)
+    ts = TimeSeries(ts)
+    op.apply(tse2)
+    assert tse2.member[0].elog.size() == 1
+    assert tse2.member[0].elog.get_error_log()[0].badness == ErrorSeverity.Complaint
+    # and matches the single object method filtering once with the operator left unchanged
+    op2 = Butterworth(op)
+    op2.apply(ts)
+    assert op2.dt() == 0.1
+    assert ts.elog.size() == 1
+    assert np.allclose(tse2.member[0].data, ts.data)
+    se2 = SeismogramEnsemble()
+    seis = Seismogram(se_copy.member[0])
+    seis.dt = 1.0
+    se2.member.append(seis)
+    seis = Seismogram(seis)
+    op.apply(se2)
+    op2.apply(seis)
+    assert op2.dt() == 0.1
+    assert seis.elog.size() == 1
+    assert np.allclose(se2.member[0].data, seis.data)
+
+
+def test_Butterworth_threads():
+    # threads sharing one operator that changes its sample interval on the
+    # first call all filter with consistent coefficients
+    op = Butterworth(True, True, True, 2, 0.5, 2, 2.0, 0.1)
+    data = []
+    for i in range(40):
+        ts = TimeSeries(1000)
+        ts = make_constant_data_ts(ts, dt=0.02, nsamp=1000)
+        ts.data = DoubleVector(np.random.rand(1000))
+        data.append(ts)
+    expected = []
+    for ts in data:
+        ts = TimeSeries(ts)
+        Butterworth(op).apply(ts)
+        expected.append(ts)
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        list(executor.map(op.apply, data))
+    for ts, ref in zip(data, expected):
+        assert np.allclose(ts.data, ref.data)
+    assert op.dt() == 0.02
+    assert np.isclose(op.low_corner(), 0.5)
+    assert np.isclose(op.high_corner(), 2.0)
+
+
 @pytest.fixture(params=[ProcessingHistory,
                         Seismogram,
                         TimeSeries])
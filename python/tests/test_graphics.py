@@ -0,0 +1,97 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+from matplotlib import pyplot
+
+from mspasspy.graphics import (minmax_envelope,
+                               _positive_envelope,
+                               wtva_raw)
+
+
+def _binned_minmax(y, ncols):
+    edges = np.linspace(0, len(y), ncols+1).astype(int)
+    ymin = [np.nanmin(y[edges[i]:edges[i+1]]) for i in range(ncols)]
+    ymax = [np.nanmax(y[edges[i]:edges[i+1]]) for i in range(ncols)]
+    return edges, np.array(ymin), np.array(ymax)
+
+
+@pytest.mark.parametrize("npts, ncols", [(1001, 10), (100, 7), (21, 10)])
+def test_minmax_envelope(npts, ncols):
+    y = np.random.rand(npts) - 0.5
+    index, envelope = minmax_envelope(y, ncols)
+    edges, ymin, ymax = _binned_minmax(y, ncols)
+    assert len(index) == 2*ncols
+    assert len(envelope) == 2*ncols
+    assert np.array_equal(envelope[0::2], ymin)
+    assert np.array_equal(envelope[1::2], ymax)
+    # each sample number lies inside its own bin
+    assert np.all(index[0::2] >= edges[:-1])
+    assert np.all(index[0::2] < edges[1:])
+    assert np.array_equal(index[0::2], index[1::2])
+
+
+@pytest.mark.parametrize("npts, ncols", [(5, 10), (20, 10), (1, 1)])
+def test_minmax_envelope_unaltered(npts, ncols):
+    y = np.random.rand(npts)
+    index, envelope = minmax_envelope(y, ncols)
+    assert np.array_equal(index, np.arange(npts))
+    assert np.array_equal(envelope, y)
+
+
+def test_minmax_envelope_nan():
+    y = np.arange(40.0)
+    y[5] = np.nan
+    y[20:30] = np.nan
+    index, envelope = minmax_envelope(y, 4)
+    assert envelope[0] == 0.0
+    assert envelope[1] == 9.0
+    assert np.isnan(envelope[4])
+    assert np.isnan(envelope[5])
+    assert envelope[6] == 30.0
+    assert envelope[7] == 39.0
+
+
+def test_positive_envelope():
+    y = np.random.rand(20)
+    index, envelope = minmax_envelope(y, 10)
+    assert _positive_envelope(index, envelope, len(y)) is None
+
+    y = np.sin(np.arange(1001)*0.7)
+    y[500:600] = -1.0
+    index, envelope = minmax_envelope(y, 10)
+    fill_index, fill = _positive_envelope(index, envelope, len(y))
+    edges, ymin, ymax = _binned_minmax(y, 10)
+    assert np.array_equal(fill_index, index[1::2])
+    assert np.array_equal(fill, np.maximum(ymax, 0.0))
+    assert fill[5] == 0.0
+    fill_index, fill = _positive_envelope(index, envelope, len(y), 0.5)
+    assert np.array_equal(fill, np.maximum(ymax, 0.5))
+
+
+def test_wtva_raw_lod_fill():
+    # A high frequency trace spans +-1 in every pixel column.  The full
+    # resolution shading then reaches the bin maximum in every column and
+    # so must the reduced one.
+    npts = 20000
+    section = np.zeros((npts, 2))
+    section[:, 0] = np.cos(np.pi*np.arange(npts))
+    section[:, 1] = np.sin(2*np.pi*np.arange(npts)/npts)
+    fig = pyplot.figure(figsize=(2, 2), dpi=50)
+    wtva_raw(section, 0.0, 0.001, color='r', lod=True)
+    fills = fig.axes[0].collections
+    assert len(fills) == 2
+    lines = fig.axes[0].get_lines()
+    x = lines[0].get_xdata()
+    t = lines[0].get_ydata()
+    assert len(x) < npts
+    xmax = x.max()
+    x0 = 0.5*(x.max() + x.min())
+    area = 0.0
+    for path in fills[0].get_paths():
+        for v in path.to_polygons():
+            area += 0.5*abs(np.dot(v[:-1, 0], v[1:, 1])
+                            - np.dot(v[1:, 0], v[:-1, 1]))
+    assert area == pytest.approx((xmax - x0)*(t.max() - t.min()), rel=0.02)
+    pyplot.close(fig)
@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 import obspy
 import bson.objectid
 import sys
@@ -17,7 +18,8 @@ from mspasspy.util.converter import (dict2Metadata,
                                      TimeSeries2Trace,
                                      Seismogram2Stream,
                                      Trace2TimeSeries,
-                                     Stream2Seismogram)
+                                     Stream2Seismogram,
+                                     TimeSeriesEnsemble2ndarray)
 
 def setup_function(function):
     ts_size = 255    
@@ -222,4 +224,29 @@ def test_SeismogramEnsemble_as_Stream():
     assert seis_e_c.member[0].data.columns() == 0
     assert seis_e_c['foo'] == 'bar'
     assert seis_e_c['fake_lat'] == 22.4
-    assert seis_e_c['fake_evid'] == 9999
\ No newline at end of file
+    assert seis_e_c['fake_evid'] == 9999
+
+
+def test_TimeSeriesEnsemble2ndarray():
+    tse = get_live_timeseries_ensemble(3)
+    for i in range(3):
+        tse.member[i].data = DoubleVector(np.random.rand(tse.member[i].npts))
+    tse.member[0].t0 = tse.member[1].t0 - 10.5 * tse.member[1].dt
+    tse.member[2].t0 = tse.member[1].t0 + 3 * tse.member[1].dt
+    [tmin, dt, work] = TimeSeriesEnsemble2ndarray(tse)
+    assert tmin == tse.member[0].t0
+    assert dt == tse.member[0].dt
+    # reference is the sample by sample loop this function replaces
+    m = int((max(d.endtime() for d in tse.member) - tmin) / dt + 1)
+    expected = np.zeros(shape=[m, 3])
+    for j in range(3):
+        d = tse.member[j]
+        for i in range(m):
+            t = tmin + i * dt
+            if t >= d.t0 and t <= d.endtime():
+                expected[i, j] = d.data[d.sample_number(t)]
+    assert np.array_equal(work, expected)
+
+    tse.member[1].dt = 2.0 * tse.member[0].dt
+    with pytest.raises(RuntimeError, match="Irregular sample rates"):
+        TimeSeriesEnsemble2ndarray(tse)
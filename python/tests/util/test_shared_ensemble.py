@@ -0,0 +1,87 @@
+import multiprocessing
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("multiprocessing.shared_memory")
+
+sys.path.append("python/tests")
+from helper import (get_live_timeseries_ensemble,
+                    get_live_seismogram_ensemble)
+
+from mspasspy.ccore.seismic import SeismogramEnsemble, TimeSeriesEnsemble
+from mspasspy.util.shared_ensemble import SharedEnsemble, SharedEnsembleHandle
+
+
+def _sum_member_data(handle, queue):
+    shared = SharedEnsemble.attach(handle)
+    queue.put(float(sum(shared.member_data(i).sum() for i in range(len(shared)))))
+    shared.close()
+
+
+def test_SharedEnsemble_TimeSeriesEnsemble():
+    tse = get_live_timeseries_ensemble(3)
+    tse['foo'] = 'bar'
+    with SharedEnsemble.create(tse) as shared:
+        handle = pickle.loads(pickle.dumps(shared.handle))
+        assert isinstance(handle, SharedEnsembleHandle)
+        assert len(handle) == 3
+        # the handle carries no sample data
+        assert len(pickle.dumps(handle)) < 8 * sum(d.npts for d in tse.member)
+
+        attached = SharedEnsemble.attach(handle)
+        for i in range(3):
+            data = attached.member_data(i)
+            assert np.array_equal(data, np.array(tse.member[i].data))
+            del data
+        tse_copy = attached.to_ensemble()
+        attached.close()
+        assert isinstance(tse_copy, TimeSeriesEnsemble)
+        assert tse_copy['foo'] == 'bar'
+        for i in range(3):
+            assert tse_copy.member[i].t0 == tse.member[i].t0
+            assert np.array_equal(np.array(tse_copy.member[i].data), np.array(tse.member[i].data))
+
+        ctx = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_sum_member_data, args=(handle, queue))
+        proc.start()
+        total = queue.get(timeout=60)
+        proc.join()
+        assert np.isclose(total, sum(np.array(d.data).sum() for d in tse.member))
+
+
+def test_SharedEnsemble_SeismogramEnsemble():
+    seis_e = get_live_seismogram_ensemble(2)
+    with SharedEnsemble.create(seis_e) as shared:
+        data = shared.member_data(1)
+        assert data.shape == (3, seis_e.member[1].npts)
+        assert np.array_equal(data, seis_e.member[1].data)
+        del data
+        seis_copy = shared.member(0)
+        assert np.array_equal(seis_copy.data, seis_e.member[0].data)
+        assert isinstance(shared.to_ensemble(), SeismogramEnsemble)
+
+    with pytest.raises(TypeError, match="only TimeSeriesEnsemble and SeismogramEnsemble"):
+        SharedEnsemble.create(seis_e.member[0])
+
+
+def test_SharedEnsemble_attach_unrelated_process():
+    tse = get_live_timeseries_ensemble(2)
+    with SharedEnsemble.create(tse) as shared:
+        # a process not started by multiprocessing has its own resource
+        # tracker, which must not unlink the block when the process exits
+        script = ("import pickle, sys\n"
+                  "from mspasspy.util.shared_ensemble import SharedEnsemble\n"
+                  "shared = SharedEnsemble.attach(pickle.loads(sys.stdin.buffer.read()))\n"
+                  "print(len(shared.to_ensemble().member))\n"
+                  "shared.close()\n")
+        proc = subprocess.run([sys.executable, '-c', script], input=pickle.dumps(shared.handle),
+                              stdout=subprocess.PIPE, check=True)
+        assert proc.stdout.strip() == b'2'
+        attached = SharedEnsemble.attach(shared.handle)
+        assert np.array_equal(attached.member_data(1), np.array(tse.member[1].data))
+        attached.close()